@@ -14,10 +14,43 @@ const m = String(today.getMonth() + 1).padStart(2, "0");
 const d = String(today.getDate()).padStart(2, "0");
 todayLabel.textContent = `${y}/${m}/${d}`;
 
+// --- 分割データ（publish.py が data/shards/ に出力） ---
+// manifest.json だけ毎回確認し、ハッシュ付きのファイルは名前が変わったときだけ取得する
+const SHARDS = new URL("data/shards/", document.baseURI);
+const shardCache = new Map();
+
+async function fetchManifest() {
+  const res = await fetch(new URL("manifest.json", SHARDS), { cache: "no-cache" });
+  if (!res.ok) return null;
+  return res.json();
+}
+
+async function fetchShard(file) {
+  if (!shardCache.has(file)) {
+    const promise = fetch(new URL(file, SHARDS)).then((res) => {
+      if (!res.ok) throw new Error(`${file} の取得失敗`);
+      return res.json();
+    });
+    promise.catch(() => shardCache.delete(file));
+    shardCache.set(file, promise);
+  }
+  return shardCache.get(file);
+}
+
 // --- データ取得 ---
+let currentVenue = null; // 出走表を表示中の場コード（一覧表示中は null）
+
 async function loadRaceData() {
+  currentVenue = null;
   try {
-    const res = await fetch("../data/data.json?_=" + Date.now()); // キャッシュ回避
+    const manifest = await fetchManifest().catch(() => null);
+    if (manifest && manifest.venues) {
+      renderVenues(await fetchShard(manifest.venues));
+      return;
+    }
+
+    // 分割データが無いときは従来どおり data.json を丸ごと読む
+    const res = await fetch("../data/data.json", { cache: "no-cache" }); // ETag で再検証
     if (!res.ok) throw new Error("データ取得失敗");
     const data = await res.json();
 
@@ -37,7 +70,8 @@ function renderVenues(data) {
     const div = document.createElement("div");
     div.className = "venue-card";
 
-    const isOpen = item.races && item.races.length > 0;
+    const count = item.race_count ?? (item.races ? item.races.length : 0);
+    const isOpen = count > 0;
     const status = isOpen ? "開催中" : "ー";
     const hitRate = item.hit_rate ? `${item.hit_rate}%` : "ー";
 
@@ -57,7 +91,16 @@ function renderVenues(data) {
 }
 
 // --- 出走表表示 ---
-function showRaces(item) {
+async function showRaces(item) {
+  currentVenue = item.venue_code || null;
+  if (item.file) {
+    try {
+      item = await fetchShard(item.file);
+    } catch (err) {
+      console.error("❌ 出走表の読み込みエラー:", err);
+    }
+  }
+
   VIEW.innerHTML = `
     <button id="backBtn" class="back-btn">← 戻る</button>
     <h2>${item.venue}（的中率：${item.hit_rate || "ー"}%）</h2>
@@ -81,8 +124,48 @@ function showRaces(item) {
   document.getElementById("backBtn").addEventListener("click", loadRaceData);
 }
 
+// --- 更新通知（サーバーが /events を持っている場合だけ） ---
+// 更新があったときだけ取り直すので、定期的に data.json を取りに行く必要はない
+let lastVersion = null;
+
+async function refreshView(event) {
+  const missed = event.previous !== lastVersion; // 途中の通知を取りこぼした
+  lastVersion = event.version;
+  if (!currentVenue) return loadRaceData();
+  if (!missed && event.changed && !(currentVenue in event.changed)) return; // 表示中の場は変わっていない
+  const manifest = await fetchManifest();
+  const entry = manifest && manifest.venue[currentVenue];
+  if (entry) showRaces({ venue_code: currentVenue, file: entry.file });
+}
+
+function watchUpdates() {
+  if (!("EventSource" in window)) return;
+  const source = new EventSource(new URL("events", document.baseURI));
+  let opened = false;
+  source.addEventListener("open", () => { opened = true; });
+  source.addEventListener("change", (e) => {
+    const event = JSON.parse(e.data);
+    if (lastVersion === null || event.version === lastVersion) {
+      lastVersion = event.version; // 接続直後の通知は今のバージョンを覚えるだけ
+      return;
+    }
+    refreshView(event).catch((err) => console.error("❌ 更新の反映に失敗:", err));
+  });
+  source.addEventListener("error", () => {
+    if (!opened) source.close(); // 静的ホスティングなど /events が無い環境
+  });
+}
+
 // --- 更新ボタン ---
 refreshBtn.addEventListener("click", loadRaceData);
 
 // --- 初期表示 ---
-loadRaceData();
\ No newline at end of file
+loadRaceData();
+watchUpdates();
+
+// --- オフライン用キャッシュ ---
+if ("serviceWorker" in navigator) {
+  navigator.serviceWorker.register("service-worker.js").catch((err) => {
+    console.warn("⚠️ Service Worker 登録失敗:", err);
+  });
+}
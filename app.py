@@ -1,24 +1,58 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
+# =========================================
+# app.py
+# API とフロント配信を1つにまとめた FastAPI アプリ（Render: uvicorn app:app）
+#
+#   /                       フロント（static/index.html）
+#   /data                   data.json ＋ 各ファイルの更新情報
+#   /data/data.json         data.json そのまま
+#   /data/delta?since=      前回の版からの差分
+#   /data/shards/...        場・レース単位の分割データ（publish.py）
+#   /races /venues          絞り込み・ページ分け
+#   /events                 更新通知（Server-Sent Events）
+#   /predict /predict/batch 常駐モデルでの予測（/predict/metrics で所要時間）
+#   /status /health /startup
+#   /admin/rollback         1つ前のモデル・データに戻す（ADMIN_TOKEN を設定したときだけ）
+#
+# 起動を速くするため、pandas / sklearn / joblib はここでは import しない。
+# データは lifespan で1回だけ読み込み、モデルはバックグラウンドで読み込む。
+# 起動後のファイル更新（ワークフローのコミット）は HotReloader が検証してから差し替える。
+# =========================================
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import os
-import json
+import secrets
+import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-app = FastAPI()
+from fastapi import FastAPI, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
 
-# CORS許可（外部アクセス対応）
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+import publish
+from modules import compression, serializer
+from modules.change_feed import ChangeFeed, sse_response
+from modules.hot_reload import HotReloader
+from modules.model_store import ModelStore
+from modules.predict_api import predict_router
+from modules.race_api import delta_router, race_router
+from modules.response_cache import FileCache, respond, respond_json
 
-DATA_FILE = "data.json"
-HISTORY_FILE = "history_data.json"
+DATA_FILE = os.path.join("data", "data.json")
+PREDICTION_FILE = "prediction.json"
+HISTORY_FILE = os.path.join("history_data", "manifest.json")  # merge_data.py の日付別ストア
 FEATURES_FILE = "features.csv"
-MODEL_FILE = "model.pkl"
+MODEL_FILE = os.environ.get("MODEL_FILE", "model.pkl")
+SHARD_DIR = os.path.join("data", "shards")
+STATIC_DIR = "static"
+# ルートの index.html から相対パスで読まれるフロントのファイル
+FRONTEND_FILES = ("app.js", "ai.js", "ai_engine.js", "service-worker.js", "style.css", "manifest.webmanifest")
+# 起動時に読み込まれていないことを確認する重いモジュール
+HEAVY_MODULES = ("pandas", "numpy", "sklearn", "joblib", "pyarrow", "bs4", "requests")
+# /admin/rollback に必要なトークン（未設定なら /admin/rollback は無効）
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 
 def file_info(path):
     """ファイルの存在確認と更新日時を返す"""
@@ -29,23 +63,18 @@ def file_info(path):
     else:
         return {"exists": False, "last_updated": None, "size": 0}
 
-@app.get("/")
-def root():
-    return {"status": "ok", "message": "Boat Race AI API running 🚤"}
 
-@app.get("/data")
-def get_data():
-    """メインデータ取得 + モデル・特徴量の更新情報を含む"""
+def build_data():
+    """/data の中身（ステータスコード, payload）"""
     if not os.path.exists(DATA_FILE):
-        return JSONResponse(content={"status": "error", "detail": "data.json が見つかりません。"}, status_code=404)
+        return 404, {"status": "error", "detail": f"{DATA_FILE} が見つかりません。"}
 
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = serializer.load(DATA_FILE)
     except Exception as e:
-        return JSONResponse(content={"status": "error", "detail": f"データ読み込み失敗: {e}"}, status_code=500)
+        return 500, {"status": "error", "detail": f"データ読み込み失敗: {e}"}
 
-    response = {
+    return 200, {
         "status": "ok",
         "count": len(data) if isinstance(data, list) else 0,
         "data": data,
@@ -57,12 +86,19 @@ def get_data():
         }
     }
 
-    return JSONResponse(content=response, status_code=200)
 
-@app.get("/status")
-def get_status():
-    """APIと各ファイルの状態確認用"""
-    return {
+def build_raw_data():
+    """/data/data.json（ファイルの中身そのまま）"""
+    if not os.path.exists(DATA_FILE):
+        return 404, {"status": "error", "detail": f"{DATA_FILE} が見つかりません。"}
+    try:
+        return 200, serializer.load(DATA_FILE)
+    except Exception as e:
+        return 500, {"status": "error", "detail": f"データ読み込み失敗: {e}"}
+
+
+def build_status():
+    return 200, {
         "status": "running",
         "files": {
             "data.json": file_info(DATA_FILE),
@@ -72,7 +108,176 @@ def get_status():
         }
     }
 
-@app.get("/health")
-def health_check():
-    """RenderのHealth Check対応"""
-    return {"ok": True}
\ No newline at end of file
+
+def build_manifest():
+    """data.json / prediction.json が更新されたら分割し直す（変わっていないファイルは書かない）"""
+    try:
+        manifest = publish.publish(DATA_FILE, PREDICTION_FILE, SHARD_DIR)
+    except Exception as e:
+        return 500, {"error": str(e)}
+    compression.precompress_dir(SHARD_DIR)
+    return 200, manifest
+
+
+def _timed(report, name, func):
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        print(f"[WARN] {name} の事前読み込み失敗: {e}")
+    report[name] = round(time.perf_counter() - start, 4)
+
+
+def create_app(preload_model=True):
+    """
+    アプリを組み立てる。起動時（lifespan）に各キャッシュを1回作っておき、
+    最初のリクエストでファイルを読まないようにする。
+    """
+    # 対象ファイルの mtime が変わったときだけ作り直す（シリアライズ済みのまま保持）
+    watched = [DATA_FILE, HISTORY_FILE, FEATURES_FILE, MODEL_FILE]
+    data_cache = FileCache(watched, build_data)
+    status_cache = FileCache(watched, build_status)
+    raw_cache = FileCache([DATA_FILE], build_raw_data)
+    manifest_cache = FileCache([DATA_FILE, PREDICTION_FILE], build_manifest)
+    feed = ChangeFeed(manifest_cache, diff=publish.delta)
+    races = race_router(DATA_FILE)
+    delta = delta_router(DATA_FILE, PREDICTION_FILE)
+    model = ModelStore(MODEL_FILE)
+    reloader = HotReloader({
+        "data": [data_cache, raw_cache, status_cache, manifest_cache, races.index, delta.log],
+        "model": [model],
+    })
+
+    @asynccontextmanager
+    async def lifespan(app):
+        start = time.perf_counter()
+        preload = {}
+        if os.path.isdir(STATIC_DIR):
+            _timed(preload, "static_precompress", lambda: compression.precompress_dir(STATIC_DIR))
+        _timed(preload, "data", data_cache.get)
+        _timed(preload, "data_raw", raw_cache.get)
+        _timed(preload, "status", status_cache.get)
+        _timed(preload, "race_index", races.index.get)
+        _timed(preload, "delta", delta.log.prepare)
+        _timed(preload, "shards", manifest_cache.get)
+        if preload_model:
+            model.load_async()  # 数秒かかるので待たない（使う側は get() で待つ）
+        app.state.startup.update({
+            "preload_seconds": preload,
+            "startup_seconds": round(time.perf_counter() - start, 4),
+            "ready_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        print(f"[INFO] 起動完了: import {app.state.startup['import_seconds']}s / "
+              f"事前読み込み {app.state.startup['startup_seconds']}s")
+        # ここから先の更新確認・読み込みはリクエストの外で行う
+        reloader.start()
+        yield
+        reloader.stop()
+        feed.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.startup = dict(STARTUP)
+    app.state.model = model
+    app.state.reloader = reloader
+
+    # CORS許可（外部アクセス対応）
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # static 配信（事前圧縮版があればそれを返す）
+    files = compression.PrecompressedStaticFiles(directory=STATIC_DIR, check_dir=False)
+    if os.path.isdir(STATIC_DIR):
+        app.mount("/static", files, name="static")
+
+    @app.get("/")
+    async def root(request: Request):
+        """フロントがあればトップページ、無ければ稼働確認"""
+        index = os.path.join(STATIC_DIR, "index.html")
+        if os.path.exists(index):
+            return files.file_response(index, os.stat(index), request.scope)
+        return {"status": "ok", "message": "Boat Race AI API running 🚤"}
+
+    # キャッシュが当たれば I/O も無いので、スレッドプールを通さず async で返す
+    @app.get("/data")
+    async def get_data(request: Request):
+        """メインデータ取得 + モデル・特徴量の更新情報を含む"""
+        return respond(data_cache, request)
+
+    @app.get("/data/data.json")
+    async def get_raw_data(request: Request):
+        """data.json そのまま（フロントの ../data/data.json）"""
+        return respond(raw_cache, request)
+
+    @app.get("/status")
+    async def get_status(request: Request):
+        """APIと各ファイルの状態確認用"""
+        return respond(status_cache, request)
+
+    @app.get("/health")
+    def health_check():
+        """RenderのHealth Check対応"""
+        return {"ok": True}
+
+    @app.get("/startup")
+    async def get_startup():
+        """import・起動にかかった時間と、読み込み済みの重いモジュール"""
+        return {**app.state.startup,
+                "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+                "model": model.info(),
+                "hot_reload": reloader.info()}
+
+    @app.post("/admin/rollback")
+    async def rollback(request: Request, target: str = Query(..., pattern="^(model|data)$")):
+        """新しいモデル・データに問題があったとき、読み込み済みの1つ前の版にすぐ戻す"""
+        if not ADMIN_TOKEN:
+            return respond_json(request, {"error": "not found"}, status=404)
+        if not secrets.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+            return respond_json(request, {"error": "forbidden"}, status=403)
+        restored = reloader.rollback(target)
+        if not restored:
+            return respond_json(request, {"error": f"{target} に戻せる版がありません"}, status=409)
+        print(f"[INFO] {target} を1つ前の版に戻しました（{restored}件）")
+        return respond_json(request, {"target": target, "restored": restored, "hot_reload": reloader.info()})
+
+    # /races?date=&venue=&race_no=&fields=&offset=&limit= と /venues
+    app.include_router(races)
+    # /data/delta?since= （前回の版から変わったレース・予想だけ）
+    app.include_router(delta)
+    # /predict /predict/batch /predict/metrics（model.pkl を読み込み直さずに予測）
+    app.include_router(predict_router(model, races.index))
+
+    # 分割データの目次（毎回確認させる）。mount より先に定義して静的ファイルより優先させる
+    @app.get("/data/shards/manifest.json")
+    async def get_manifest(request: Request):
+        return respond(manifest_cache, request)
+
+    # 更新通知（Server-Sent Events）。クライアントはこれを受けてから manifest を取り直す
+    @app.get("/events")
+    async def get_events(request: Request):
+        return sse_response(feed, request)
+
+    # 分割データ本体（ファイル名にハッシュが入っているので長期キャッシュ可）
+    app.mount("/data/shards", compression.HashedStaticFiles(directory=SHARD_DIR, check_dir=False),
+              name="shards")
+
+    # index.html が読むフロントのファイル（決まったものだけ返す）
+    @app.get("/{name}")
+    async def read_frontend(name: str, request: Request):
+        if name not in FRONTEND_FILES or not os.path.exists(name):
+            return respond_json(request, {"error": "not found"}, status=404)
+        return files.file_response(name, os.stat(name), request.scope)
+
+    return app
+
+
+# import にかかった時間（インタプリタ起動は含まない）
+STARTUP = {
+    "import_seconds": round(time.perf_counter() - _IMPORT_START, 4),
+    "heavy_modules_at_import": [m for m in HEAVY_MODULES if m in sys.modules],
+}
+
+app = create_app()
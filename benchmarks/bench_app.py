@@ -0,0 +1,150 @@
+# =========================================
+# benchmarks/bench_app.py
+# app.py /data のスループット比較
+# （旧: 毎回 json.load + stat + JSONResponse / 新: mtime キーのシリアライズ済みキャッシュ + ETag）
+#
+#   python -m benchmarks.bench_app
+#
+# サーバーは uvicorn を別プロセスで起動し、クライアントも複数プロセスで叩く。
+# =========================================
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENTS = 4
+DURATION = 3.0
+
+# 変更前の app.py の /data（比較用）
+LEGACY_APP = '''
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+import os, json
+from datetime import datetime
+
+app = FastAPI()
+DATA_FILE = "data.json"
+HISTORY_FILE = os.path.join("history_data", "manifest.json")
+FEATURES_FILE = "features.csv"
+MODEL_FILE = "model.pkl"
+
+def file_info(path):
+    if os.path.exists(path):
+        mtime = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
+        size = os.path.getsize(path)
+        return {"exists": True, "last_updated": mtime, "size": size}
+    return {"exists": False, "last_updated": None, "size": 0}
+
+@app.get("/data")
+def get_data():
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return JSONResponse(content={
+        "status": "ok", "count": len(data) if isinstance(data, list) else 0, "data": data,
+        "meta": {"data_json": file_info(DATA_FILE), "history_json": file_info(HISTORY_FILE),
+                 "features_csv": file_info(FEATURES_FILE), "model_pkl": file_info(MODEL_FILE)}})
+'''
+
+
+def synthetic_data(venues=24):
+    """fetch_data_playwright 形式で全場・全レース・6艇ぶん埋まったデータ"""
+    return [{
+        "venue": f"場{v}", "code": f"{v:02d}", "date": "20250101", "hit_rate": 70,
+        "races": [{"race_no": r, "racer": f"選手{v}-{r}", "mark": "◎",
+                   "boats": [{"lane": b, "racer_name": f"選手{v}{r}{b}", "racer_class": "A1",
+                              "racer_start_timing": "0.15", "racer_national_win_rate": "6.50"}
+                             for b in range(1, 7)]} for r in range(1, 13)],
+    } for v in range(1, venues + 1)]
+
+
+def start_server(module, port, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=env)
+    url = f"http://127.0.0.1:{port}/data"
+    for _ in range(100):
+        try:
+            requests.get(url, timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{module} が起動しませんでした")
+
+
+def client(url, headers, deadline):
+    """1プロセス分のクライアント（keep-alive の http.client で叩き続ける）"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port)
+    count = size = 0
+    while time.time() < deadline:
+        conn.request("GET", parts.path, headers=headers)
+        resp = conn.getresponse()
+        size += len(resp.read())
+        count += 1
+    conn.close()
+    return count, size
+
+
+def load(url, conditional=False):
+    """CLIENTS 個のプロセスで DURATION 秒叩き、(req/s, 1件あたりのバイト数) を返す"""
+    etag = requests.get(url).headers.get("ETag")
+    headers = {"If-None-Match": etag} if conditional and etag else {}
+    deadline = time.time() + DURATION
+    with ProcessPoolExecutor(max_workers=CLIENTS) as pool:
+        results = list(pool.map(client, [url] * CLIENTS, [headers] * CLIENTS, [deadline] * CLIENTS))
+    total = sum(c for c, _ in results)
+    return total / DURATION, sum(s for _, s in results) / max(total, 1)
+
+
+def main():
+    cases = []
+    if os.path.exists(os.path.join(ROOT, "data", "data.json")):
+        with open(os.path.join(ROOT, "data", "data.json"), "r", encoding="utf-8") as f:
+            cases.append(("data/data.json", json.load(f)))
+    cases.append(("24場×12R×6艇（合成）", synthetic_data()))
+
+    print(f"clients={CLIENTS} duration={DURATION}s")
+    print(f"{'payload':<24}{'variant':<22}{'req/s':>9}{'bytes/req':>11}")
+    for name, data in cases:
+        work = tempfile.mkdtemp(prefix="bench_app_")
+        servers = []
+        try:
+            # 旧 app.py はルートの data.json、今の app.py は data/data.json を読む
+            os.makedirs(os.path.join(work, "data"))
+            for path in ("data.json", os.path.join("data", "data.json")):
+                with open(os.path.join(work, path), "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(os.path.join(work, "legacy_app.py"), "w", encoding="utf-8") as f:
+                f.write(LEGACY_APP)
+            legacy, legacy_url = start_server("legacy_app", 8761, work)
+            servers.append(legacy)
+            cached, cached_url = start_server("app", 8762, work)
+            servers.append(cached)
+            results = [
+                ("legacy", load(legacy_url)),
+                ("cached", load(cached_url)),
+                ("cached + If-None-Match", load(cached_url, conditional=True)),
+            ]
+            base = results[0][1][0]
+            for variant, (rps, size) in results:
+                print(f"{name:<24}{variant:<22}{rps:>9.0f}{size:>11.0f}  ({rps / base:.1f}x)")
+        finally:
+            for proc in servers:
+                proc.terminate()
+                proc.wait()
+            shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
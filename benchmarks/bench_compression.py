@@ -0,0 +1,44 @@
+# =========================================
+# benchmarks/bench_compression.py
+# main.py が返すデータの転送量（無圧縮 / gzip / brotli）と圧縮にかかる時間
+#
+#   python -m benchmarks.bench_compression
+# =========================================
+import json
+import os
+import time
+
+from modules import compression, serializer
+
+FILES = ["data/data.json", "static/index.html", "static/style.css"]
+
+
+def measure(body):
+    rows = [("identity", len(body), 0.0)]
+    for enc in ("gzip", "br"):
+        if enc not in compression.ENCODINGS:
+            continue
+        started = time.perf_counter()
+        packed = compression.compress(body, enc)
+        rows.append((enc, len(packed), time.perf_counter() - started))
+    return rows
+
+
+def main():
+    print(f"{'file':<28}{'encoding':<10}{'bytes':>9}{'ratio':>8}{'compress(ms)':>14}")
+    for path in FILES:
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            body = f.read()
+        if path.endswith(".json"):
+            # /data はコンパクトJSONに直したものを返す（旧 main.py も JSONResponse で詰めて返していた）
+            print(f"{path + ' (indent=2)':<28}{'file':<10}{len(body):>9,}")
+            body = serializer.dumps(json.loads(body))
+        rows = measure(body)
+        for enc, size, elapsed in rows:
+            print(f"{path:<28}{enc:<10}{size:>9,}{size / rows[0][1]:>8.1%}{elapsed * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# =========================================
+# benchmarks/bench_extract.py
+# window.__RACE_DATA__ 抽出の速度比較（旧: DOTALL正規表現 / 新: 代入位置の特定 + raw_decode）
+#
+#   python -m benchmarks.bench_extract
+# =========================================
+import json
+import re
+import time
+
+from fetch_data import extract_race_json
+
+SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+
+
+def regex_extract(html):
+    """従来実装（比較用）"""
+    match = re.search(r"window\.__RACE_DATA__\s*=\s*(\{.*?\});", html, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1))
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def synthetic_page(size, comment="前走は好調 {注意}", terminator=";"):
+    """約 size バイトのページ（大きめのJSONの前後にHTMLを詰める）"""
+    racers = [{
+        "teiban": i % 6 + 1,
+        "name": f"選手{i}",
+        "comment": comment,
+        "stAvg": 0.15,
+    } for i in range(max(6, size // 2000))]
+    data = json.dumps({"racers": racers}, ensure_ascii=False)
+    filler = "<div class='x'>{ padding } </div>\n" * (size // 40)
+    return (f"<html><body>{filler}<script>window.__RACE_DATA__ = {data}{terminator}</script>"
+            f"{filler}<script>var cfg = {{a: 1}};</script></body></html>")
+
+
+CASES = [
+    # (名前, ページ生成の追加引数)
+    ("clean", {}),
+    ("no-semicolon", {"terminator": "\n"}),   # 正規表現は後続のHTML全体を走査する
+    ("'};' in string", {"comment": "前走は};で終了"}),  # 正規表現は途中で切れる
+]
+
+
+def timeit(fn, html, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    decoder = json.JSONDecoder()
+    print(f"{'case':<16}{'size(KB)':>9}{'regex(ms)':>11}{'scan(ms)':>10}{'speedup':>9}  regex ok / scan ok")
+    for name, kwargs in CASES:
+        for size in SIZES:
+            html = synthetic_page(size, **kwargs)
+            start = html.index("window.__RACE_DATA__ = ") + len("window.__RACE_DATA__ = ")
+            expected, _ = decoder.raw_decode(html, start)
+            t_old, r_old = timeit(regex_extract, html)
+            t_new, r_new = timeit(extract_race_json, html)
+            print(f"{name:<16}{len(html.encode()) // 1024:>9}{t_old * 1000:>11.2f}{t_new * 1000:>10.2f}"
+                  f"{t_old / t_new:>8.1f}x  {r_old == expected!s:>8} / {r_new == expected!s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# =========================================
+# benchmarks/bench_feature_store.py
+# 特徴量の読み書き比較（旧: features.csv を丸ごと to_csv / read_csv、
+#                      新: race_date ごとの Arrow IPC パーティション + 列指定読み込み）
+#
+#   python -m benchmarks.bench_feature_store [行数]
+# =========================================
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.feature_store import FeatureStore
+
+ROWS = 1_000_000
+ROWS_PER_DAY = 864   # 12場 × 12R × 6艇
+TRAIN_COLUMNS = ["racer_course_number", "racer_start_timing", "race_wind", "race_wave",
+                 "race_weather_number", "racer_place_number"]
+
+
+def synthetic_features(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    first = date(2020, 1, 1)
+    days = [(first + timedelta(days=i)).isoformat() for i in range(rows // ROWS_PER_DAY + 1)]
+    day_index = np.arange(rows) // ROWS_PER_DAY
+    return pd.DataFrame({
+        "race_date": np.array(days)[day_index],
+        "race_stadium_number": (np.arange(rows) // 72) % 12 + 1,
+        "race_number": (np.arange(rows) // 6) % 12 + 1,
+        "racer_boat_number": np.arange(rows) % 6 + 1,
+        "racer_course_number": np.arange(rows) % 6 + 1,
+        "racer_number": rng.integers(3000, 5200, rows),
+        "racer_start_timing": rng.normal(0.16, 0.05, rows).round(2),
+        "racer_place_number": rng.integers(1, 7, rows),
+        "race_wind": rng.integers(0, 9, rows),
+        "race_wave": rng.integers(0, 11, rows),
+        "race_weather_number": rng.integers(1, 6, rows),
+        "racer_name": [f"選手{i % 2200}" for i in range(rows)],
+    })
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    df = synthetic_features(rows)
+    work = tempfile.mkdtemp(prefix="bench_features_")
+    try:
+        csv_path = os.path.join(work, "features.csv")
+        store = FeatureStore(os.path.join(work, "features"))
+        if store.pa is None:
+            print("[WARN] pyarrow が無いため CSV パーティションで計測します")
+
+        t_csv_write, _ = timed(df.to_csv, csv_path, index=False, encoding="utf-8-sig")
+        t_store_write, dates = timed(store.write, df)
+        last_day = dates[-1]
+
+        t_csv_all, csv_all = timed(pd.read_csv, csv_path, encoding="utf-8-sig")
+        t_csv_cols, _ = timed(pd.read_csv, csv_path, usecols=TRAIN_COLUMNS, encoding="utf-8-sig")
+        t_store_all, store_all = timed(store.read)
+        t_store_cols, _ = timed(store.read, TRAIN_COLUMNS)
+        t_store_day, day = timed(store.read, None, last_day, last_day)
+
+        assert len(csv_all) == len(store_all) == rows
+        assert store_all["racer_place_number"].sum() == csv_all["racer_place_number"].sum()
+
+        mb = 1024 * 1024
+        print(f"rows={rows:,}  partitions={len(dates)}  "
+              f"csv={os.path.getsize(csv_path) / mb:.1f}MB  store={dir_size(store.root) / mb:.1f}MB")
+        print(f"{'operation':<28}{'csv(s)':>9}{'store(s)':>10}{'speedup':>9}")
+        for name, old, new in [
+            ("write all", t_csv_write, t_store_write),
+            ("read all columns", t_csv_all, t_store_all),
+            (f"read {len(TRAIN_COLUMNS)} columns (train_ai)", t_csv_cols, t_store_cols),
+            ("read 1 day", t_csv_all, t_store_day),
+        ]:
+            print(f"{name:<28}{old:>9.3f}{new:>10.3f}{old / new:>8.1f}x")
+        print(f"[INFO] 1日分の読み込み: {len(day)}行（CSV は全件読むしかない）")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
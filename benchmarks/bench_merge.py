@@ -0,0 +1,94 @@
+# =========================================
+# benchmarks/bench_merge.py
+# merge_data の比較（旧: history_data.json 全体を読み直してソート・全書き換え /
+#                    新: 日付パーティション + キー索引への追記）
+#
+#   python -m benchmarks.bench_merge
+# =========================================
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+from merge_data import IncrementalMerger, race_key
+
+YEARS = [0.25, 1, 3]
+RACES_PER_DAY = 144   # 12場 × 12R
+
+
+def synthetic_day(day):
+    races = []
+    for jcd in range(1, 13):
+        for rno in range(1, 13):
+            races.append({
+                "race_date": day.isoformat(),
+                "race_stadium_number": jcd,
+                "race_number": rno,
+                "boats": [{"racer_boat_number": b, "racer_name": f"選手{jcd}{rno}{b}",
+                           "racer_national_top_1_percent": 5.5} for b in range(1, 7)],
+            })
+    return races
+
+
+def synthetic_history(days, end):
+    first = end - timedelta(days=days)
+    races = []
+    for i in range(days):
+        races.extend(synthetic_day(first + timedelta(days=i)))
+    return races
+
+
+def legacy_merge(path, new_data):
+    """従来実装（比較用）"""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            hist_data = json.load(f)
+    else:
+        hist_data = []
+    existing = {race_key(r) for r in hist_data}
+    added = [r for r in new_data if race_key(r) not in existing]
+    hist_data.extend(added)
+    hist_data.sort(key=lambda x: x["race_date"])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(hist_data, f, ensure_ascii=False, indent=2)
+    return len(added)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    today = date(2025, 1, 1)
+    new_day = synthetic_day(today)
+    rerun = new_day[:]   # 同じ日を2回マージ（全件重複）
+
+    print(f"{'history':>9}{'races':>10}{'legacy(s)':>11}{'indexed(s)':>12}{'speedup':>9}"
+          f"{'rerun legacy':>14}{'rerun indexed':>15}  added")
+    for years in YEARS:
+        days = int(365 * years)
+        history = synthetic_history(days, today)
+        work = tempfile.mkdtemp(prefix="bench_merge_")
+        try:
+            legacy_path = os.path.join(work, "history_data.json")
+            with open(legacy_path, "w", encoding="utf-8") as f:
+                json.dump(history, f, ensure_ascii=False, indent=2)
+            merger = IncrementalMerger(os.path.join(work, "store"), os.path.join(work, "store", "index"))
+            merger.migrate(legacy_path)
+
+            t_old, n_old = timed(legacy_merge, legacy_path, new_day)
+            t_new, n_new = timed(IncrementalMerger(merger.store.root, merger.index.root).merge, new_day)
+            r_old, _ = timed(legacy_merge, legacy_path, rerun)
+            r_new, _ = timed(IncrementalMerger(merger.store.root, merger.index.root).merge, rerun)
+            print(f"{years:>8}y{len(history):>10,}{t_old:>11.3f}{t_new:>12.4f}{t_old / t_new:>8.0f}x"
+                  f"{r_old:>14.3f}{r_new:>15.4f}  {n_old}/{n_new}")
+        finally:
+            shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# =========================================
+# benchmarks/bench_parser.py
+# 出走表/結果ページのパース速度・ピークメモリ比較
+#   BeautifulSoup(select) 版 vs modules/parser(lxml XPath) 版
+#
+# bs4 版は旧 fetch_entry.py の処理を列数チェックだけ直したもの（bs4-fixed と表示）。
+# 旧コードは len(cols) < 10 で弾いたうえで cols[10] を読んでいたため、
+# 10列の行があると IndexError でその場ごと失敗していた。計測は両者が同じ結果を返す
+# ページ（11列以上）で行うので、速度差はパーサーの違いによるもの。
+#
+#   python -m benchmarks.bench_parser                # 合成ページで計測
+#   python -m benchmarks.bench_parser --dir pages/   # 保存済みページで計測
+#     pages/ 以下の racelist*.html / raceresult*.html を使う
+# =========================================
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from modules import parser
+
+PAGES = 200
+
+
+# ---- 従来の BeautifulSoup 実装（比較用。列数チェックは < 11 に修正済み） ----
+def bs4_racelist(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    races = []
+    for race_no, div in enumerate(soup.select(".table1"), 1):
+        boats = []
+        for r in div.select("tbody tr"):
+            cols = r.find_all("td")
+            if len(cols) < 11:  # 旧コードは < 10（cols[10] で IndexError になりえた）
+                continue
+            boats.append({
+                "lane": len(boats) + 1,
+                "racer_name": cols[3].get_text(strip=True),
+                "racer_class": cols[4].get_text(strip=True),
+                "racer_start_timing": cols[5].get_text(strip=True),
+                "racer_flying_count": cols[6].get_text(strip=True),
+                "racer_national_win_rate": cols[7].get_text(strip=True),
+                "racer_local_win_rate": cols[8].get_text(strip=True),
+                "racer_motor_win_rate": cols[9].get_text(strip=True),
+                "racer_course_win_rate": cols[10].get_text(strip=True),
+            })
+        races.append({"race_no": race_no, "boats": boats})
+    return races
+
+
+def bs4_raceresult(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    results = []
+    for race_no, div in enumerate(soup.select(".table1"), 1):
+        tds = div.select("tbody tr td")
+        if not tds:
+            continue
+        results.append({
+            "race_no": race_no,
+            "1着": tds[0].get_text(strip=True),
+            "2着": tds[1].get_text(strip=True),
+            "3着": tds[2].get_text(strip=True),
+            "決まり手": tds[-1].get_text(strip=True),
+        })
+    return results
+
+
+IMPLS = {
+    "bs4": {"racelist": bs4_racelist, "raceresult": bs4_raceresult},
+    "lxml": {"racelist": parser.parse_racelist, "raceresult": parser.parse_raceresult},
+}
+
+
+# ---- 合成ページ ----------------------------------------------------
+def synthetic_racelist(seed):
+    tables = []
+    for rno in range(1, 13):
+        rows = []
+        for lane in range(1, 7):
+            cells = [f"<td class='is-boatColor{lane}'>{lane}</td>", "<td><img src='x.png'></td>",
+                     f"<td>{4000 + seed + lane}</td>", f"<td><a href='#'>選手 {seed}-{rno}-{lane}</a></td>",
+                     "<td>A1</td>", f"<td>0.{10 + lane}</td>", "<td>F0</td>", f"<td>{6 + lane / 10:.2f}</td>",
+                     f"<td>{5 + lane / 10:.2f}</td>", f"<td>{30 + lane:.1f}</td>", f"<td>{20 + lane:.1f}</td>"]
+            rows.append(f"<tr>{''.join(cells)}</tr>")
+        tables.append(f"<div class='table1 is-tableFixed'><table><thead><tr><th>枠</th></tr></thead>"
+                      f"<tbody>{''.join(rows)}</tbody></table></div>")
+    return _page(tables)
+
+
+def synthetic_raceresult(seed):
+    tables = []
+    for rno in range(1, 13):
+        tables.append(f"<div class='table1'><table><tbody><tr><td>{(seed + rno) % 6 + 1}</td>"
+                      f"<td>{(seed + rno + 1) % 6 + 1}</td><td>{(seed + rno + 2) % 6 + 1}</td>"
+                      f"<td>1,230円</td><td>逃げ</td></tr></tbody></table></div>")
+    return _page(tables)
+
+
+def _page(tables):
+    nav = "".join(f"<li><a href='/race?rno={i}'>{i}R</a></li>" for i in range(1, 13))
+    filler = "<p>" + "ボートレース公式サイト " * 200 + "</p>"
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>x</title></head><body>"
+            f"<ul class='race_num_list'>{nav}</ul>{filler}{''.join(tables)}{filler}</body></html>")
+
+
+def load_pages(kind, directory, count):
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, f"{kind}*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+        if pages:
+            return pages
+    make = synthetic_racelist if kind == "racelist" else synthetic_raceresult
+    return [make(i) for i in range(count)]
+
+
+# ---- 計測 -----------------------------------------------------------
+def run_one(impl, kind, directory, count):
+    """子プロセス内で1実装だけ計測（ピークRSSを分離するため）"""
+    pages = load_pages(kind, directory, count)
+    fn = IMPLS[impl][kind]
+    fn(pages[0])  # ウォームアップ（import 分を除外）
+    started = time.perf_counter()
+    for html in pages:
+        fn(html)
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "impl": impl,
+        "kind": kind,
+        "pages": len(pages),
+        "pages_per_sec": round(len(pages) / elapsed, 1),
+        "peak_rss_kb": peak_rss,
+    }
+
+
+def check_same_output(directory, count):
+    for kind in ("racelist", "raceresult"):
+        for html in load_pages(kind, directory, min(count, 20)):
+            if IMPLS["bs4"][kind](html) != IMPLS["lxml"][kind](html):
+                raise AssertionError(f"{kind}: bs4 と lxml の結果が一致しません")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default=None, help="保存済みページのディレクトリ")
+    ap.add_argument("--pages", type=int, default=PAGES, help="合成ページ数")
+    ap.add_argument("--child", nargs=2, metavar=("IMPL", "KIND"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], args.child[1], args.dir, args.pages)))
+        return
+
+    check_same_output(args.dir, args.pages)
+    labels = {"bs4": "bs4-fixed", "lxml": "lxml"}
+    print(f"{'kind':<11}{'impl':<11}{'pages':>7}{'pages/s':>10}{'peakRSS(KB)':>13}")
+    for kind in ("racelist", "raceresult"):
+        for impl in ("bs4", "lxml"):
+            cmd = [sys.executable, "-m", "benchmarks.bench_parser", "--child", impl, kind,
+                   "--pages", str(args.pages)]
+            if args.dir:
+                cmd += ["--dir", args.dir]
+            r = json.loads(subprocess.check_output(cmd).decode().strip().splitlines()[-1])
+            print(f"{kind:<11}{labels[impl]:<11}{r['pages']:>7}{r['pages_per_sec']:>10}{r['peak_rss_kb']:>13}")
+
+
+if __name__ == "__main__":
+    main()
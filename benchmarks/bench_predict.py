@@ -0,0 +1,106 @@
+# =========================================
+# benchmarks/bench_predict.py
+# 予測の1レースあたりの時間
+# （旧: スクリプトごとに model.pkl を読み直す / 新: 常駐モデル＋まとめて predict_proba）
+#
+#   python -m benchmarks.bench_predict
+#
+# model.pkl があればそれを、無ければ同じ形（RandomForest 150本・2列）の合成モデルを使う。
+# =========================================
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.bench_app import ROOT
+from modules.inference import DEFAULT_FEATURES, MicroBatcher, Predictor
+from modules.model_store import ModelStore
+
+VENUES = 24
+RACES = 12
+RELOAD_RACES = 3  # 読み直し方式は遅いので数レースだけ
+
+
+def synthetic_model(path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"racer_start_timing": rng.uniform(0.05, 0.3, 6000),
+                      "racer_boat_number": np.tile(np.arange(1, 7), 1000)}, columns=list(DEFAULT_FEATURES))
+    y = np.clip((X["racer_boat_number"] + rng.integers(-2, 3, 6000)), 1, 6)
+    joblib.dump(RandomForestClassifier(n_estimators=150, random_state=0).fit(X, y), path)
+
+
+def synthetic_races(n):
+    rnd = random.Random(0)
+    return [{"race_no": i % RACES + 1,
+             "boats": [{"lane": b, "racer_start_timing": f"{rnd.uniform(0.05, 0.3):.2f}"} for b in range(1, 7)]}
+            for i in range(n)]
+
+
+def timed(func, races):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) / races * 1000
+
+
+def main():
+    path = os.path.join(ROOT, "model.pkl")
+    work = None
+    if not os.path.exists(path):
+        work = tempfile.mkdtemp(prefix="bench_predict_")
+        path = os.path.join(work, "model.pkl")
+        synthetic_model(path)
+
+    races = synthetic_races(VENUES * RACES)
+    store = ModelStore(path)
+    predictor = Predictor(store)
+    predictor.predict_races(races[:1])  # 読み込み・ウォームアップ
+
+    def reload_each():
+        for race in races[:RELOAD_RACES]:
+            Predictor(ModelStore(path)).predict_races([race])
+
+    def per_race():
+        for race in races[:RACES]:
+            predictor.predict_races([race])
+
+    def per_venue_day():
+        for v in range(VENUES):
+            predictor.predict_races(races[v * RACES:(v + 1) * RACES])
+
+    def all_at_once():
+        predictor.predict_races(races)
+
+    async def concurrent():
+        batcher = MicroBatcher(predictor)
+        await asyncio.gather(*(batcher.submit(race) for race in races))
+
+    results = [
+        ("毎回 model.pkl を読み直す（旧）", timed(reload_each, RELOAD_RACES)),
+        ("常駐・1レースずつ（/predict を順に）", timed(per_race, RACES)),
+        ("常駐・1場1日ずつ（/predict/batch）", timed(per_venue_day, len(races))),
+        (f"常駐・全{len(races)}レースを1回", timed(all_at_once, len(races))),
+    ]
+    calls_before = predictor.calls.count
+    results.append((f"/predict {len(races)}件同時（自動でまとめる）",
+                    timed(lambda: asyncio.run(concurrent()), len(races))))
+    calls = predictor.calls.count - calls_before
+
+    base = results[0][1]
+    print(f"model={path}")
+    print(f"{'variant':<40}{'ms/race':>10}")
+    for name, ms in results:
+        print(f"{name:<40}{ms:>10.2f}  ({base / ms:.0f}x)")
+    print(f"同時リクエスト {len(races)}件 → predict_proba {calls}回")
+    if work:
+        os.remove(path)
+        os.rmdir(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# =========================================
+# benchmarks/bench_serializer.py
+# 保存形式ごとのサイズと読み書き速度
+# （旧: json.dump(indent=2) / 新: modules.serializer のコンパクトJSON・MessagePack・gzip・zstd）
+#
+#   python -m benchmarks.bench_serializer
+# =========================================
+import json
+import os
+import random
+import time
+
+from modules import serializer
+
+REPEAT = 20
+
+
+def repo_payload(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def synthetic_history(days=30):
+    """fetch_history.py の history_all/ 1か月分と同じ形（値は乱数でばらつかせる）"""
+    rng = random.Random(0)
+    names = [f"{rng.choice('山田佐藤鈴木高橋田中伊藤渡辺')}{rng.choice(['太郎', '一郎', '健', '翔', '大輔'])}"
+             for _ in range(1600)]
+    records = []
+    for d in range(days):
+        date = f"202501{d + 1:02d}"
+        records.append({"date": date, "data": [{
+            "date": date, "jcd": f"{jcd:02d}",
+            "races": [{
+                "race_no": rno, "kimarite": rng.choice(["逃げ", "差し", "まくり", "まくり差し", "抜き"]),
+                "weather": {"weather": rng.choice(["晴", "曇り", "雨"]), "wind": f"{rng.randint(0, 8)}m",
+                            "wave": f"{rng.randint(0, 10)}cm", "temperature": f"{rng.uniform(5, 30):.1f}℃"},
+                "boats": [{"place": place, "boat": boat, "racer_number": str(rng.randint(3000, 5300)),
+                           "racer_name": rng.choice(names),
+                           "race_time": f"1'{rng.randint(48, 56)}\"{rng.randint(0, 9)}",
+                           "st": round(rng.uniform(0.01, 0.30), 2)}
+                          for place, boat in enumerate(rng.sample(range(1, 7), 6), 1)],
+            } for rno in range(1, 13)],
+        } for jcd in range(1, 13)]})
+    return records
+
+
+def payloads():
+    found = []
+    for path in ("data/data.json", "data/history.json", "data/ai_stats.json"):
+        if os.path.exists(path):
+            found.append((path, repo_payload(path)))
+    found.append(("history_all 30日（合成）", synthetic_history()))
+    return found
+
+
+def variants():
+    yield "json indent=2 (旧)", lambda d: json.dumps(d, ensure_ascii=False, indent=2).encode("utf-8"), \
+        lambda raw: json.loads(raw)
+    for fmt in serializer.FORMATS:
+        for compression in (None, "gzip", "zstd"):
+            if compression == "zstd" and serializer._zstd() is None:
+                continue
+            name = fmt + (f"+{compression}" if compression else "")
+            yield name, (lambda d, f=fmt, c=compression: serializer.dumps(d, f, c)), serializer.loads
+
+
+def best(fn, arg):
+    times = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn(arg)
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    print(f"orjson={'yes' if serializer.orjson else 'no'}  msgpack={'yes' if serializer.msgpack else 'no'}  "
+          f"zstd={'yes' if serializer._zstd() else 'no'}")
+    for name, data in payloads():
+        print(f"\n== {name}")
+        print(f"{'format':<22}{'bytes':>10}{'ratio':>8}{'encode(ms)':>12}{'decode(ms)':>12}")
+        base = None
+        for label, dumps, loads in variants():
+            t_enc, raw = best(dumps, data)
+            t_dec, back = best(loads, raw)
+            assert back == data, label
+            base = base or len(raw)
+            print(f"{label:<22}{len(raw):>10,}{len(raw) / base:>8.2f}{t_enc * 1000:>12.3f}{t_dec * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
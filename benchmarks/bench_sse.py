@@ -0,0 +1,126 @@
+# =========================================
+# benchmarks/bench_sse.py
+# app.py /events（Server-Sent Events）の負荷試験
+# 多数の購読者をつないだまま data.json を書き換え、全員に通知が届くまでの時間を測る。
+#
+#   python -m benchmarks.bench_sse [購読者数]
+#
+# 比較として、同じ人数が POLL_INTERVAL 秒ごとに data.json を取りに行く場合の
+# リクエスト数も表示する（SSE なら待機中のリクエストは 0）。
+# =========================================
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_app import ROOT, start_server, synthetic_data
+
+SUBSCRIBERS = 300
+UPDATES = 5
+IDLE = 3.0           # 更新の合間に待つ秒数（この間のサーバー CPU 時間も測る）
+POLL_INTERVAL = 10.0  # 比較用: 従来のポーリング間隔（秒）
+PORT = 8763
+
+
+def cpu_seconds(pid):
+    """/proc から子プロセスの CPU 時間（Linux 以外では None）"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+async def subscriber(received, ready):
+    """1購読者分: /events につなぎ、change イベントを受けた時刻を記録し続ける"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+    await writer.drain()
+    first = True
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: "):
+                event = json.loads(line[6:])
+                if first:
+                    first = False
+                    ready.release()
+                else:
+                    received.setdefault(event["version"], []).append(time.perf_counter())
+    finally:
+        writer.close()
+
+
+def write_data(path, data, n):
+    data[0]["hit_rate"] = 70 + n  # 1場分だけ変える
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+async def run(work, subscribers, pid):
+    data = synthetic_data()
+    path = os.path.join(work, "data", "data.json")
+    received = {}
+    ready = asyncio.Semaphore(0)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber(received, ready)) for _ in range(subscribers)]
+    for _ in range(subscribers):
+        await ready.acquire()
+    print(f"購読者 {subscribers} 接続: {time.perf_counter() - start:.2f}s")
+
+    print(f"{'update':<8}{'delivered':>11}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'idle CPU s':>12}")
+    for n in range(1, UPDATES + 1):
+        before = cpu_seconds(pid)
+        await asyncio.sleep(IDLE)
+        idle_cpu = cpu_seconds(pid) - before if before is not None else float("nan")
+        seen = set(received)
+        written = time.perf_counter()
+        write_data(path, data, n)
+        deadline = written + 10
+        while time.perf_counter() < deadline:
+            new = [v for v in received if v not in seen]
+            if new and len(received[new[0]]) >= subscribers:
+                break
+            await asyncio.sleep(0.01)
+        new = [v for v in received if v not in seen]
+        times = sorted((t - written) * 1000 for t in received[new[0]]) if new else []
+        if times:
+            print(f"{n:<8}{len(times):>11}{times[len(times) // 2]:>9.0f}"
+                  f"{times[int(len(times) * 0.95) - 1]:>9.0f}{times[-1]:>9.0f}{idle_cpu:>12.3f}")
+        else:
+            print(f"{n:<8}{0:>11}  （通知が届きませんでした）")
+
+    polls = subscribers / POLL_INTERVAL
+    print(f"参考: {POLL_INTERVAL:.0f}秒ごとのポーリングなら待機中も {polls:.0f} req/s、"
+          f"1時間で {polls * 3600:,.0f} リクエスト（SSE は更新時の通知のみ）")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else SUBSCRIBERS
+    work = tempfile.mkdtemp(prefix="bench_sse_")
+    proc = None
+    try:
+        os.makedirs(os.path.join(work, "data"))
+        shutil.copytree(os.path.join(ROOT, "static"), os.path.join(work, "static"))
+        write_data(os.path.join(work, "data", "data.json"), synthetic_data(), 0)
+        proc, _ = start_server("app", PORT, work)
+        asyncio.run(run(work, subscribers, proc.pid))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
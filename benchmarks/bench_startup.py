@@ -0,0 +1,87 @@
+# =========================================
+# benchmarks/bench_startup.py
+# app.py のコールドスタート確認（Render の無料プランはスリープ復帰が遅いので）
+#
+#   python -m benchmarks.bench_startup
+#
+# 新しいインタプリタで
+#   1. import app にかかる時間と、重いモジュール（pandas など）が読み込まれていないこと
+#   2. uvicorn の起動から最初のレスポンスまでの時間
+# を測り、予算を超えたら終了コード 1 で終わる（CI でそのまま使える）。
+# =========================================
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.bench_app import ROOT
+
+IMPORT_BUDGET = 1.5   # 秒: python -c "import app" 全体（インタプリタ起動を含む）
+READY_BUDGET = 5.0    # 秒: uvicorn 起動 → /health が返るまで
+RUNS = 3
+PORT = 8764
+MUST_NOT_IMPORT = ("pandas", "sklearn", "joblib", "pyarrow")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import app
+print("import", time.perf_counter() - start)
+print("heavy", ",".join(m for m in %r if m in sys.modules))
+""" % (MUST_NOT_IMPORT,)
+
+
+def measure_import():
+    """(プロセス全体の秒数, import app の秒数, 読み込まれてしまった重いモジュール)"""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    result = dict(line.split(" ", 1) for line in out.stdout.splitlines() if line.startswith(("import ", "heavy ")))
+    return total, float(result["import"]), [m for m in result["heavy"].split(",") if m]
+
+
+def measure_ready():
+    """uvicorn を起動して /health が返るまでの秒数と、その時点の /startup"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < READY_BUDGET * 4:
+            try:
+                requests.get(f"http://127.0.0.1:{PORT}/health", timeout=1)
+                ready = time.perf_counter() - start
+                return ready, requests.get(f"http://127.0.0.1:{PORT}/startup", timeout=5).json()
+            except requests.ConnectionError:
+                time.sleep(0.05)
+        raise RuntimeError("app が起動しませんでした")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    failures = []
+    print(f"{'run':<5}{'process s':>11}{'import app s':>14}{'ready s':>10}")
+    for run in range(1, RUNS + 1):
+        total, imported, heavy = measure_import()
+        ready, startup = measure_ready()
+        print(f"{run:<5}{total:>11.3f}{imported:>14.3f}{ready:>10.3f}")
+        if heavy:
+            failures.append(f"import app で重いモジュールが読み込まれた: {', '.join(heavy)}")
+        if total > IMPORT_BUDGET:
+            failures.append(f"import {total:.2f}s > 予算 {IMPORT_BUDGET}s")
+        if ready > READY_BUDGET:
+            failures.append(f"起動 {ready:.2f}s > 予算 {READY_BUDGET}s")
+    print("事前読み込み（最後の回）:", startup.get("preload_seconds"))
+
+    if failures:
+        for f in dict.fromkeys(failures):
+            print(f"❌ {f}")
+        sys.exit(1)
+    print(f"✅ 予算内（import {IMPORT_BUDGET}s / 起動 {READY_BUDGET}s）")
+
+
+if __name__ == "__main__":
+    main()
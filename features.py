@@ -1,36 +1,67 @@
-import json
 import pandas as pd
 import os
 
-HISTORY_PATH = "data/history.json"
+from modules import serializer
+from modules.feature_store import FeatureStore
+from modules.history_store import HistoryStore
+
+HISTORY_PATH = "data/history.json"    # 旧形式
+HISTORY_DIR = "data/history"          # fetch_result.py の日付別ストア
 DATA_PATH = "data/data.json"
-FEATURES_PATH = "data/features.csv"
+FEATURES_PATH = "data/features.csv"   # 人が見る用の書き出し
+FEATURES_DIR = "data/features"        # race_date ごとの列指向ストア
 
 def load_json(path):
     if not os.path.exists(path):
         print(f"[WARN] {path} が見つかりません。スキップします。")
         return []
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return serializer.load(path)
     except Exception as e:
         print(f"[ERROR] {path} の読み込みに失敗: {e}")
         return []
 
+def load_history():
+    """
+    履歴を1レース1行のリストにする（{日付: {場名: {"results": [...]}}} を展開）。
+    ストアが空なら旧 history.json を読む。
+    """
+    store = HistoryStore(HISTORY_DIR)
+    if len(store):
+        history = store.read_range()
+    else:
+        legacy = load_json(HISTORY_PATH)
+        history = legacy.items() if isinstance(legacy, dict) else []
+    rows = []
+    for date, venues in history:
+        for venue, day in (venues or {}).items():
+            for race in day.get("results", []) if isinstance(day, dict) else []:
+                rows.append({"date": date, "venue": venue, **race})
+    return rows
+
+def save_features(df):
+    """ストアを全件置き換えてから CSV を書き出す"""
+    store = FeatureStore(FEATURES_DIR)
+    dates = store.write(df, overwrite=True)
+    print(f"[INFO] 特徴量ストア保存: {len(df)}件 / {len(dates)}日分 → {FEATURES_DIR}/")
+    store.export_csv(FEATURES_PATH)
+    print(f"[INFO] 特徴量CSV出力: {len(df)}件 → {FEATURES_PATH}")
+
 def main():
     print("🧩 Generating features...")
 
     # データ読み込み
-    history = load_json(HISTORY_PATH)
+    history = load_history()
     today = load_json(DATA_PATH)
+    if not isinstance(today, list):
+        today = []
 
     # 両方空の場合
     if not history and not today:
         print("[WARN] 履歴・本日データともに空です。")
         dummy = [{"race": 1, "venue": "桐生", "wind": 2.0, "wave": 1.0, "date": "20250101"}]
         df = pd.DataFrame(dummy)
-        df.to_csv(FEATURES_PATH, index=False)
-        print(f"[INFO] 特徴量CSV出力: {len(df)}件 → {FEATURES_PATH}")
+        save_features(df)
         return
 
     # 結合
@@ -40,11 +71,10 @@ def main():
     # 余分な列の除外・特徴量生成（例）
     if "date" in df.columns:
         df["date"] = df["date"].astype(str)
-    df["wind_wave_ratio"] = df["wind"] / (df["wave"] + 0.1)
+    if {"wind", "wave"} <= set(df.columns):
+        df["wind_wave_ratio"] = df["wind"] / (df["wave"] + 0.1)
 
-    # CSV保存
-    df.to_csv(FEATURES_PATH, index=False)
-    print(f"[INFO] 特徴量CSV出力: {len(df)}件 → {FEATURES_PATH}")
+    save_features(df)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
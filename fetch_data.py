@@ -1,12 +1,26 @@
-import requests
-import re
 import json
-import os
+import time
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from datetime import datetime
 
+from modules import http_client, schedule, serializer
+from modules.history_store import HistoryStore
+
 # 保存パス
 DATA_PATH = "data/data.json"
-HISTORY_PATH = "data/history.json"
+HISTORY_DIR = "data/history_entries"  # 日付ごとの出走表履歴
+KEEP_DAYS = 2
+
+# 出走表URL（ローカル検証時は差し替え可能）
+RACEDATA_URL = "https://www.boatrace.jp/owpc/pc/race/racedata"
+
+# 並列取得の既定値
+MAX_WORKERS = 8      # 全体の同時リクエスト上限
+PER_HOST_LIMIT = 4   # 1ホストあたりの同時リクエスト上限
 
 # 開催場コード
 VENUES = {
@@ -20,19 +34,40 @@ VENUES = {
 
 # JSON保存
 def save_json(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    serializer.save(path, data)
 
 # window.__RACE_DATA__抽出
+RACE_DATA_MARKER = "window.__RACE_DATA__"
+_decoder = json.JSONDecoder()
+
+def find_assignment(html):
+    """`window.__RACE_DATA__ = {` の '{' の位置を返す（見つからなければ -1）"""
+    n = len(html)
+    pos = html.find(RACE_DATA_MARKER)
+    while pos != -1:
+        i = pos + len(RACE_DATA_MARKER)
+        while i < n and html[i].isspace():
+            i += 1
+        if i < n and html[i] == "=" and html[i + 1:i + 2] != "=":
+            i += 1
+            while i < n and html[i].isspace():
+                i += 1
+            if i < n and html[i] == "{":
+                return i
+        pos = html.find(RACE_DATA_MARKER, pos + 1)
+    return -1
+
 def extract_race_json(html):
-    match = re.search(r"window\.__RACE_DATA__\s*=\s*(\{.*?\});", html, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            return None
-    return None
+    start = find_assignment(html)
+    if start == -1:
+        return None
+    # raw_decode は文字列リテラル・括弧の対応を見ながら1パスで読み、
+    # オブジェクトの終端で止まる（後続のHTMLは読まない）
+    try:
+        data, _ = _decoder.raw_decode(html, start)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
 
 # レース出走表を構造化
 def parse_race_data(race_data):
@@ -54,55 +89,183 @@ def parse_race_data(race_data):
             continue
     return results
 
-# 出走表取得（1場）
-def fetch_race_table(venue_code, date_str):
+# 出走表取得（1レース）。戻り値: (ステータス, 出走表)。通信失敗時のステータスは None
+def _get_race(venue_code, date_str, rno, base_url=RACEDATA_URL):
+    url = f"{base_url}?rno={rno}&jcd={venue_code}&hd={date_str}"
+    try:
+        res = http_client.get(url)
+        if res.status_code != 200:
+            return res.status_code, None
+        race_json = extract_race_json(res.text)
+        if not race_json or "racers" not in race_json:
+            return res.status_code, None
+        return res.status_code, parse_race_data(race_json)
+    except Exception:
+        return None, None
+
+def fetch_race(venue_code, date_str, rno, base_url=RACEDATA_URL):
+    return _get_race(venue_code, date_str, rno, base_url)[1]
+
+def _end_of_day(missing):
+    """404 だったレース番号の集合から、2レース続けて 404 になった最初の番号（無ければ None）"""
+    ends = [rno for rno in missing if rno + 1 in missing]
+    return min(ends) if ends else None
+
+def _warn_missing(venue, missing):
+    """404 で飛ばした・打ち切ったレースを知らせる"""
+    end = _end_of_day(missing)
+    for rno in sorted(r for r in missing if end is None or r < end):
+        print(f"[WARN] {venue} {rno}R が 404 のためスキップ")
+    if end is not None:
+        print(f"[WARN] {venue} {end}R・{end + 1}R が続けて 404 のため {end}R 以降の取得を打ち切り")
+
+# 出走表取得（1場）。2レース続けて 404 ならその日はそこまでとみなす
+def fetch_race_table(venue_code, date_str, base_url=RACEDATA_URL, race_count=12):
     races = {}
-    for rno in range(1, 13):
-        url = f"https://www.boatrace.jp/owpc/pc/race/racedata?rno={rno}&jcd={venue_code}&hd={date_str}"
-        try:
-            res = requests.get(url, timeout=10)
-            if res.status_code != 200:
-                continue
-            race_json = extract_race_json(res.text)
-            if not race_json or "racers" not in race_json:
-                continue
-            races[str(rno)] = parse_race_data(race_json)
-        except Exception:
-            continue
+    missing = set()
+    for rno in range(1, race_count + 1):
+        status, race = _get_race(venue_code, date_str, rno, base_url)
+        if status == 404:
+            missing.add(rno)
+            if rno - 1 in missing:
+                break
+        if race is not None:
+            races[str(rno)] = race
+    _warn_missing(f"場{venue_code}", missing)
     return races
 
-def main():
-    today = datetime.now().strftime("%Y%m%d")
-    print("🚀 GitHub Actions 出走表スクレイピング開始")
+class HostLimiter:
+    """ホストごとの同時接続数を制限する（サイトへの配慮）"""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._sems = {}
 
+    def get(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._sems:
+                self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sems[host]
+
+# 出走表取得（全場を並列取得）
+def fetch_all_tables(venues, date_str, base_url=RACEDATA_URL,
+                     max_workers=MAX_WORKERS, per_host=PER_HOST_LIMIT, race_counts=None):
+    """
+    venues: {場名: 場コード}
+    race_counts: {場名: レース数}（省略時は12R）
+    戻り値: ({場名: {rno: [...]}}, {場名: 所要秒数})
+    2レース続けて 404 が返ったら、それより後ろはまだ取りに行っていなければ取得しない。
+    """
+    limiter = HostLimiter(per_host)
+    sem = limiter.get(base_url)
+    spans = defaultdict(lambda: [None, None])
+    span_lock = threading.Lock()
+    missing = defaultdict(set)  # 場名 → 404 が返ったレース番号
+
+    def task(venue, code, rno):
+        with sem:
+            with span_lock:
+                end = _end_of_day(missing[venue])
+                if end is not None and rno > end:
+                    return venue, rno, None
+            started = time.perf_counter()
+            status, race = _get_race(code, date_str, rno, base_url)
+            finished = time.perf_counter()
+        with span_lock:
+            if status == 404:
+                missing[venue].add(rno)
+            span = spans[venue]
+            span[0] = started if span[0] is None else min(span[0], started)
+            span[1] = finished if span[1] is None else max(span[1], finished)
+        return venue, rno, race
+
+    tables = {venue: {} for venue in venues}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(task, venue, code, rno)
+            for venue, code in venues.items()
+            for rno in range(1, (race_counts or {}).get(venue, 12) + 1)
+        ]
+        results = [fut.result() for fut in futures]
+    for venue, rno, race in results:
+        end = _end_of_day(missing[venue])
+        if race is not None and (end is None or rno < end):
+            tables[venue][str(rno)] = race
+    for venue in venues:
+        _warn_missing(venue, missing[venue])
+
+    # rno順に並べ直す（逐次取得時と同じ並び）
+    for venue, races in tables.items():
+        tables[venue] = dict(sorted(races.items(), key=lambda kv: int(kv[0])))
+
+    elapsed = {venue: (spans[venue][1] - spans[venue][0]) if spans[venue][0] is not None else 0.0
+               for venue in venues}
+    return tables, elapsed
+
+def build_all_data(venues, tables, date_str):
     all_data = {}
-    for venue, code in VENUES.items():
-        print(f"📡 {venue} 取得中...")
-        races = fetch_race_table(code, today)
+    for venue in venues:
+        races = tables.get(venue, {})
         status = "開催中" if races else "ー"
         all_data[venue] = {
-            "date": today,
+            "date": date_str,
             "status": status,
             "races": races
         }
-        print(f"✅ {venue} 完了 ({len(races)}R 取得)")
+    return all_data
 
-    save_json(DATA_PATH, all_data)
-    print(f"✅ data.json 更新完了 ({len(VENUES)}場)")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="出走表スクレイピング")
+    # ワークフローから渡される "today" 等の引数は互換のため受け付ける
+    parser.add_argument("mode", nargs="?", default="today")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="同時リクエスト数の上限（1で逐次取得）")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT,
+                        help="1ホストあたりの同時リクエスト数の上限")
+    parser.add_argument("--base-url", default=RACEDATA_URL,
+                        help="racedata ページのURL（ローカル検証用）")
+    return parser.parse_args(argv)
 
-    # 履歴ファイル更新（最新2日分保持）
-    if os.path.exists(HISTORY_PATH):
-        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
-            history = json.load(f)
+def main(argv=None):
+    args = parse_args(argv)
+    today = datetime.now().strftime("%Y%m%d")
+    print("🚀 GitHub Actions 出走表スクレイピング開始")
+
+    started = time.perf_counter()
+    # 非開催場は取得しない（開催一覧が取れなければ全場）
+    race_counts = {venue: schedule.race_count(today, code) for venue, code in VENUES.items()}
+    targets = {venue: code for venue, code in VENUES.items() if race_counts[venue] > 0}
+    print(f"🗓️ 開催場: {len(targets)}/{len(VENUES)}場")
+
+    if args.workers <= 1:
+        tables = {}
+        for venue, code in targets.items():
+            print(f"📡 {venue} 取得中...")
+            t0 = time.perf_counter()
+            tables[venue] = fetch_race_table(code, today, args.base_url, race_counts[venue])
+            print(f"✅ {venue} 完了 ({len(tables[venue])}R 取得) {time.perf_counter() - t0:.1f}s")
     else:
-        history = {}
+        print(f"📡 {len(targets)}場を並列取得中 (workers={args.workers}, per-host={args.per_host})...")
+        tables, elapsed = fetch_all_tables(targets, today, args.base_url,
+                                           max_workers=args.workers, per_host=args.per_host,
+                                           race_counts=race_counts)
+        for venue in targets:
+            print(f"✅ {venue} 完了 ({len(tables[venue])}R 取得) {elapsed[venue]:.1f}s")
+    print(f"⏱️ 取得時間合計: {time.perf_counter() - started:.1f}s")
 
-    history[today] = all_data
-    for key in sorted(history.keys())[:-2]:
-        del history[key]
+    all_data = build_all_data(VENUES, tables, today)
+
+    save_json(DATA_PATH, all_data)
+    print(f"✅ data.json 更新完了 ({len(VENUES)}場)")
 
-    save_json(HISTORY_PATH, history)
-    print(f"🧠 history.json 更新完了 (2日分保持)")
+    # 履歴更新（最新2日分保持）
+    store = HistoryStore(HISTORY_DIR)
+    store.write(today, all_data)
+    store.retain_last(KEEP_DAYS)
+    print(f"🧠 {HISTORY_DIR}/ 更新完了 ({KEEP_DAYS}日分保持)")
+    http_client.print_stats()
     print(f"🎯 完了: {today}")
 
 if __name__ == "__main__":
@@ -1,10 +1,13 @@
+import argparse
 import asyncio
-import json
 import os
 import random
+import time
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from modules import schedule, serializer
+
 # ===== 保存ディレクトリ =====
 OUTPUT_DIR = "data"
 OUTPUT_FILE = f"{OUTPUT_DIR}/data.json"
@@ -23,14 +26,12 @@ VENUES = [
 def load_ai_stats():
     """AI的中率データを読み込む"""
     if os.path.exists(AI_STATS_FILE):
-        with open(AI_STATS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return serializer.load(AI_STATS_FILE)
     return {}
 
 def save_ai_stats(stats):
     """AI的中率データを保存"""
-    with open(AI_STATS_FILE, "w", encoding="utf-8") as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    serializer.save(AI_STATS_FILE, stats)
 
 def update_ai_accuracy(stats, venue_name):
     """簡易AI：ランダム変動で的中率更新"""
@@ -44,70 +45,123 @@ def update_ai_accuracy(stats, venue_name):
 # ===============================================================
 
 
-async def fetch_race_data(playwright):
+# ===== 並列取得設定 =====
+PAGE_POOL = 4  # 同一コンテキスト内で同時に開くページ数（1で逐次）
+# document 以外で読み込む必要のないリソース
+BLOCKED_RESOURCES = {"image", "font", "stylesheet", "media"}
+
+# 行ごとのセル文字列を1回のJS呼び出しでまとめて取得
+ROWS_SCRIPT = "rows => rows.map(r => Array.from(r.querySelectorAll('td'), td => td.innerText))"
+
+
+async def block_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def scrape_venue(page, name, code, today):
+    """1場分の出走表を取得（見つからなければ None）"""
+    print(f"▶ {name} ({code}) データ取得中...")
+    url = f"https://www.boatrace.jp/owpc/pc/race/index?jcd={code}&hd={today}"
+    await page.goto(url, timeout=30000, wait_until="domcontentloaded")
+
+    try:
+        await page.wait_for_selector(".table1, .table1-responsive, .table1.table1-header", timeout=15000)
+    except Exception:
+        print(f"⚠️ {name}: 出走表が見つかりません。スキップ。")
+        return None
+
+    rows = await page.eval_on_selector_all(".table1 tbody tr", ROWS_SCRIPT)
+    return [
+        {"racer": tds[1].strip(), "mark": tds[2].strip()}
+        for tds in rows if len(tds) >= 3
+    ]
+
+
+async def fetch_race_data(playwright, pages=PAGE_POOL):
     """各場のデータをスクレイピングして保存"""
     browser = await playwright.chromium.launch(headless=True)
-    page = await browser.new_page()
-    all_data = []
+    # 1コンテキストを全場で使い回し、画像・フォント・CSSは読み込まない
+    context = await browser.new_context()
+    await context.route("**/*", block_resources)
     today = datetime.now().strftime("%Y%m%d")
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     ai_stats = load_ai_stats()
 
-    for name, code in VENUES:
-        print(f"▶ {name} ({code}) データ取得中...")
-        try:
-            url = f"https://www.boatrace.jp/owpc/pc/race/index?jcd={code}&hd={today}"
-            await page.goto(url, timeout=30000)
-
-            try:
-                await page.wait_for_selector(".table1, .table1-responsive, .table1.table1-header", timeout=15000)
-            except:
-                print(f"⚠️ {name}: 出走表が見つかりません。スキップ。")
-                continue
-
-            rows = await page.query_selector_all(".table1 tbody tr")
-            race_info = []
-            for row in rows:
-                tds = await row.query_selector_all("td")
-                if len(tds) >= 3:
-                    racer = await tds[1].inner_text()
-                    mark = await tds[2].inner_text()
-                    race_info.append({
-                        "racer": racer.strip(),
-                        "mark": mark.strip()
-                    })
-
-            # 的中率を更新
-            hit_rate = update_ai_accuracy(ai_stats, name)
-
-            all_data.append({
-                "venue": name,
-                "code": code,
-                "date": today,
-                "hit_rate": hit_rate,
-                "races": race_info
-            })
-
-            print(f"✅ {name} 取得完了 ({len(race_info)}件) 的中率 {hit_rate}%")
+    # 非開催場はブラウザで開かない（開催一覧が取れなければ全場）
+    open_codes = await asyncio.to_thread(schedule.open_venues, today)
+    targets = [(name, code) for name, code in VENUES
+               if open_codes is None or code in open_codes]
 
-        except Exception as e:
-            print(f"⚠️ {name} 失敗: {e}")
+    queue = asyncio.Queue()
+    for venue in targets:
+        queue.put_nowait(venue)
+    scraped = {}
 
+    async def worker():
+        page = await context.new_page()
+        try:
+            while True:
+                try:
+                    name, code = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    scraped[code] = await scrape_venue(page, name, code, today)
+                except Exception as e:
+                    print(f"⚠️ {name} 失敗: {e}")
+        finally:
+            await page.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(pages, len(targets))))))
+    await context.close()
     await browser.close()
+
+    # 出力順・的中率更新は場コード順で確定させる
+    all_data = []
+    for name, code in targets:
+        race_info = scraped.get(code)
+        if race_info is None:
+            continue
+
+        # 的中率を更新
+        hit_rate = update_ai_accuracy(ai_stats, name)
+
+        all_data.append({
+            "venue": name,
+            "code": code,
+            "date": today,
+            "hit_rate": hit_rate,
+            "races": race_info
+        })
+
+        print(f"✅ {name} 取得完了 ({len(race_info)}件) 的中率 {hit_rate}%")
+
     save_ai_stats(ai_stats)
     return all_data
 
 
-async def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Playwright 出走表スクレイピング")
+    parser.add_argument("--pages", type=int, default=PAGE_POOL,
+                        help="同時に開くページ数（1で逐次取得）")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
     async with async_playwright() as p:
-        data = await fetch_race_data(p)
+        data = await fetch_race_data(p, pages=args.pages)
         try:
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            serializer.save(OUTPUT_FILE, data)
             print(f"\n✅ 全データ保存完了: {OUTPUT_FILE}")
         except Exception as e:
             print(f"❌ JSON保存エラー: {e}")
+    print(f"⏱️ 所要時間: {time.perf_counter() - started:.1f}s")
 
 
 if __name__ == "__main__":
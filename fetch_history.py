@@ -1,78 +1,283 @@
 # fetch_history.py（改良版：学習データ蓄積付き）
-import json, requests, datetime, os
-from bs4 import BeautifulSoup
+import json, requests, datetime, os, gzip, argparse, threading, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-HISTORY_FILE = "history.json"
-ALL_FILE = "history_all.json"
+from modules import http_client, parser, schedule, serializer
+from modules.history_store import HistoryStore
+
+ALL_FILE = "history_all.json"  # 旧形式（移行元）
+ALL_DIR = "history_all"        # 日付ごとの全履歴ストア（直近分は store.last(MAX_DAYS)）
+FAILED_FILE = os.path.join(ALL_DIR, "failed.json")  # 取得しきれなかった日付（次回取り直す）
+RAW_DIR = "history_raw"  # 生HTMLの圧縮アーカイブ（--keep-raw 指定時のみ）
 MAX_DAYS = 30
+PARSE_WORKERS = os.cpu_count() or 2
+
+# 長期バックフィル（python fetch_history.py [--keep-raw] backfill --start ... --end ...）
+BACKFILL_DIR = "history_backfill"
+FETCH_WORKERS = 4
 
 def get_open_stadiums(target_date):
-    url = f"https://www.boatrace.jp/owpc/pc/race/index?hd={target_date}"
+    """開催場コードの一覧。開催一覧ページが取れなかったときは None"""
+    return schedule.open_venues(target_date)
+
+def fetch_race_page(date_str, jcd):
+    url = f"https://www.boatrace.jp/owpc/pc/race/raceresultall?jcd={jcd}&hd={date_str}"
     try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-    except requests.RequestException:
-        return []
-    soup = BeautifulSoup(res.text, "lxml")
-    jcds = [a.get("href").split("jcd=")[1][:2] for a in soup.select(".table1 tbody tr a") if "jcd=" in a.get("href", "")]
-    return list(set(jcds))
-
-def fetch_race_data(date_str):
-    all_data = []
+        res = http_client.get(url, cache=True)
+        if res.status_code == 200:
+            return {"date": date_str, "jcd": jcd, "html": res.text}
+        print(f"⚠️ {date_str}-{jcd} 取得失敗: HTTP {res.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ {date_str}-{jcd} 取得失敗: {e}")
+    return None
+
+def fetch_race_pages(date_str):
+    """
+    (取得できたページ, 全場取れたか)。開催一覧が取れない日は未完了、
+    開催の無い日（一覧に場が無い）は ([], True)。
+    """
     jcds = get_open_stadiums(date_str)
+    if jcds is None:
+        print(f"⚠️ {date_str} 開催場一覧を取得できませんでした")
+        return [], False
+    pages = []
     for jcd in jcds:
-        url = f"https://www.boatrace.jp/owpc/pc/race/raceresultall?jcd={jcd}&hd={date_str}"
-        try:
-            res = requests.get(url, timeout=10)
-            if res.status_code == 200:
-                all_data.append({"date": date_str, "jcd": jcd, "html": res.text})
-        except requests.exceptions.Timeout:
-            print(f"⚠️ Timeout on {date_str}-{jcd}")
-    return all_data
-
-def load_json(path):
+        page = fetch_race_page(date_str, jcd)
+        if page is not None:
+            pages.append(page)
+    return pages, len(pages) == len(jcds)
+
+def parse_page(page):
+    """生HTML 1ページ → 構造化結果（プロセスプールで実行）"""
+    return {
+        "date": page["date"],
+        "jcd": page["jcd"],
+        "races": parser.parse_raceresult_all(page["html"]),
+    }
+
+def parse_pages(pages, pool):
+    return list(pool.map(parse_page, pages, chunksize=4))
+
+def archive_raw(date_str, pages):
+    """生HTMLを日付ごとの gzip JSON（{場コード: html}）に追記保存"""
+    if not pages:
+        return
+    os.makedirs(RAW_DIR, exist_ok=True)
+    path = os.path.join(RAW_DIR, f"{date_str}.json.gz")
+    archive = {}
     if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
-
-def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def main():
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            archive = json.load(f)
+    archive.update({p["jcd"]: p["html"] for p in pages})
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(archive, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def fetch_race_data(date_str, pool, keep_raw=False):
+    """(解析済みの場ごとの結果, 全場取れたか)"""
+    pages, complete = fetch_race_pages(date_str)
+    if keep_raw:
+        archive_raw(date_str, pages)
+    return parse_pages(pages, pool), complete
+
+def load_failed(path=FAILED_FILE):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+def save_failed(failed, path=FAILED_FILE):
+    serializer.atomic_write(path, json.dumps(sorted(failed)))
+
+def upgrade_records(records, pool, keep_raw=False):
+    """旧形式（html をそのまま保存）のレコードを構造化形式に変換"""
+    upgraded = 0
+    for record in records:
+        pages = [d for d in record.get("data", []) if "html" in d]
+        if not pages:
+            continue
+        if keep_raw:
+            archive_raw(record["date"], pages)
+        parsed = {(p["date"], p["jcd"]): p for p in parse_pages(pages, pool)}
+        record["data"] = [parsed.get((d.get("date"), d.get("jcd")), d) for d in record["data"]]
+        upgraded += 1
+    return upgraded
+
+# ---------------------------------------------------------
+# 長期バックフィル
+# ---------------------------------------------------------
+def date_range(start, end):
+    day = datetime.datetime.strptime(start, "%Y%m%d").date()
+    last = datetime.datetime.strptime(end, "%Y%m%d").date()
+    while day <= last:
+        yield day.strftime("%Y%m%d")
+        day += datetime.timedelta(days=1)
+
+class Backfill:
+    """
+    (日付, 場コード) 単位で取得・解析し、結果を月ごとの JSONL に逐次追記する。
+    完了した組は checkpoint.txt に記録し、中断後の再実行ではスキップする。
+    取得に失敗した日（開催一覧が取れなかった日を含む）は failed.txt に記録し、
+    次回の実行で期間外でも取り直す。
+    """
+
+    def __init__(self, out_dir=BACKFILL_DIR, keep_raw=False):
+        self.out_dir = out_dir
+        self.keep_raw = keep_raw
+        self.checkpoint_path = os.path.join(out_dir, "checkpoint.txt")
+        self.failed_path = os.path.join(out_dir, "failed.txt")
+        self._lock = threading.Lock()
+        self.done = set()
+        self.failed_dates = set()
+        self.written = 0
+        self.failed = 0
+        os.makedirs(os.path.join(out_dir, "results"), exist_ok=True)
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                self.done = {tuple(line.strip().split(",")) for line in f if line.strip()}
+        if os.path.exists(self.failed_path):
+            with open(self.failed_path, "r", encoding="utf-8") as f:
+                self.failed_dates = {line.strip() for line in f if line.strip()}
+
+    def _write(self, result):
+        path = os.path.join(self.out_dir, "results", f"{result['date'][:6]}.jsonl")
+        line = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            # 結果を書いてからチェックポイントを記録（途中終了しても欠落しない）
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(f"{result['date']},{result['jcd']}\n")
+            self.done.add((result["date"], result["jcd"]))
+            self.written += 1
+
+    def _mark(self, date_str, ok):
+        """日付の成否を failed.txt に反映する"""
+        with self._lock:
+            if ok == (date_str not in self.failed_dates):
+                return
+            if ok:
+                self.failed_dates.discard(date_str)
+            else:
+                self.failed_dates.add(date_str)
+            serializer.atomic_write(self.failed_path, "".join(f"{d}\n" for d in sorted(self.failed_dates)))
+
+    def run_date(self, date_str, pool):
+        opened = get_open_stadiums(date_str)
+        if opened is None:
+            print(f"⚠️ {date_str} 開催場一覧を取得できませんでした")
+            with self._lock:
+                self.failed += 1
+            self._mark(date_str, False)
+            return 0
+        jcds = [j for j in opened if (date_str, j) not in self.done]
+        ok = True
+        for jcd in jcds:
+            page = fetch_race_page(date_str, jcd)
+            if page is None:
+                with self._lock:
+                    self.failed += 1
+                ok = False
+                continue
+            if self.keep_raw:
+                with self._lock:
+                    archive_raw(date_str, [page])
+            self._write(pool.submit(parse_page, page).result())
+        self._mark(date_str, ok)
+        return len(jcds)
+
+    def run(self, start, end, workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS):
+        dates = list(date_range(start, end))
+        retry = sorted(self.failed_dates - set(dates))
+        dates = retry + dates
+        started = time.perf_counter()
+        print(f"📦 バックフィル {start}〜{end} ({len(dates)}日, 完了済み {len(self.done)}件)")
+        if retry:
+            print(f"🔁 前回失敗した {len(retry)}日分も取り直します")
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.run_date, d, pool): d for d in dates}
+            for i, fut in enumerate(futures, 1):
+                date_str = futures[fut]
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"⚠️ {date_str} 失敗: {e}")
+                    self._mark(date_str, False)
+                if i % 30 == 0 or i == len(dates):
+                    print(f"🗓️ {i}/{len(dates)}日 処理済み ({self.written}件保存, "
+                          f"{time.perf_counter() - started:.0f}s)")
+        print(f"✅ バックフィル完了: {self.written}件保存 / 失敗 {self.failed}件 → {self.out_dir}/results/")
+        if self.failed_dates:
+            print(f"⚠️ 未完了 {len(self.failed_dates)}日（次回の実行で取り直します）: {self.failed_path}")
+
+def parse_args(argv=None):
+    """
+    共通オプション（--keep-raw, --workers）はサブコマンドより前に書く:
+      python fetch_history.py --keep-raw --workers 4 backfill --start ... --end ... --fetch-workers 8
+    """
+    ap = argparse.ArgumentParser(description="過去レース結果の取得")
+    ap.add_argument("--keep-raw", action="store_true",
+                    help=f"生HTMLを {RAW_DIR}/ に圧縮保存する")
+    ap.add_argument("--workers", type=int, default=PARSE_WORKERS,
+                    help="HTML解析のプロセス数")
+    sub = ap.add_subparsers(dest="command")
+    bf = sub.add_parser("backfill", help="期間を指定して過去結果をまとめて取得（再開可能）")
+    bf.add_argument("--start", required=True, help="開始日 YYYYMMDD")
+    bf.add_argument("--end", required=True, help="終了日 YYYYMMDD")
+    bf.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS,
+                    help="同時に取得する日数（スレッド数）")
+    bf.add_argument("--out", default=BACKFILL_DIR, help="出力ディレクトリ")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "backfill":
+        Backfill(args.out, args.keep_raw).run(args.start, args.end, args.fetch_workers, args.workers)
+        http_client.print_stats()
+        return
+
     today = datetime.date.today()
     all_dates = [(today - datetime.timedelta(days=i)).strftime("%Y%m%d") for i in range(MAX_DAYS)]
 
-    # 既存履歴ロード
-    history = load_json(HISTORY_FILE)
-    history_all = load_json(ALL_FILE)
-
-    existing_dates = {d["date"] for d in history_all}
+    store = HistoryStore(ALL_DIR)
+    migrated = store.migrate_once(ALL_FILE, layout="list")
     print(f"📦 過去{MAX_DAYS}日データ更新開始...")
 
-    for date_str in all_dates:
-        if date_str not in existing_dates:
-            print(f"🗓️ {date_str} のデータ取得中...")
-            data = fetch_race_data(date_str)
-            if data:
-                record = {"date": date_str, "data": data}
-                history.append(record)
-                history_all.append(record)
-
-    # 最新30日分だけ残す
-    history = sorted(history, key=lambda x: x["date"], reverse=True)[:MAX_DAYS]
-    # 全履歴は削除しない
-    history_all = sorted(history_all, key=lambda x: x["date"], reverse=True)
-
-    save_json(HISTORY_FILE, history)
-    save_json(ALL_FILE, history_all)
-
-    print(f"✅ history.json 更新 ({len(history)} days)")
-    print(f"✅ history_all.json 更新 (累計 {len(history_all)} days)")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # 移行直後は旧形式（生HTML入り）の日を構造化して保存し直す
+        if migrated:
+            upgraded = 0
+            for date_str, record in store.read_range():
+                if upgrade_records([record], pool, args.keep_raw):
+                    store.write(date_str, record)
+                    upgraded += 1
+            if upgraded:
+                print(f"🔁 旧形式 {upgraded} 日分を構造化データに変換")
+
+        # 前回取得しきれなかった日は保存済みでも取り直す（取れたページはキャッシュから読む）
+        failed = load_failed()
+        before = set(failed)
+        for date_str in all_dates:
+            if date_str not in store or date_str in failed:
+                print(f"🗓️ {date_str} のデータ取得中...")
+                data, complete = fetch_race_data(date_str, pool, args.keep_raw)
+                if data or complete:  # 開催の無い日も空で保存して、毎回取りに行かない
+                    store.write(date_str, {"date": date_str, "data": data})
+                if complete:
+                    failed.discard(date_str)
+                else:
+                    failed.add(date_str)
+        failed &= set(all_dates)  # 対象期間から外れた日はもう取り直さない
+        if failed != before:
+            save_failed(failed)
+        if failed:
+            print(f"⚠️ 未完了 {len(failed)}日（次回取り直します）: {', '.join(sorted(failed))}")
+
+    # 全履歴は削除しない（日付ごとのファイルなので追加分だけ書き込む）
+    print(f"✅ {ALL_DIR}/ 更新 (累計 {len(store)} days)")
+    http_client.print_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
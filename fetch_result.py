@@ -1,9 +1,11 @@
 # =========================================
 # fetch_result.py
-# 本日の結果＋決まり手を取得しhistory.jsonに蓄積
+# 本日の結果＋決まり手を取得し data/history/ に蓄積
 # =========================================
-import os, json, datetime, requests, time
-from bs4 import BeautifulSoup
+import os, datetime
+
+from modules import http_client, parser, schedule
+from modules.history_store import HistoryStore
 
 VENUES = [
     "桐生", "戸田", "江戸川", "平和島", "多摩川", "浜名湖",
@@ -14,7 +16,9 @@ VENUES = [
 
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
-HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+HISTORY_FILE = os.path.join(DATA_DIR, "history.json")  # 旧形式（移行元）
+HISTORY_DIR = os.path.join(DATA_DIR, "history")  # 日付ごとの履歴ストア
+KEEP_DAYS = 60
 
 BASE_URL = "https://www.boatrace.jp/owpc/pc/race/raceresult"
 
@@ -22,36 +26,19 @@ def fetch_today_results(date_str):
     results = {}
     for idx, venue in enumerate(VENUES, start=1):
         code = f"{idx:02d}"
+        if not schedule.is_open(date_str, code):
+            continue
         url = f"{BASE_URL}?jcd={code}&hd={date_str}"
         print(f"🎯 {venue} の結果を取得中 ...")
         try:
-            resp = requests.get(url, timeout=10)
+            resp = http_client.get(url, cache=True)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "lxml")
-
-            race_divs = soup.select(".table1")
-            venue_results = []
-            for race_no, div in enumerate(race_divs, 1):
-                tds = div.select("tbody tr td")
-                if not tds:
-                    continue
-                first = tds[0].get_text(strip=True)
-                second = tds[1].get_text(strip=True)
-                third = tds[2].get_text(strip=True)
-                decision = tds[-1].get_text(strip=True)
-                venue_results.append({
-                    "race_no": race_no,
-                    "1着": first,
-                    "2着": second,
-                    "3着": third,
-                    "決まり手": decision
-                })
+            venue_results = parser.parse_raceresult(resp.text)
 
             results[venue] = {"date": date_str, "results": venue_results}
             print(f"✅ {venue} OK")
         except Exception as e:
             print(f"⚠️ {venue} 失敗: {e}")
-        time.sleep(1)
     return results
 
 def main():
@@ -61,24 +48,16 @@ def main():
 
     today_results = fetch_today_results(date_str)
 
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-    else:
-        history = {}
+    store = HistoryStore(HISTORY_DIR)
+    store.migrate_once(HISTORY_FILE, layout="dict")
+    store.write(date_str, today_results)
 
-    history[date_str] = today_results
-
-    # 60日保持ロジック
-    if len(history) > 60:
-        oldest = sorted(history.keys())[0]
-        del history[oldest]
+    # 60日保持ロジック（古い日付のファイルを消すだけ）
+    for oldest in store.retain_last(KEEP_DAYS):
         print(f"🧹 古いデータ({oldest})を削除")
 
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ history.json 更新完了！")
+    print(f"✅ {HISTORY_DIR}/ 更新完了！")
+    http_client.print_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,37 +1,34 @@
-import requests
-import json
-import os
 from datetime import datetime
 
-HISTORY_FILE = "history.json"
+from modules import http_client
+from modules.history_store import HistoryStore
+
+HISTORY_FILE = "history.json"  # 旧形式（移行元）
+HISTORY_DIR = "history"
 RESULT_API_TODAY = "https://boatraceopenapi.github.io/results/v2/today.json"
 
 def fetch_results():
     print("[INFO] レース結果データ取得開始...")
-    resp = requests.get(RESULT_API_TODAY, timeout=10)
+    resp = http_client.get(RESULT_API_TODAY)
     resp.raise_for_status()
     data = resp.json()
     print(f"[INFO] {len(data)} 件のレース結果を取得しました")
     return data
 
-def load_history(path=HISTORY_FILE):
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+def load_history(path=HISTORY_DIR):
+    return HistoryStore(path).load_all()
 
-def save_results(new_data, out_path=HISTORY_FILE):
+def save_results(new_data, out_path=HISTORY_DIR):
     today_key = datetime.now().strftime("%Y%m%d")
-    history = load_history(out_path)
-    history[today_key] = {"results": new_data}
-
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
-    print(f"[INFO] レース結果を保存しました → {out_path}")
+    store = HistoryStore(out_path)
+    store.migrate_once(HISTORY_FILE, layout="dict")
+    store.write(today_key, {"results": new_data})
+    print(f"[INFO] レース結果を保存しました → {out_path}/{today_key}.json")
 
 if __name__ == "__main__":
     try:
         results = fetch_results()
-        save_results(results, HISTORY_FILE)
+        save_results(results, HISTORY_DIR)
     except Exception as e:
-        print(f"[ERROR] レース結果取得に失敗しました: {e}")
\ No newline at end of file
+        print(f"[ERROR] レース結果取得に失敗しました: {e}")
+    http_client.print_stats()
\ No newline at end of file
@@ -1,6 +1,7 @@
-import requests
 from bs4 import BeautifulSoup
 
+from modules import http_client
+
 BASE_URL = "https://www.boatrace.jp/owpc/pc/race/index"
 
 def fetch_weather(jcd, date):
@@ -11,7 +12,7 @@ def fetch_weather(jcd, date):
     url = f"{BASE_URL}?jcd={jcd}&hd={date}"
     print(f"[INFO] 気象データ取得: {url}")
 
-    resp = requests.get(url, timeout=10)
+    resp = http_client.get(url)
     resp.raise_for_status()
     soup = BeautifulSoup(resp.text, "lxml")
 
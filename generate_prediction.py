@@ -3,13 +3,19 @@ import datetime
 import random
 from pathlib import Path
 
+from modules import serializer
+from modules.history_store import HistoryStore
+
 # 読み込み／書き出しファイル
-HISTORY_FILE = Path("history.json")
+HISTORY_FILE = Path("history.json")  # 旧形式
+HISTORY_DIR = Path("history")        # fetch_results.py の日付別ストア
 PREDICTION_FILE = Path("prediction.json")
 
 def load_history():
-    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    store = HistoryStore(str(HISTORY_DIR))
+    if len(store):
+        return store.load_all()
+    return serializer.load(str(HISTORY_FILE))
 
 def simple_score(b):
     """選手艇データ b に対して簡易スコアをつける関数"""
@@ -122,8 +128,8 @@ def compute_accuracy(history, predictions):
             # 当たっているか「予想リストの中に top3 の組み合わせがあるか」
             for comb in pred_list:
                 # comb 例: "1-3-2"
-                arr = comb.split("-").map(x => parseInt(x))
-                if arr.every((v,i) => v === top3[i]) {
+                arr = [int(x) for x in comb.split("-")]
+                if arr == top3:
                     venue_stats[vid]["hit"] += 1
                     break
             venue_stats[vid]["total"] += 1
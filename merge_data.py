@@ -1,32 +1,107 @@
-import json
+import bisect
 import os
+import time
+
+from modules import serializer
+from modules.history_store import HistoryStore
 
 NEW_FILE = "data.json"
-HIST_FILE = "history_data.json"
+HIST_FILE = "history_data.json"   # 旧形式（移行元）
+HIST_DIR = "history_data"         # race_date ごとのレース一覧
+INDEX_DIR = os.path.join(HIST_DIR, "index")  # race_date ごとの登録済みキー
+
+
+def race_key(r):
+    return (r["race_date"], r["race_stadium_number"], r["race_number"])
+
+
+def _order(r):
+    # 1日分の中は 場 → レース番号 の順に並べる
+    return (int(r["race_stadium_number"]), int(r["race_number"]))
+
+
+def _valid(r):
+    """日付・場・レース番号がそろっていて並べられるか"""
+    try:
+        _order(r)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return bool(r.get("race_date"))
+
+
+def _partition(race_date):
+    return str(race_date).replace("-", "")
+
+
+class IncrementalMerger:
+    """
+    日付ごとのパーティションとキー索引を使った追記専用マージ。
+    新しいレースが属する日付のキー索引とパーティションだけを読み書きするので、
+    1回あたりのコストは履歴全体の大きさに依存しない。
+    """
+
+    def __init__(self, hist_dir=HIST_DIR, index_dir=INDEX_DIR):
+        self.store = HistoryStore(hist_dir)
+        self.index = HistoryStore(index_dir)
+
+    def migrate(self, legacy_path=HIST_FILE):
+        """旧 history_data.json（全レースの配列）を日付ごとに分割して取り込む"""
+        if len(self.store) or not os.path.exists(legacy_path):
+            return 0
+        races = serializer.load(legacy_path)
+        added = self.merge(races)
+        print(f"[INFO] {legacy_path} から {added}件を {self.store.root}/ に移行しました")
+        return added
+
+    def merge(self, new_data):
+        """未登録のレースだけを追加し、追加件数を返す"""
+        races = [r for r in new_data if _valid(r)]
+        if len(races) < len(new_data):
+            print(f"[WARN] 日付・場・レース番号の無いレース {len(new_data) - len(races)}件 を除外しました")
+        by_date = {}
+        for r in races:
+            by_date.setdefault(_partition(r["race_date"]), []).append(r)
+
+        added = 0
+        for date, races in by_date.items():
+            keys = {tuple(k) for k in self.index.read(date, [])}
+            fresh = []
+            for r in races:
+                key = race_key(r)
+                if key not in keys:
+                    keys.add(key)
+                    fresh.append(r)
+            if not fresh:
+                continue
+            day = self.store.read(date, [])
+            orders = [_order(r) for r in day]
+            for r in fresh:
+                pos = bisect.bisect_right(orders, _order(r))
+                orders.insert(pos, _order(r))
+                day.insert(pos, r)
+            self.store.write(date, day)
+            self.index.write(date, sorted(keys, key=lambda k: (int(k[1]), int(k[2]))))
+            added += len(fresh)
+        return added
+
 
 def merge_data():
     if not os.path.exists(NEW_FILE):
         print(f"[ERROR] {NEW_FILE} がありません")
         return
 
-    with open(NEW_FILE, "r", encoding="utf-8") as f:
-        new_data = json.load(f)
-
-    if os.path.exists(HIST_FILE):
-        with open(HIST_FILE, "r", encoding="utf-8") as f:
-            hist_data = json.load(f)
-    else:
-        hist_data = []
+    new_data = serializer.load(NEW_FILE)
 
-    existing = {(r["race_date"], r["race_stadium_number"], r["race_number"]) for r in hist_data}
-    added = [r for r in new_data if (r["race_date"], r["race_stadium_number"], r["race_number"]) not in existing]
+    merger = IncrementalMerger()
+    merger.migrate()
 
-    hist_data.extend(added)
-    hist_data.sort(key=lambda x: x["race_date"])
-    with open(HIST_FILE, "w", encoding="utf-8") as f:
-        json.dump(hist_data, f, ensure_ascii=False, indent=2)
+    started = time.perf_counter()
+    added = merger.merge(new_data)
+    elapsed = time.perf_counter() - started
 
-    print(f"[INFO] {len(added)}件追加、合計 {len(hist_data)}件保存")
+    rate = len(new_data) / elapsed if elapsed > 0 else 0.0
+    print(f"[INFO] {added}件追加（{len(new_data)}件を {elapsed:.3f}s で処理, {rate:,.0f}件/s）"
+          f"→ {HIST_DIR}/ {len(merger.store)}日分")
 
 if __name__ == "__main__":
-    merge_data()
\ No newline at end of file
+    merge_data()
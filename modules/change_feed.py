@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+from starlette.responses import StreamingResponse
+
+from modules import serializer
+from modules.response_cache import CHECK_INTERVAL
+
+KEEPALIVE = 15.0  # 何も無くてもこの間隔でコメント行を送る（プロキシに切られないように）
+RETRY_MS = 3000   # 切断時にブラウザが再接続するまでの待ち
+QUEUE_SIZE = 4    # 購読者ごとの未送信イベント数の上限（超えたら古いものから捨てる）
+
+
+class ChangeFeed:
+    """
+    FileCache の内容が変わったら購読者全員に通知する。
+
+        feed = ChangeFeed(manifest_cache, diff=publish.delta)
+        queue = feed.subscribe()       # await queue.get() で {"version", "previous", ...}
+
+    ファイルの確認は購読者の数に関係なく監視タスク1つで行い、購読者がいなくなったら止める。
+    diff(前の内容, 今の内容) を渡すと、その戻り値（場ごとの差分など）もイベントに入れる。
+    通知が詰まった購読者には古いイベントを捨てて最新を送るので、
+    クライアントは previous が手元のバージョンと違えば全体を取り直すこと。
+    """
+
+    def __init__(self, cache, diff=None, interval=CHECK_INTERVAL):
+        self.cache = cache
+        self.diff = diff
+        self.interval = interval
+        self.current = None  # 最新のイベント
+        self.subscribers = set()
+        self.sent = 0
+        self._payload = None
+        self._task = None
+        self._lock = asyncio.Lock()  # check() を監視タスクと接続直後の確認で同時に走らせない
+
+    def subscribe(self):
+        self._start()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self.close()  # 誰も聞いていないのにファイルを確認し続けない
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"[WARN] 更新監視でエラー: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        """変わっていればイベントを作って配る。配ったイベント（無ければ None）を返す"""
+        async with self._lock:
+            # 作り直し（分割の書き出しなど）はブロッキングなのでスレッドで行う
+            entry = await asyncio.to_thread(self.cache.get)
+            version = entry.etag.strip('"')
+            if self.current is not None and self.current["version"] == version:
+                return None
+            payload = serializer.loads(entry.body) if self.diff else None
+            event = {"version": version,
+                     "previous": self.current["version"] if self.current else None}
+            if self.diff and self._payload is not None:
+                event.update(self.diff(self._payload, payload))
+            self._payload = payload
+            self.current = event
+            self.publish(event)
+            return event
+
+    def publish(self, event):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+            self.sent += 1
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def format_event(event, name="change"):
+    """SSE の1イベント分のテキスト"""
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event['version']}\nevent: {name}\ndata: {data}\n\n"
+
+
+def sse_response(feed, request, keepalive=KEEPALIVE):
+    """
+    feed を text/event-stream で流すレスポンス。
+    接続直後に現在のバージョンを送る（Last-Event-ID が同じなら送らない）。
+    """
+    last_id = request.headers.get("last-event-id")
+
+    async def stream():
+        queue = feed.subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if feed.current is None:
+                await feed.check()
+            sent = last_id
+            if feed.current is not None and feed.current["version"] != last_id:
+                # 接続前の変更は差分を持たない「今のバージョン」として送る
+                sent = feed.current["version"]
+                yield format_event({"version": sent, "previous": last_id})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["version"] != sent:
+                    sent = event["version"]
+                    yield format_event(event)
+        finally:
+            feed.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,149 @@
+import gzip
+import mimetypes
+import os
+import sys
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 優先順（同じ q 値ならこの順で選ぶ）
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+MIN_SIZE = 512  # これより小さいものは圧縮しない（ヘッダの方が大きくなる）
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt", ".webmanifest", ".xml", ".map")
+
+
+def negotiate(accept_encoding, available=ENCODINGS):
+    """Accept-Encoding（q 値付き）から使う符号化を選ぶ。無ければ None"""
+    if not accept_encoding:
+        return None
+    q = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[name] = weight
+    best, best_q = None, 0.0
+    for enc in available:
+        weight = q.get(enc, q.get("*", 0.0))
+        if weight > best_q:
+            best, best_q = enc, weight
+    return best
+
+
+def compress(body, encoding, fast=False):
+    """fast=True はリクエストごとに圧縮する場合（圧縮率を少し落として速くする）"""
+    if encoding == "br":
+        return brotli.compress(body, quality=5 if fast else 11)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+    return body
+
+
+# ---- 事前圧縮（ビルド時） -------------------------------------------
+def precompress_file(path, encodings=ENCODINGS):
+    """path の .gz / .br を作る（元より新しいものがあれば作り直さない）。作った数を返す"""
+    mtime = os.path.getmtime(path)
+    made = 0
+    body = None
+    for enc in encodings:
+        target = path + SUFFIXES[enc]
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        if body is None:
+            with open(path, "rb") as f:
+                body = f.read()
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(compress(body, enc))
+        os.replace(tmp, target)
+        made += 1
+    return made
+
+
+def precompress_dir(root, encodings=ENCODINGS, min_size=MIN_SIZE):
+    """
+    root 以下の圧縮する価値のあるファイルすべてに .gz / .br を用意する。
+    戻り値: [(パス, 元サイズ, {符号化: 圧縮後サイズ})]
+    """
+    report = []
+    for dirpath, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(dirpath, name)
+            if not name.endswith(COMPRESSIBLE) or os.path.getsize(path) < min_size:
+                continue
+            precompress_file(path, encodings)
+            report.append((path, os.path.getsize(path),
+                           {enc: os.path.getsize(path + SUFFIXES[enc]) for enc in encodings}))
+    return report
+
+
+def print_report(report):
+    for path, size, sizes in report:
+        detail = "  ".join(f"{enc} {n:,}B ({n / size:.0%})" for enc, n in sizes.items())
+        print(f"[INFO] {path}: {size:,}B → {detail}")
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles の代わりにマウントすると、クライアントが受け付ける場合は
+    事前に作った .br / .gz をそのまま返す（リクエストごとの圧縮はしない）。
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding"), self._available(full_path, stat_result))
+        if encoding is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["vary"] = "Accept-Encoding"
+            return response
+        path = str(full_path) + SUFFIXES[encoding]
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        response = FileResponse(path, status_code=status_code, stat_result=os.stat(path),
+                                media_type=media_type)
+        response.headers["content-encoding"] = encoding
+        response.headers["vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _available(full_path, stat_result):
+        """元ファイルより新しい圧縮版がある符号化"""
+        found = []
+        for enc in ENCODINGS:
+            try:
+                st = os.stat(str(full_path) + SUFFIXES[enc])
+            except OSError:
+                continue
+            if st.st_mtime >= stat_result.st_mtime:
+                found.append(enc)
+        return found
+
+
+class HashedStaticFiles(PrecompressedStaticFiles):
+    """ファイル名に内容ハッシュが入っているもの（data/shards）。中身が変わらないので長期キャッシュさせる"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+if __name__ == "__main__":
+    # python -m modules.compression static
+    roots = sys.argv[1:] or ["static"]
+    for root in roots:
+        print_report(precompress_dir(root))
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from modules import compression, serializer
+from modules.response_cache import Cached
+
+RING_SIZE = 16  # 差分を出せる過去の版の数
+
+
+def snapshot_version(sections):
+    return hashlib.blake2b(serializer.dumps(sections), digest_size=8).hexdigest()
+
+
+def diff(old, new):
+    """
+    2つのスナップショット {区分: {キー: 値}} の差分を JSON Patch 形式の操作列にする。
+      {"op": "add" | "replace", "path": "/races/20250101-01-3", "value": {...}}
+      {"op": "remove", "path": "/races/20250101-01-3"}
+    """
+    ops = []
+    for section in sorted(set(old) | set(new)):
+        before, after = old.get(section, {}), new.get(section, {})
+        for key, value in after.items():
+            if key not in before:
+                ops.append({"op": "add", "path": f"/{section}/{key}", "value": value})
+            elif before[key] != value:
+                ops.append({"op": "replace", "path": f"/{section}/{key}", "value": value})
+        for key in before:
+            if key not in after:
+                ops.append({"op": "remove", "path": f"/{section}/{key}"})
+    return ops
+
+
+class DeltaLog:
+    """
+    直近 RING_SIZE 版のスナップショットを持ち、?since= の版からの差分を返す。
+
+        log = DeltaLog(source)        # source.get() は {区分: {キー: 値}}（FileValue など）
+        entry = log.delta(since)      # シリアライズ済み（Cached）
+
+    since が古すぎる・不明なときは全体（"full": true）を返す。
+    同じ (since, 最新版) の応答は作り直さずに使い回す。
+
+    全体・1つ前の版からの差分・最新版そのもの（変更なし）の応答は、
+    prepare()（HotReloader のスレッドから refresh() 経由で呼ぶ）で圧縮まで作っておく。
+    イベントループ上では cached() で取り出し、無ければ delta() をスレッドで呼ぶ。
+    """
+
+    def __init__(self, source, size=RING_SIZE):
+        self.source = source
+        self.size = size
+        self.ring = OrderedDict()  # 版 → スナップショット（古い順）
+        self._version = None
+        self._previous = None  # 1つ前の版
+        self._snapshot = None
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def latest(self):
+        """(版, スナップショット)。元データが変わっていればリングに追加する"""
+        snapshot = self.source.get()
+        if snapshot is self._snapshot:
+            return self._version, snapshot
+        with self._lock:
+            if snapshot is not self._snapshot:
+                version = snapshot_version(snapshot)
+                if version not in self.ring:
+                    self.ring[version] = snapshot
+                    while len(self.ring) > self.size:
+                        self.ring.popitem(last=False)
+                if version != self._version:
+                    self._previous = self._version
+                self._version, self._snapshot = version, snapshot
+                self._responses = {}
+            return self._version, self._snapshot
+
+    @property
+    def background(self):
+        return self.source.background
+
+    @background.setter
+    def background(self, value):
+        self.source.background = value  # HotReloader が監視を引き受けたら source も確認をやめる
+
+    def refresh(self):
+        """元データを更新確認し、変わっていれば版の計算まで済ませておく（HotReloader から呼ぶ）"""
+        swapped = self.source.refresh()
+        if swapped:
+            self.prepare()
+        return swapped
+
+    def rollback(self):
+        restored = self.source.rollback()
+        if restored:
+            self.prepare()
+        return restored
+
+    def prepare(self):
+        """よく来る since（なし・1つ前の版・最新版）の応答を作り、全符号化で圧縮しておく"""
+        version, _ = self.latest()
+        for since in (None, self._previous, version):
+            if since is None or since in self.ring:
+                entry = self.delta(since)
+                for encoding in compression.ENCODINGS:
+                    entry.encoded(encoding)
+
+    def info(self):
+        return {**self.source.info(), "ring": len(self.ring)}
+
+    def cached(self, since=None):
+        """作成済みの応答（無ければ None）。差分計算も圧縮もしないのでイベントループ上で呼べる"""
+        self.latest()
+        return self._responses.get(since if since in self.ring else None)
+
+    def delta(self, since=None, encoding=None):
+        """
+        since からの応答を（無ければ作って）返す。差分計算とシリアライズがあるので
+        イベントループからは asyncio.to_thread で呼ぶ。
+        prepare() 以外で作る応答は圧縮の速さを優先し、encoding を渡せばその圧縮も済ませる。
+        """
+        version, snapshot = self.latest()
+        responses = self._responses
+        if since not in self.ring:
+            since = None  # 知らない版はまとめて全体（任意の文字列で応答が増えないように）
+        entry = responses.get(since)
+        if entry is None:
+            base = self.ring.get(since) if since else None
+            if base is None:
+                payload = {"version": version, "since": None, "full": True, "snapshot": snapshot}
+            else:
+                payload = {"version": version, "since": since, "full": False,
+                           "ops": [] if since == version else diff(base, snapshot)}
+            entry = responses[since] = Cached(200, serializer.dumps(payload), version,
+                                              fast=encoding is not None)
+        if encoding is not None:
+            entry.encoded(encoding)
+        return entry
@@ -0,0 +1,190 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+# 既知の列は型を固定する（未知の列は pandas の推論に任せる）
+DTYPES = {
+    "race_stadium_number": "Int16",
+    "race_number": "Int8",
+    "race_weather_number": "Int8",
+    "racer_number": "Int32",
+    "racer_boat_number": "Int8",
+    "racer_course_number": "Int8",
+    "racer_place_number": "Int8",
+    "predicted_place": "Int8",
+    "racer_start_timing": "float32",
+    "race_wind": "float32",
+    "race_wave": "float32",
+    "wind": "float32",
+    "wave": "float32",
+}
+PARTITION_COLUMNS = ("race_date", "date")
+UNKNOWN_DATE = "00000000"
+
+
+def _arrow():
+    """pyarrow は任意依存。無ければ None（CSV パーティションで代用）"""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def typed(df):
+    """既知の列を DTYPES の型にそろえる（数値にできない値は欠損）"""
+    df = df.copy()
+    for col, dtype in DTYPES.items():
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors="coerce")
+            if dtype.startswith("Int"):
+                values = values.round()
+            df[col] = values.astype(dtype)
+    for col in PARTITION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def _partitions(dates):
+    """'2025-01-01' / '20250101' → '20250101'（読めない値は UNKNOWN_DATE）"""
+    digits = dates.astype("string").str.replace(r"\D", "", regex=True).str[:8]
+    return digits.where(digits.str.len() == 8, UNKNOWN_DATE).fillna(UNKNOWN_DATE).astype(object)
+
+
+class FeatureStore:
+    """
+    race_date ごとに1ファイルの列指向特徴量ストア。
+
+        <root>/20250101.arrow   Arrow IPC（非圧縮。memory_map でそのまま読める）
+        <root>/20250101.csv     pyarrow が無い環境ではこちら
+
+    読み込みは必要な列・日付のパーティションだけに絞れる。
+    """
+
+    def __init__(self, root, legacy_csv=None):
+        self.root = root
+        self.legacy_csv = legacy_csv
+        self.pa = _arrow()
+        self.ext = ".arrow" if self.pa else ".csv"
+
+    # ---- パーティション --------------------------------------------
+    def dates(self):
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            date, ext = os.path.splitext(name)
+            if ext == self.ext and date.isdigit():
+                found.append(date)
+        return sorted(found)
+
+    def __len__(self):
+        return len(self.dates())
+
+    def _path(self, date):
+        return os.path.join(self.root, f"{date}{self.ext}")
+
+    # ---- 書き込み --------------------------------------------------
+    def write(self, df, overwrite=False):
+        """
+        df を race_date（無ければ date）ごとに分けて保存する。
+        含まれる日付のパーティションは置き換え、overwrite=True なら他の日付は消す。
+        """
+        df = typed(df)
+        key = next((c for c in PARTITION_COLUMNS if c in df.columns), None)
+        parts = _partitions(df[key]) if key else pd.Series(UNKNOWN_DATE, index=df.index)
+        # 日付順に並べておけば各パーティションは連続した範囲になる
+        order = parts.argsort(kind="stable")
+        df = df.iloc[order].reset_index(drop=True)
+        parts = parts.iloc[order].reset_index(drop=True)
+        bounds = parts.ne(parts.shift()).to_numpy().nonzero()[0].tolist() + [len(parts)]
+
+        data = self.pa.Table.from_pandas(df, preserve_index=False) if self.pa else df
+        os.makedirs(self.root, exist_ok=True)
+        written = []
+        for begin, end in zip(bounds, bounds[1:]):
+            date = parts.iat[begin]
+            part = data.slice(begin, end - begin) if self.pa else data.iloc[begin:end]
+            self._write_partition(date, part)
+            written.append(date)
+        if overwrite:
+            for date in set(self.dates()) - set(written):
+                os.remove(self._path(date))
+        return written
+
+    def _write_partition(self, date, part):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-", suffix=self.ext)
+        os.close(fd)
+        try:
+            if self.pa:
+                with self.pa.OSFile(tmp, "wb") as sink:
+                    with self.pa.ipc.new_file(sink, part.schema) as writer:
+                        writer.write_table(part)
+            else:
+                part.to_csv(tmp, index=False)
+            os.replace(tmp, self._path(date))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # ---- 読み込み --------------------------------------------------
+    def read(self, columns=None, start=None, end=None):
+        """
+        指定列・日付範囲（YYYYMMDD、両端を含む）を DataFrame で返す。
+        ストアが空なら legacy_csv（従来の features.csv など）を読む。
+        """
+        stored = self.dates()
+        dates = [d for d in stored
+                 if (start is None or d >= start) and (end is None or d <= end)]
+        if not dates:
+            if not stored and self.legacy_csv and os.path.exists(self.legacy_csv):
+                return self._read_csv(self.legacy_csv, columns)
+            return pd.DataFrame(columns=columns or [])
+        if self.pa:
+            return self._read_arrow(dates, columns)
+        return pd.concat([self._read_csv(self._path(d), columns) for d in dates], ignore_index=True)
+
+    def _read_arrow(self, dates, columns):
+        tables = []
+        for date in dates:
+            # memory_map なので選ばなかった列はディスクから読まれない
+            source = self.pa.memory_map(self._path(date), "r")
+            table = self.pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                names = set(table.schema.names)
+                table = table.select([c for c in columns if c in names])
+            tables.append(table)
+        table = self.pa.concat_tables(tables, promote_options="default")
+        return table.to_pandas()
+
+    def _read_csv(self, path, columns):
+        usecols = (lambda c: c in columns) if columns is not None else None
+        df = pd.read_csv(path, usecols=usecols, encoding="utf-8-sig")
+        return typed(df)
+
+    # ---- 書き出し --------------------------------------------------
+    def export_csv(self, path, columns=None, start=None, end=None):
+        """人が見る用の CSV（Excel で開けるよう BOM 付き）"""
+        df = self.read(columns, start, end)
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        return len(df)
+
+
+if __name__ == "__main__":
+    # python -m modules.feature_store import features.csv data/features
+    # python -m modules.feature_store export data/features features.csv
+    if len(sys.argv) != 4 or sys.argv[1] not in ("import", "export"):
+        print("usage: python -m modules.feature_store import <CSV> <ストア> | export <ストア> <CSV>")
+        sys.exit(1)
+    if sys.argv[1] == "import":
+        df = pd.read_csv(sys.argv[2], encoding="utf-8-sig")
+        dates = FeatureStore(sys.argv[3]).write(df)
+        print(f"[INFO] {len(df)}行を {len(dates)} パーティションに保存しました → {sys.argv[3]}")
+    else:
+        n = FeatureStore(sys.argv[2]).export_csv(sys.argv[3])
+        print(f"[INFO] {n}行を書き出しました → {sys.argv[3]}")
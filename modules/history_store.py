@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+
+from modules import serializer
+from modules.serializer import atomic_write
+
+MANIFEST = "manifest.json"
+
+
+class HistoryStore:
+    """
+    日付ごとに1ファイルの履歴ストア。
+
+        <root>/manifest.json      {"partitions": {"20250101": {"file", "bytes", "updated"}}}
+        <root>/20250101.json      その日のデータ（コンパクトJSON）
+
+    1日分の更新はその日のファイルとマニフェストだけを書き換える。
+    保持期間の整理は古いファイルを消すだけで済む。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._manifest = None
+
+    # ---- マニフェスト ----------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST)
+
+    def _load_manifest(self):
+        if self._manifest is not None:
+            return self._manifest
+        path = self._manifest_path()
+        if os.path.exists(path):
+            # 書き込みと同じ serializer で読む（圧縮・MessagePack でも読める）
+            self._manifest = serializer.load(path)
+        else:
+            self._manifest = {"partitions": self._scan()}
+        return self._manifest
+
+    def _scan(self):
+        """マニフェストが無い場合はファイル一覧から作り直す"""
+        partitions = {}
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                date, ext = os.path.splitext(name)
+                if ext == ".json" and date.isdigit():
+                    path = os.path.join(self.root, name)
+                    partitions[date] = {"file": name, "bytes": os.path.getsize(path),
+                                        "updated": os.path.getmtime(path)}
+        return partitions
+
+    def _save_manifest(self):
+        atomic_write(self._manifest_path(), serializer.dumps(self._load_manifest()))
+
+    # ---- 読み込み --------------------------------------------------
+    def dates(self):
+        return sorted(self._load_manifest()["partitions"])
+
+    def __contains__(self, date):
+        return date in self._load_manifest()["partitions"]
+
+    def __len__(self):
+        return len(self._load_manifest()["partitions"])
+
+    def read(self, date, default=None):
+        part = self._load_manifest()["partitions"].get(date)
+        if part is None:
+            return default
+        return serializer.load(os.path.join(self.root, part["file"]))
+
+    def read_range(self, start=None, end=None):
+        """(日付, データ) を日付順に1日ずつ読み込んで返す（start/end は両端を含む）"""
+        for date in self.dates():
+            if start is not None and date < start:
+                continue
+            if end is not None and date > end:
+                break
+            yield date, self.read(date)
+
+    def last(self, n):
+        """新しい方から n 日分を日付順で返す"""
+        dates = self.dates()[-n:] if n > 0 else []
+        return self.read_range(dates[0], dates[-1]) if dates else iter(())
+
+    def load_all(self):
+        """旧 history.json と同じ {日付: データ} の dict を返す（小さい範囲向け）"""
+        return dict(self.read_range())
+
+    # ---- 書き込み --------------------------------------------------
+    def write(self, date, data):
+        name = f"{date}.json"
+        raw = serializer.dumps(data)
+        atomic_write(os.path.join(self.root, name), raw)
+        self._load_manifest()["partitions"][date] = {
+            "file": name, "bytes": len(raw), "updated": time.time()}
+        self._save_manifest()
+
+    def drop(self, dates):
+        manifest = self._load_manifest()
+        dropped = []
+        for date in dates:
+            part = manifest["partitions"].pop(date, None)
+            if part is None:
+                continue
+            try:
+                os.remove(os.path.join(self.root, part["file"]))
+            except FileNotFoundError:
+                pass
+            dropped.append(date)
+        if dropped:
+            self._save_manifest()
+        return dropped
+
+    def retain_last(self, n):
+        """最新 n 日分だけ残し、削除した日付を返す"""
+        dates = self.dates()
+        return self.drop(dates[:-n] if n > 0 else dates)
+
+    # ---- 移行 ------------------------------------------------------
+    def migrate_from(self, path, layout=None):
+        """
+        旧形式の履歴ファイルを取り込む。
+        {日付: データ} の dict と [{"date": ...}, ...] のレコード配列に対応。
+        layout に "dict" / "list" を指定すると、その形式のときだけ取り込む。
+        取り込んだ日数を返す。
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            legacy = serializer.load(path)
+        except ValueError:
+            return 0
+        if layout == "dict" and not isinstance(legacy, dict):
+            return 0
+        if layout == "list" and not isinstance(legacy, list):
+            return 0
+        if isinstance(legacy, dict):
+            items = legacy.items()
+        elif isinstance(legacy, list):
+            items = ((r["date"], r) for r in legacy if isinstance(r, dict) and "date" in r)
+        else:
+            return 0
+        count = 0
+        manifest = self._load_manifest()
+        for date, data in items:
+            name = f"{date}.json"
+            raw = serializer.dumps(data)
+            atomic_write(os.path.join(self.root, name), raw)
+            manifest["partitions"][date] = {
+                "file": name, "bytes": len(raw), "updated": time.time()}
+            count += 1
+        if count:
+            self._save_manifest()
+        return count
+
+    def migrate_once(self, path, layout=None):
+        """ストアが空で旧ファイルがあるときだけ移行する"""
+        if len(self) or not os.path.exists(path):
+            return 0
+        count = self.migrate_from(path, layout)
+        if count:
+            print(f"[INFO] {path} から {count} 日分を {self.root}/ に移行しました")
+        return count
+
+
+if __name__ == "__main__":
+    # python -m modules.history_store data/history.json data/history
+    if len(sys.argv) != 3:
+        print("usage: python -m modules.history_store <旧historyファイル> <ストアのディレクトリ>")
+        sys.exit(1)
+    n = HistoryStore(sys.argv[2]).migrate_from(sys.argv[1])
+    print(f"[INFO] {n} 日分を移行しました → {sys.argv[2]}")
@@ -0,0 +1,73 @@
+import asyncio
+
+RELOAD_INTERVAL = 2.0  # 更新確認の間隔（秒）
+
+
+class HotReloader:
+    """
+    FileCache / FileValue / ModelStore など refresh() と rollback() を持つものを
+    バックグラウンドで監視し、ファイルが更新されたら読み込み・検証してから差し替える。
+
+        reloader = HotReloader({"data": [data_cache, ...], "model": [model_store]})
+        reloader.start()        # lifespan の中で（イベントループ上で）呼ぶ
+        reloader.rollback("model")
+
+    start() 後は各キャッシュの get() がファイルを確認しなくなるので、
+    リクエストがディスク I/O や読み込みを待つことはない。
+    """
+
+    def __init__(self, groups, interval=RELOAD_INTERVAL):
+        self.groups = {name: list(items) for name, items in groups.items()}
+        self.interval = interval
+        self.swaps = {name: 0 for name in self.groups}
+        self._task = None
+
+    def check(self):
+        """全部を1回確認する（ブロッキング。スレッドから呼ぶ）。差し替えたグループ名を返す"""
+        swapped = []
+        for name, items in self.groups.items():
+            for item in items:
+                try:
+                    if item.refresh():
+                        self.swaps[name] += 1
+                        if name not in swapped:
+                            swapped.append(name)
+                except Exception as e:
+                    print(f"[WARN] {name} の更新確認でエラー: {e}")
+        if swapped:
+            print(f"[INFO] 新しい版に差し替えました: {', '.join(swapped)}")
+        return swapped
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.check)
+
+    def start(self):
+        for items in self.groups.values():
+            for item in items:
+                if hasattr(item, "background"):
+                    item.background = True
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for items in self.groups.values():
+            for item in items:
+                if hasattr(item, "background"):
+                    item.background = False
+
+    def rollback(self, name):
+        """グループ name を1つ前の版に戻す。戻せたものの数を返す"""
+        return sum(1 for item in self.groups[name] if item.rollback())
+
+    def info(self):
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "swaps": dict(self.swaps),
+            "groups": {name: [item.info() for item in items] for name, items in self.groups.items()},
+        }
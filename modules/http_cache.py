@@ -0,0 +1,254 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# ディスクキャッシュ設定
+CACHE_DIR = os.environ.get("BOAT_HTTP_CACHE_DIR", os.path.join("data", ".http_cache"))
+MAX_BYTES = int(os.environ.get("BOAT_HTTP_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+LOW_WATER = 0.8  # 上限を超えたら、この割合まで古いものからまとめて削除する
+JST = timezone(timedelta(hours=9))
+
+# 保存するレスポンスヘッダ
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+_lock = threading.Lock()
+_index = None
+_objects = {}  # digest → [サイズ, 参照しているURL数]（同一内容は1オブジェクトを共有）
+_total = 0
+_dirty = False
+_counters = {"hit": 0, "revalidated": 0, "miss": 0, "stored": 0, "evicted": 0}
+
+
+def _index_path():
+    return os.path.join(CACHE_DIR, "index.json")
+
+
+def _object_path(digest):
+    return os.path.join(CACHE_DIR, "objects", digest[:2], digest + ".gz")
+
+
+def _load_index():
+    global _index
+    if _index is not None:
+        return _index
+    _index = {}
+    path = _index_path()
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _index = {}
+    for entry in _index.values():
+        _add_ref(entry)
+    atexit.register(save)
+    return _index
+
+
+def _add_ref(entry):
+    global _total
+    obj = _objects.get(entry["body"])
+    if obj is None:
+        _objects[entry["body"]] = [entry["size"], 1]
+        _total += entry["size"]
+    else:
+        obj[1] += 1
+
+
+def _drop_ref(entry):
+    """参照が無くなったオブジェクトは容量から外す。ファイルを消すべきなら True"""
+    global _total
+    obj = _objects.get(entry["body"])
+    if obj is None:
+        return False
+    obj[1] -= 1
+    if obj[1] > 0:
+        return False
+    del _objects[entry["body"]]
+    _total -= obj[0]
+    return True
+
+
+def save():
+    """インデックスをアトミックに書き出す"""
+    global _dirty
+    with _lock:
+        if _index is None or not _dirty:
+            return
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = _index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, _index_path())
+        _dirty = False
+
+
+def _day_end(url):
+    """hd=YYYYMMDD の日（JST）が終わる時刻（UNIX秒）。hd が無ければ None"""
+    hd = parse_qs(urlparse(url).query).get("hd", [""])[0]
+    try:
+        day = datetime.strptime(hd, "%Y%m%d").replace(tzinfo=JST)
+    except ValueError:
+        return None
+    return (day + timedelta(days=1)).timestamp()
+
+
+def is_immutable(url, fetched):
+    """
+    hd=YYYYMMDD の日（JST）が終わった後に取得した内容なら確定済みとみなす。
+    当日中（結果・オッズが出る前）に取得した内容は、過去日になっても再検証が必要。
+    """
+    end = _day_end(url)
+    return end is not None and fetched >= end
+
+
+def _read_body(digest):
+    try:
+        with open(_object_path(digest), "rb") as f:
+            return gzip.decompress(f.read())
+    except OSError:
+        return None
+
+
+def _write_body(body):
+    digest = hashlib.sha256(body).hexdigest()
+    path = _object_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        os.replace(tmp, path)
+    return digest, os.path.getsize(path)
+
+
+def _to_response(url, entry, body):
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp._content = body
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    resp.encoding = entry.get("encoding")
+    return resp
+
+
+def lookup(url):
+    """
+    キャッシュ済みエントリを返す。
+    戻り値: (response, fresh) / 未登録なら (None, False)
+    fresh=True ならネットワークに出ずそのまま使ってよい。
+    """
+    with _lock:
+        entry = _load_index().get(url)
+    if entry is None:
+        return None, False
+    body = _read_body(entry["body"])
+    if body is None:
+        return None, False
+    return _to_response(url, entry, body), is_immutable(url, entry["fetched"])
+
+
+def conditional_headers(url):
+    with _lock:
+        entry = _load_index().get(url)
+    if entry is None:
+        return {}
+    headers = {}
+    cached = entry.get("headers", {})
+    if cached.get("ETag"):
+        headers["If-None-Match"] = cached["ETag"]
+    if cached.get("Last-Modified"):
+        headers["If-Modified-Since"] = cached["Last-Modified"]
+    return headers
+
+
+def touch(url, counter):
+    """キャッシュから応答したことを記録（LRU用）。304 なら今の時点で内容を確認できたことになる"""
+    global _dirty
+    with _lock:
+        entry = _load_index().get(url)
+        if entry is not None:
+            entry["accessed"] = time.time()
+            if counter == "revalidated":
+                entry["fetched"] = entry["accessed"]
+            _dirty = True
+        _counters[counter] += 1
+
+
+def count_miss():
+    with _lock:
+        _counters["miss"] += 1
+
+
+def store(url, resp):
+    """200応答を保存し、上限を超えたら古いものから削除"""
+    global _dirty
+    if resp.status_code != 200:
+        return
+    digest, size = _write_body(resp.content)
+    now = time.time()
+    with _lock:
+        index = _load_index()
+        entry = {
+            "body": digest,
+            "size": size,
+            "status": resp.status_code,
+            "encoding": resp.encoding,
+            "headers": {k: resp.headers[k] for k in KEEP_HEADERS if k in resp.headers},
+            "fetched": now,
+            "accessed": now,
+        }
+        _add_ref(entry)
+        old = index.get(url)
+        index[url] = entry
+        if old is not None and _drop_ref(old):
+            _remove_object(old["body"])
+        _counters["stored"] += 1
+        _dirty = True
+        if _total > MAX_BYTES:
+            _evict(index)
+
+
+def _remove_object(digest):
+    try:
+        os.remove(_object_path(digest))
+    except OSError:
+        pass
+
+
+def _evict(index):
+    # 上限を超えたときだけ呼ばれる。毎回並べ替えないよう、LOW_WATER まで一度に減らす
+    target = MAX_BYTES * LOW_WATER
+    for url in sorted(index, key=lambda u: index[u]["accessed"]):
+        if _total <= target:
+            break
+        entry = index.pop(url)
+        _counters["evicted"] += 1
+        if _drop_ref(entry):
+            _remove_object(entry["body"])
+
+
+def used():
+    return _index is not None
+
+
+def stats():
+    with _lock:
+        return dict(_counters)
+
+
+def print_stats():
+    s = stats()
+    print(
+        f"[CACHE] ヒット {s['hit']}件 / 再検証(304) {s['revalidated']}件 / "
+        f"ミス {s['miss']}件 / 保存 {s['stored']}件 / 削除 {s['evicted']}件"
+    )
@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules import http_cache, rate_limit
+
+# 共通HTTPクライアント設定
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+POOL_SIZE = 16          # ホストごとのkeep-alive接続数（並列取得数以上にする）
+RETRIES = 3
+BACKOFF = 0.5           # 0.5s, 1s, 2s ... で再試行
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = 60    # Retry-After がこれより長ければ打ち切る（秒）
+USER_AGENT = "Mozilla/5.0 (compatible; boat-race-ai/1.0)"
+
+_lock = threading.Lock()
+_session = None
+_stats = {
+    "requests": 0,
+    "errors": 0,
+    "total_time": 0.0,
+    "max_time": 0.0,
+    "hosts": defaultdict(lambda: {"requests": 0, "total_time": 0.0}),
+}
+
+
+def _build_session():
+    # 接続確立の失敗（サーバーに届いていない）だけ urllib3 に任せる。
+    # 429/5xx・読み取りエラーの再試行は get() で行い、毎回レート制限を通す
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=BACKOFF,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """プロセス共通のSession（keep-alive接続プール付き）を返す"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _record(url, elapsed, error):
+    host = urlparse(url).netloc
+    with _lock:
+        _stats["requests"] += 1
+        _stats["errors"] += int(error)
+        _stats["total_time"] += elapsed
+        _stats["max_time"] = max(_stats["max_time"], elapsed)
+        _stats["hosts"][host]["requests"] += 1
+        _stats["hosts"][host]["total_time"] += elapsed
+
+
+def _retry_after(resp):
+    """Retry-After（秒数 または HTTP日付）を秒で返す。無ければ None"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, seconds)
+
+
+def _send(url, timeout, **kwargs):
+    """1回分のリクエスト。レート制限の取得とフィードバックを1回ずつ行う"""
+    rate_limit.acquire(url)
+    started = time.perf_counter()
+    status = 599  # 例外時は過負荷とみなして減速する
+    retry_after = None
+    try:
+        resp = get_session().get(url, timeout=timeout, **kwargs)
+        status = resp.status_code
+        retry_after = _retry_after(resp)
+        return resp
+    finally:
+        elapsed = time.perf_counter() - started
+        _record(url, elapsed, status >= 400)
+        rate_limit.feedback(url, status, elapsed, min(retry_after, MAX_RETRY_AFTER) if retry_after else None)
+
+
+def get(url, timeout=None, cache=False, **kwargs):
+    """
+    requests.get 互換のGET。
+    timeout 省略時は (CONNECT_TIMEOUT, READ_TIMEOUT) を使う。
+    cache=True ならディスクキャッシュ（modules/http_cache）を使い、
+    過去日のページはネットワークに出ず、当日分は条件付きGETで再検証する。
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    cached = None
+    if cache:
+        cached, fresh = http_cache.lookup(url)
+        if fresh:
+            http_cache.touch(url, "hit")
+            return cached
+        if cached is not None:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers.update(http_cache.conditional_headers(url))
+            kwargs["headers"] = headers
+
+    # ホストごとの共有レート制限（固定sleepの代わり）。再試行も1回ずつバケットを通す
+    for attempt in range(RETRIES + 1):
+        last = attempt == RETRIES
+        try:
+            resp = _send(url, timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            time.sleep(BACKOFF * 2 ** attempt)
+            continue
+        if resp.status_code not in RETRY_STATUS or last:
+            break
+        retry_after = _retry_after(resp)
+        if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+            break
+        if retry_after is None:
+            time.sleep(BACKOFF * 2 ** attempt)
+        # Retry-After 付きならバケット側で待つ（同じホストへの他スレッドも一緒に待たせる）
+
+    if cache:
+        if resp.status_code == 304 and cached is not None:
+            http_cache.touch(url, "revalidated")
+            return cached
+        http_cache.count_miss()
+        http_cache.store(url, resp)
+    return resp
+
+
+def connection_count():
+    """これまでに張ったTCP(+TLS)接続数（＝ハンドシェイク回数）"""
+    if _session is None:
+        return 0
+    count = 0
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                count += pool.num_connections
+    return count
+
+
+def stats():
+    with _lock:
+        hosts = {h: dict(v) for h, v in _stats["hosts"].items()}
+        n = _stats["requests"]
+        result = {
+            "requests": n,
+            "errors": _stats["errors"],
+            "total_time": round(_stats["total_time"], 3),
+            "avg_time": round(_stats["total_time"] / n, 3) if n else 0.0,
+            "max_time": round(_stats["max_time"], 3),
+            "hosts": hosts,
+        }
+    result["connections"] = connection_count()
+    return result
+
+
+def print_stats():
+    s = stats()
+    print(
+        f"[HTTP] {s['requests']}リクエスト / 接続 {s['connections']}回 / "
+        f"エラー {s['errors']}件 / 平均 {s['avg_time']:.3f}s / 最大 {s['max_time']:.3f}s"
+    )
+    for host, r in rate_limit.stats().items():
+        print(f"[RATE] {host}: 最終レート {r['rate']}req/s / 抑制 {r['throttled']}回")
+    if http_cache.used():
+        http_cache.save()
+        http_cache.print_stats()
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+# feature_names_in_ を持たないモデルのときの列（predict.py と同じ）
+DEFAULT_FEATURES = ("racer_start_timing", "racer_boat_number")
+# 入力の艇データで使われている別名（Open API / 出走表 / 手入力）
+ALIASES = {
+    "racer_boat_number": ("racer_boat_number", "lane", "boat", "boat_number"),
+    "racer_course_number": ("racer_course_number", "course"),
+    "racer_start_timing": ("racer_start_timing", "start_timing", "st"),
+}
+MAX_WAIT = 0.002   # 同時に来た /predict をまとめるために待つ秒数
+MAX_RACES = 256    # 1回の predict_proba にまとめるレース数の上限
+
+
+class ModelUnavailable(RuntimeError):
+    """モデルが無い・読み込めていない"""
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0  # 学習時の fillna(0) に合わせる
+
+
+def feature_row(boat, names):
+    row = []
+    for name in names:
+        value = None
+        for key in ALIASES.get(name, (name,)):
+            if boat.get(key) not in (None, ""):
+                value = boat[key]
+                break
+        row.append(_number(value))
+    return row
+
+
+def _lane(boat, i):
+    for key in ALIASES["racer_boat_number"]:
+        if boat.get(key) not in (None, ""):
+            try:
+                return int(float(boat[key]))
+            except (TypeError, ValueError):
+                break
+    return i + 1
+
+
+def rank(boats, proba, classes):
+    """
+    1レース分の確率から順位付きの艇リストを作る。
+    1着（クラス 1）の確率が高い順。クラス 1 が無いモデルは期待着順の小さい順。
+    """
+    win = classes.index(1.0) if 1.0 in classes else None
+    ranked = []
+    for i, (boat, p) in enumerate(zip(boats, proba)):
+        probabilities = {f"{c:g}": round(float(x), 4) for c, x in zip(classes, p)}
+        ranked.append({
+            "boat": _lane(boat, i),
+            "racer_name": boat.get("racer_name") or boat.get("racer"),
+            "win_probability": round(float(p[win]), 4) if win is not None else None,
+            "expected_place": round(sum(c * float(x) for c, x in zip(classes, p)), 3),
+            "probabilities": probabilities,
+        })
+    if win is not None:
+        ranked.sort(key=lambda b: (-b["win_probability"], b["boat"]))
+    else:
+        ranked.sort(key=lambda b: (b["expected_place"], b["boat"]))
+    for n, boat in enumerate(ranked, 1):
+        boat["rank"] = n
+    return ranked
+
+
+class LatencyStats:
+    """直近 window 件の所要時間と件数（/predict/metrics 用）"""
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)  # (秒, レース数, 艇数)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, races, rows):
+        with self._lock:
+            self.samples.append((seconds, races, rows))
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = list(self.samples)
+        if not samples:
+            return {"count": self.count}
+        times = sorted(s for s, _, _ in samples)
+        total = sum(times)
+        races = sum(r for _, r, _ in samples)
+        rows = sum(n for _, _, n in samples)
+
+        def pct(q):
+            return round(times[min(int(len(times) * q), len(times) - 1)] * 1000, 2)
+
+        return {
+            "count": self.count,
+            "window": len(samples),
+            "mean_ms": round(total / len(samples) * 1000, 2),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(times[-1] * 1000, 2),
+            "ms_per_race": round(total / races * 1000, 3) if races else None,
+            "races_per_call": round(races / len(samples), 2),
+            "boats_per_s": round(rows / total, 1) if total else None,
+        }
+
+
+class Predictor:
+    """
+    常駐モデル（ModelStore）で複数レースの艇をまとめて1回の predict_proba にかける。
+    pandas / sklearn はここを最初に呼んだときに読み込まれる。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.calls = LatencyStats()  # predict_proba 1回ごと
+
+    def predict_races(self, races):
+        """races: [{"boats": [艇...], ...}] → レースごとの順位付きリスト"""
+        model = self.store.get()
+        if model is None:
+            raise ModelUnavailable(self.store.error or "モデルが読み込まれていません")
+        names = [str(n) for n in getattr(model, "feature_names_in_", DEFAULT_FEATURES)]
+        rows, spans = [], []
+        for race in races:
+            start = len(rows)
+            rows.extend(feature_row(boat, names) for boat in race.get("boats") or [])
+            spans.append((start, len(rows)))
+        if not rows:
+            return [[] for _ in races]
+
+        import pandas as pd
+        start = time.perf_counter()
+        proba = model.predict_proba(pd.DataFrame(rows, columns=names))
+        self.calls.record(time.perf_counter() - start, len(races), len(rows))
+        classes = [float(c) for c in model.classes_]
+        return [rank(race.get("boats") or [], proba[a:b], classes) for race, (a, b) in zip(races, spans)]
+
+
+class MicroBatcher:
+    """
+    別々のリクエストで同時に来たレースを1回の predict_proba にまとめる。
+    推論中に届いたものは次の回にまとめて流す。
+    """
+
+    def __init__(self, predictor, max_wait=MAX_WAIT, max_races=MAX_RACES):
+        self.predictor = predictor
+        self.max_wait = max_wait
+        self.max_races = max_races
+        self._pending = []
+        self._task = None
+
+    async def submit(self, race):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((race, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        while self._pending:
+            await asyncio.sleep(self.max_wait)
+            batch, self._pending = self._pending[:self.max_races], self._pending[self.max_races:]
+            try:
+                results = await asyncio.to_thread(self.predictor.predict_races, [race for race, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), ranked in zip(batch, results):
+                if not future.done():
+                    future.set_result(ranked)
@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime
+
+from modules.inference import DEFAULT_FEATURES
+from modules.response_cache import file_key
+
+
+def validate_model(model):
+    """予測に使えるモデルか確かめる（だめなら例外）。全列 0 の1行を実際に予測してみる"""
+    classes = getattr(model, "classes_", None)
+    if not hasattr(model, "predict_proba") or classes is None or len(classes) == 0:
+        raise ValueError("predict_proba / classes_ を持つ分類モデルではありません")
+    import pandas as pd
+    names = [str(n) for n in getattr(model, "feature_names_in_", DEFAULT_FEATURES)]
+    proba = model.predict_proba(pd.DataFrame([[0.0] * len(names)], columns=names))
+    if tuple(proba.shape) != (1, len(classes)):
+        raise ValueError(f"predict_proba の形が不正です: {proba.shape}")
+
+
+class ModelStore:
+    """
+    学習済みモデル（joblib 形式の model.pkl）を常駐させる。
+    joblib / sklearn は重いので、最初に読み込むときまで import しない。
+
+        store = ModelStore("model.pkl")
+        store.load_async()      # 起動時にバックグラウンドで読み込み開始
+        model = store.get()     # 読み込み中なら終わるまで待つ。無ければ None
+        store.refresh()         # ファイルが変わっていれば読み込み・検証してから差し替える
+        store.rollback()        # 1つ前のモデルに戻す
+
+    差し替えは属性1つの代入なので、予測中のリクエストは読み込み済みのモデルを使い続ける。
+    """
+
+    def __init__(self, path, validate=validate_model):
+        self.path = path
+        self.validate = validate
+        self.model = None
+        self.version = None    # 読み込んだファイルの (mtime_ns, size)
+        self.previous = None   # rollback 用 (モデル, 版)
+        self.rejected = None   # 検証に落ちた・戻した版（同じファイルは読み直さない）
+        self.load_seconds = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        """ファイルが変わっていれば読み込み・検証して差し替える。差し替えたら True"""
+        with self._lock:
+            version = file_key([self.path])[0]
+            if version is None:
+                if self.model is None:
+                    self.error = f"{self.path} が見つかりません"
+                return False
+            if version in (self.version, self.rejected):
+                return False
+            start = time.perf_counter()
+            try:
+                import joblib
+                model = joblib.load(self.path)
+                self.validate(model)
+            except Exception as e:
+                self.rejected = version
+                self.error = f"{self.path} を使えません: {e}"
+                print(f"[WARN] {self.error}" + ("（今のモデルを使い続けます）" if self.model is not None else ""))
+                return False
+            if self.model is not None:
+                self.previous = (self.model, self.version)
+                self.reloads += 1
+            self.model, self.version = model, version
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.error = None
+            return True
+
+    def load(self):
+        self.refresh()
+        return self.model
+
+    def load_async(self):
+        """別スレッドで load() を始める（起動を待たせない）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.load, name="model-load", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def get(self):
+        if self._thread is not None:
+            self._thread.join()
+        return self.model if self.model is not None else self.load()
+
+    def rollback(self):
+        """1つ前のモデルに戻す。戻したら True"""
+        with self._lock:
+            if self.previous is None:
+                return False
+            self.rejected = self.version
+            (self.model, self.version), self.previous = self.previous, (self.model, self.version)
+            return True
+
+    def info(self):
+        return {
+            "path": self.path,
+            "loaded": self.model is not None,
+            "type": type(self.model).__name__ if self.model is not None else None,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "can_rollback": self.previous is not None,
+            "error": self.error,
+        }
@@ -0,0 +1,165 @@
+from lxml import etree
+
+# BeautifulSoup の select(".table1") と同じ「class に table1 を含む要素」
+TABLE1 = "//*[contains(concat(' ', normalize-space(@class), ' '), ' table1 ')]"
+
+_parser = etree.HTMLParser(encoding="utf-8")
+_tables = etree.XPath(TABLE1)
+_rows = etree.XPath(".//tbody//tr")
+_cells = etree.XPath(".//td")
+_row_cells = etree.XPath(".//tbody//tr//td")
+
+
+def parse_html(html):
+    """HTML文字列（またはbytes）を lxml のツリーにする"""
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    return etree.fromstring(html, _parser)
+
+
+def text(el):
+    """BeautifulSoup の get_text(strip=True) 相当"""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def parse_racelist(html):
+    """出走表ページ → [{"race_no", "boats": [...]}]"""
+    root = parse_html(html)
+    races = []
+    if root is None:
+        return races
+    for race_no, table in enumerate(_tables(root), 1):
+        boats = []
+        for row in _rows(table):
+            cols = _cells(row)
+            if len(cols) < 11:
+                continue
+            boats.append({
+                "lane": len(boats) + 1,
+                "racer_name": text(cols[3]),
+                "racer_class": text(cols[4]),
+                "racer_start_timing": text(cols[5]),
+                "racer_flying_count": text(cols[6]),
+                "racer_national_win_rate": text(cols[7]),
+                "racer_local_win_rate": text(cols[8]),
+                "racer_motor_win_rate": text(cols[9]),
+                "racer_course_win_rate": text(cols[10]),
+            })
+        races.append({"race_no": race_no, "boats": boats})
+    return races
+
+
+def parse_raceresult(html):
+    """結果ページ → [{"race_no", "1着", "2着", "3着", "決まり手"}]"""
+    root = parse_html(html)
+    results = []
+    if root is None:
+        return results
+    for race_no, table in enumerate(_tables(root), 1):
+        tds = _row_cells(table)
+        if not tds:
+            continue
+        results.append({
+            "race_no": race_no,
+            "1着": text(tds[0]),
+            "2着": text(tds[1]) if len(tds) > 1 else "",
+            "3着": text(tds[2]) if len(tds) > 2 else "",
+            "決まり手": text(tds[-1]),
+        })
+    return results
+
+
+# ---- 結果一覧（raceresultall）ページ ---------------------------------
+_ZEN = str.maketrans("０１２３４５６７８９", "0123456789")
+_place_tables = etree.XPath("//table[thead[contains(., '着') and contains(., 'ボートレーサー')]]")
+_kimarite_cells = etree.XPath("//table[thead[contains(., '決まり手')]]/tbody//td")
+_st_tables = etree.XPath("//table[thead[contains(., 'スタート情報')]]")
+_st_boats = etree.XPath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' table1_boatImage1 ')]")
+_weather_blocks = etree.XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' weather1 ')]")
+
+
+def _by_class(el, name):
+    found = el.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+    return found[0] if found else None
+
+
+def _to_int(s):
+    s = s.translate(_ZEN)
+    return int(s) if s.isdigit() else None
+
+
+def _to_float(s):
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _parse_weather(block):
+    def unit(kind, part):
+        unit_el = _by_class(block, f"is-{kind}")
+        el = _by_class(unit_el, part) if unit_el is not None else None
+        return text(el) if el is not None else ""
+    return {
+        "weather": unit("weather", "weather1_bodyUnitLabelTitle"),
+        "wind": unit("wind", "weather1_bodyUnitLabelData"),
+        "wave": unit("wave", "weather1_bodyUnitLabelData"),
+        "temperature": unit("direction", "weather1_bodyUnitLabelData"),
+    }
+
+
+def parse_raceresult_all(html):
+    """
+    結果ページ → レースごとの構造化結果
+    [{"race_no", "kimarite", "weather": {...}, "boats": [{"place", "boat", "racer_number",
+      "racer_name", "race_time", "st"}]}]
+    着順表・決まり手・ST・気象はページ内の出現順でレースに対応づける。
+    """
+    root = parse_html(html)
+    if root is None:
+        return []
+    kimarite = [text(td) for td in _kimarite_cells(root)]
+    weathers = [_parse_weather(b) for b in _weather_blocks(root)]
+
+    # スタート情報: 艇ごとに「艇番」「.08 逃げ」のような表示（Fは負値にする）
+    st_groups = []
+    for table in _st_tables(root):
+        group = {}
+        for item in _st_boats(table):
+            number = _by_class(item, "table1_boatImage1Number")
+            timing = _by_class(item, "table1_boatImage1TimeInner")
+            if number is None or timing is None:
+                continue
+            boat = _to_int(text(number))
+            st = timing.xpath("string(.)").split()
+            if boat is not None and st:
+                group[boat] = _to_float(st[0].replace("F", "-"))
+        st_groups.append(group)
+
+    races = []
+    for i, table in enumerate(_place_tables(root)):
+        st = st_groups[i] if i < len(st_groups) else {}
+        boats = []
+        for row in table.xpath("./tbody/tr"):
+            cols = row.xpath("./td")
+            if len(cols) < 3:
+                continue
+            boat = _to_int(text(cols[1]))
+            spans = [text(s) for s in cols[2].xpath(".//span")]
+            racer_number = next((s for s in spans if s.isdigit()), "")
+            racer_name = next((s for s in spans if s and not s.isdigit()), text(cols[2]))
+            boats.append({
+                "place": _to_int(text(cols[0])),
+                "boat": boat,
+                "racer_number": racer_number,
+                "racer_name": racer_name.replace("　", " "),
+                "race_time": text(cols[3]) if len(cols) > 3 else "",
+                "st": st.get(boat),
+            })
+        races.append({
+            "race_no": i + 1,
+            "kimarite": kimarite[i] if i < len(kimarite) else "",
+            "weather": weathers[i] if i < len(weathers) else {},
+            "boats": boats,
+        })
+    return races
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Request
+from pydantic import BaseModel
+
+from modules.inference import LatencyStats, MicroBatcher, ModelUnavailable, Predictor
+from modules.response_cache import respond_json
+
+
+class RaceIn(BaseModel):
+    date: Optional[str] = None
+    venue: Optional[str] = None
+    race_no: Optional[int] = None
+    boats: List[Dict[str, Any]]
+
+
+class BatchIn(BaseModel):
+    # races を渡すか、date + venue で data.json の1場1日分を指定する
+    races: Optional[List[RaceIn]] = None
+    date: Optional[str] = None
+    venue: Optional[str] = None
+
+
+def _race_key(race):
+    return {"date": race.get("date"), "venue": race.get("venue"), "race_no": race.get("race_no")}
+
+
+def predict_router(store, index=None):
+    """
+    常駐モデルで予測する /predict と /predict/batch、所要時間の /predict/metrics。
+    store は ModelStore、index は date + venue 指定用の RaceIndex（FileValue）。
+    """
+    router = APIRouter()
+    predictor = Predictor(store)
+    batcher = MicroBatcher(predictor)
+    stats = {"predict": LatencyStats(), "batch": LatencyStats()}
+
+    @router.post("/predict")
+    async def predict(race: RaceIn, request: Request):
+        """1レース分の艇を受け取り、1着確率の高い順に返す"""
+        start = time.perf_counter()
+        data = race.model_dump()
+        try:
+            ranking = await batcher.submit(data)
+        except ModelUnavailable as e:
+            return respond_json(request, {"error": str(e)}, status=503)
+        elapsed = time.perf_counter() - start
+        stats["predict"].record(elapsed, 1, len(race.boats))
+        return respond_json(request, {"race": _race_key(data), "ranking": ranking,
+                                      "latency_ms": round(elapsed * 1000, 2)})
+
+    @router.post("/predict/batch")
+    async def predict_batch(body: BatchIn, request: Request):
+        """複数レース（1場1日分など）の全艇を1回の predict_proba でまとめて予測する"""
+        start = time.perf_counter()
+        if body.races is not None:
+            races = [race.model_dump() for race in body.races]
+        elif body.date and body.venue and index is not None:
+            races = [r for r in index.get().query(date=body.date, venue=body.venue)
+                     if isinstance(r.get("boats"), list)]
+            if not races:
+                return respond_json(request, {"error": "該当する出走表がありません"}, status=404)
+        else:
+            return respond_json(request, {"error": "races か date + venue を指定してください"}, status=422)
+        try:
+            rankings = await asyncio.to_thread(predictor.predict_races, races)
+        except ModelUnavailable as e:
+            return respond_json(request, {"error": str(e)}, status=503)
+        elapsed = time.perf_counter() - start
+        stats["batch"].record(elapsed, len(races), sum(len(r.get("boats") or []) for r in races))
+        return respond_json(request, {
+            "races": [{"race": _race_key(r), "ranking": ranking} for r, ranking in zip(races, rankings)],
+            "latency_ms": round(elapsed * 1000, 2),
+        })
+
+    @router.get("/predict/metrics")
+    async def predict_metrics(request: Request):
+        """エンドポイントごとの所要時間と、predict_proba 1回あたりのまとめ具合"""
+        return respond_json(request, {
+            "predict": stats["predict"].summary(),
+            "batch": stats["batch"].summary(),
+            "model_calls": predictor.calls.summary(),
+            "model": store.info(),
+        })
+
+    return router
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+
+from modules import compression, serializer
+from modules.delta_log import DeltaLog
+from modules.race_index import (DEFAULT_LIMIT, MAX_LIMIT, RaceIndex, load_prediction, page, race_id,
+                                venue_meta, venue_predictions)
+from modules.response_cache import FileValue, respond_entry, respond_json
+
+
+def race_router(data_file):
+    """
+    data_file から作った索引で /races と /venues を返すルーター。
+    索引はファイルが更新されたときだけ作り直す。
+    """
+    router = APIRouter()
+    index = FileValue([data_file], lambda: RaceIndex.from_data(serializer.load(data_file, default=[])))
+    router.index = index  # 起動時の事前読み込み用
+
+    @router.get("/races")
+    async def get_races(
+        request: Request,
+        date: Optional[str] = Query(None, description="YYYYMMDD または YYYY-MM-DD"),
+        venue: Optional[str] = Query(None, description="場名（桐生）または場コード（01）"),
+        race_no: Optional[int] = Query(None, ge=1),
+        fields: Optional[str] = Query(None, description="返す列（カンマ区切り。例: boats,mark）"),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    ):
+        """条件に合うレースだけをページ単位で返す"""
+        races = index.get().query(date=date, venue=venue, race_no=race_no)
+        return respond_json(request, page(races, offset, limit, fields))
+
+    @router.get("/venues")
+    async def get_venues(request: Request):
+        """場ごとの開催日とレース数"""
+        return respond_json(request, {"venues": index.get().venues()})
+
+    return router
+
+
+def race_snapshot(data_file, prediction_file=None):
+    """
+    差分の単位にするスナップショット
+    {"venues": {場コード: 付帯情報}, "races": {レースID: レース}, "predictions": {場コード: 予想}}
+    """
+    data = serializer.load(data_file, default=[])
+    races = RaceIndex.from_data(data).races
+    snapshot = {"venues": venue_meta(data), "races": {race_id(race): race for race in races}}
+    if prediction_file:
+        snapshot["predictions"] = venue_predictions(load_prediction(prediction_file))
+    return snapshot
+
+
+class _Snapshot(dict):
+    """FileValue が version を付けられる dict"""
+
+
+def delta_router(data_file, prediction_file=None):
+    """
+    /data/delta?since=<版>: since の版からレース・予想の変わった分だけを返す。
+    since を省略するか古すぎる版を渡すと全体を返すので、クライアントは
+    返ってきた version を次の since に使えばよい。
+    """
+    router = APIRouter()
+    paths = [data_file] + ([prediction_file] if prediction_file else [])
+    log = DeltaLog(FileValue(paths, lambda: _Snapshot(race_snapshot(data_file, prediction_file))))
+    router.log = log  # 起動時の事前読み込み用
+
+    @router.get("/data/delta")
+    async def get_delta(request: Request, since: Optional[str] = Query(None, description="前回の version")):
+        entry = log.cached(since)
+        if entry is None:
+            # 古い版からの差分は作るのに時間がかかるので、圧縮まで含めてスレッドで
+            encoding = compression.negotiate(request.headers.get("accept-encoding"))
+            entry = await asyncio.to_thread(log.delta, since, encoding)
+        return respond_entry(entry, request)
+
+    return router
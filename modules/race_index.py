@@ -0,0 +1,218 @@
+import os
+import re
+
+from modules import serializer
+from modules.venues import VENUE_CODES
+
+VENUE_NAMES = {code: name for name, code in VENUE_CODES.items()}
+KEY_FIELDS = ("date", "venue_code", "venue", "race_no")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+def venue_code(value):
+    """"桐生" / "01" / "1" / 1 → "01"（分からなければ None）"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value in VENUE_CODES:
+        return VENUE_CODES[value]
+    if value.isdigit():
+        return f"{int(value):02d}"
+    return None
+
+
+def _date(value):
+    return str(value or "").replace("-", "")[:8]
+
+
+def _race_no(value):
+    """1 / "3" / "3R" → 3（分からなければ None）"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value > 0 else None
+    digits = str(value or "").strip().upper().removesuffix("R")
+    return int(digits) if digits.isdigit() and int(digits) > 0 else None
+
+
+def _race(date, code, race_no, fields):
+    """1レース分。レース番号が分からないものは None（キーを作れないので索引に入れない）"""
+    race_no = _race_no(race_no)
+    if race_no is None:
+        return None
+    code = venue_code(code)
+    race = {"date": _date(date), "venue_code": code, "venue": VENUE_NAMES.get(code, code),
+            "race_no": race_no}
+    race.update(fields)
+    return race
+
+
+def normalize(data):
+    """
+    data.json のどの形でも [{"date", "venue_code", "venue", "race_no", ...}] にそろえる。
+      - merge_data.py / Open API: [{"race_date", "race_stadium_number", "race_number", "boats"}]
+      - fetch_data_playwright.py: [{"venue", "code", "date", "races": [行...]}]
+      - fetch_data.py:            {場名: {"date", "status", "races": {rno: [選手...]}}}
+      - fetch_entry.py:           {場名: {"date", "races": [{"race_no", "boats"}]}}
+    レース番号が無い・読めないレースは入れない（Playwright版の一覧行も行の位置からは番号を作らない）。
+    """
+    found = []
+    if isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            if "race_stadium_number" in item:
+                fields = {k: v for k, v in item.items()
+                          if k not in ("race_date", "race_stadium_number", "race_number")}
+                found.append(_race(item.get("race_date"), item["race_stadium_number"],
+                                   item.get("race_number"), fields))
+            elif "races" in item:
+                code = item.get("code") or item.get("venue")
+                for row in item["races"]:
+                    if isinstance(row, dict):
+                        fields = {k: v for k, v in row.items() if k != "race_no"}
+                        found.append(_race(item.get("date"), code, row.get("race_no"), fields))
+                    else:
+                        found.append(None)
+    elif isinstance(data, dict):
+        for name, info in data.items():
+            if not isinstance(info, dict):
+                continue
+            entries = info.get("races") or []
+            if isinstance(entries, dict):
+                for rno, boats in entries.items():
+                    found.append(_race(info.get("date"), name, rno,
+                                       {"status": info.get("status"), "boats": boats}))
+            else:
+                for race in entries:
+                    if not isinstance(race, dict):
+                        found.append(None)
+                        continue
+                    fields = {k: v for k, v in race.items() if k != "race_no"}
+                    found.append(_race(info.get("date"), name, race.get("race_no"), fields))
+    races = [r for r in found if r is not None]
+    if len(races) < len(found):
+        print(f"[WARN] レース番号の無いレース {len(found) - len(races)}件 を除外しました")
+    races.sort(key=lambda r: (r["date"], r["venue_code"] or "", r["race_no"]))
+    return races
+
+
+def race_id(race):
+    """レースを一意に表す文字列（"20250101-01-3"）"""
+    return f"{race['date']}-{race['venue_code']}-{race['race_no']}"
+
+
+def load_prediction(path):
+    """prediction.json（手書きの // コメント行が入っていることがある）。無ければ None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        return serializer.loads(raw)
+    except ValueError:
+        text = re.sub(r"(?m)^\s*//.*$", "", raw.decode("utf-8"))
+        try:
+            return serializer.loads(text.encode("utf-8"))
+        except ValueError as e:
+            print(f"[WARN] {path} を読めませんでした: {e}")
+            return None
+
+
+def venue_predictions(prediction):
+    """prediction.json の {"venues": {場名: 予想}} を {場コード: 予想} にする"""
+    if isinstance(prediction, dict) and isinstance(prediction.get("venues"), dict):
+        return {venue_code(k): v for k, v in prediction["venues"].items()}
+    return {}
+
+
+def venue_meta(data):
+    """場単位の付帯情報（的中率・開催状況など）"""
+    meta = {}
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict) and "races" in item and "race_stadium_number" not in item:
+                code = venue_code(item.get("code") or item.get("venue"))
+                meta[code] = {k: v for k, v in item.items() if k not in ("races", "code", "venue", "date")}
+    elif isinstance(data, dict):
+        for name, info in data.items():
+            if isinstance(info, dict):
+                meta[venue_code(name)] = {k: v for k, v in info.items() if k not in ("races", "date")}
+    return meta
+
+
+class RaceIndex:
+    """
+    レース一覧と、日付・場・(日付, 場, R) ごとの位置の索引。
+    データファイルのバージョンごとに1回だけ作る（FileValue で保持）。
+    """
+
+    def __init__(self, races):
+        self.races = races
+        self.by_date = {}
+        self.by_venue = {}
+        self.by_key = {}
+        for i, race in enumerate(races):
+            self.by_date.setdefault(race["date"], []).append(i)
+            self.by_venue.setdefault(race["venue_code"], []).append(i)
+            self.by_key[(race["date"], race["venue_code"], race["race_no"])] = i
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(normalize(data))
+
+    def query(self, date=None, venue=None, race_no=None):
+        """条件に合うレースを並び順のまま返す（venue は場名でも場コードでもよい）"""
+        date = _date(date) if date else None
+        code = venue_code(venue) if venue is not None else None
+        if venue is not None and code is None:
+            return []
+        if date and code and race_no is not None:
+            i = self.by_key.get((date, code, int(race_no)))
+            return [] if i is None else [self.races[i]]
+        # 一番絞り込める索引から始めて残りの条件で絞る
+        candidates = []
+        if date:
+            candidates.append(self.by_date.get(date, []))
+        if code:
+            candidates.append(self.by_venue.get(code, []))
+        positions = min(candidates, key=len) if candidates else range(len(self.races))
+        found = []
+        for i in positions:
+            race = self.races[i]
+            if ((date and race["date"] != date) or (code and race["venue_code"] != code)
+                    or (race_no is not None and race["race_no"] != int(race_no))):
+                continue
+            found.append(race)
+        return found
+
+    def venues(self):
+        summary = []
+        for code, positions in sorted(self.by_venue.items(), key=lambda kv: kv[0] or ""):
+            dates = sorted({self.races[i]["date"] for i in positions})
+            summary.append({"venue_code": code, "venue": VENUE_NAMES.get(code, code),
+                            "dates": dates, "races": len(positions)})
+        return summary
+
+
+def select_fields(race, fields):
+    """fields（カンマ区切り）の列だけにする。識別用の列は常に残す"""
+    if not fields:
+        return race
+    wanted = set(KEY_FIELDS) | {f.strip() for f in fields.split(",") if f.strip()}
+    return {k: v for k, v in race.items() if k in wanted}
+
+
+def page(races, offset=0, limit=DEFAULT_LIMIT, fields=None):
+    """ページ分けしたレスポンス本体"""
+    offset = max(int(offset), 0)
+    limit = min(max(int(limit), 1), MAX_LIMIT)
+    items = races[offset:offset + limit]
+    body = {
+        "total": len(races),
+        "offset": offset,
+        "limit": limit,
+        "races": [select_fields(r, fields) for r in items],
+    }
+    if offset + limit < len(races):
+        body["next_offset"] = offset + limit
+    return body
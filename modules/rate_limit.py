@@ -0,0 +1,104 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+# ホストごとの既定レート（リクエスト/秒）
+INITIAL_RATE = 4.0
+MIN_RATE = 0.5
+MAX_RATE = 10.0
+BURST = 4
+
+# 適応制御
+INCREASE_STEP = 0.2      # 成功1回ごとの加算（AIMDの加算側）
+BACKOFF_FACTOR = 0.5     # 429/5xx 時の乗算減
+SLOW_FACTOR = 0.8        # 応答遅延が増えたときの乗算減
+LATENCY_RATIO = 2.0      # 平均応答時間のこの倍を超えたら「遅延増加」とみなす
+EWMA_ALPHA = 0.2
+
+
+class AdaptiveTokenBucket:
+    """
+    バースト付きトークンバケット。
+    429/5xx で速度を半減、応答時間が平均より大きく伸びたら減速し、
+    順調な間は少しずつ上限まで速度を戻す（AIMD）。
+    複数スレッドから共有して使う。
+    """
+
+    def __init__(self, rate=INITIAL_RATE, burst=BURST, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = float(burst)
+        self.latency = None
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """トークンが得られるまで待つ。待った秒数を返す"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def feedback(self, status, elapsed, retry_after=None):
+        """
+        応答ステータスと所要時間から速度を調整する（1リクエストにつき1回呼ぶ）。
+        retry_after（秒）があれば、その間は誰もトークンを得られないようにする。
+        """
+        with self._lock:
+            if status == 429 or status >= 500:
+                self._refill(time.monotonic())
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                self.tokens = min(self.tokens, -(retry_after or 0.0) * self.rate)
+                self.throttled += 1
+                return
+            if self.latency is not None and elapsed > self.latency * LATENCY_RATIO:
+                self.rate = max(self.min_rate, self.rate * SLOW_FACTOR)
+            else:
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency = (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * elapsed
+
+
+_lock = threading.Lock()
+_buckets = {}
+
+
+def bucket_for(url):
+    """ホスト単位の共有バケットを返す"""
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _buckets:
+            _buckets[host] = AdaptiveTokenBucket()
+        return _buckets[host]
+
+
+def acquire(url):
+    return bucket_for(url).acquire()
+
+
+def feedback(url, status, elapsed, retry_after=None):
+    bucket_for(url).feedback(status, elapsed, retry_after)
+
+
+def stats():
+    with _lock:
+        return {
+            host: {"rate": round(b.rate, 2), "throttled": b.throttled}
+            for host, b in _buckets.items()
+        }
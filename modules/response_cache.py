@@ -0,0 +1,206 @@
+import hashlib
+import os
+import threading
+import time
+
+from starlette.responses import Response
+
+from modules import compression, serializer
+
+CHECK_INTERVAL = 1.0  # ファイルの更新確認は最短この間隔（秒）
+
+
+def file_key(paths):
+    """各ファイルの (mtime_ns, size)。無いファイルは None"""
+    key = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            key.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match（カンマ区切り・W/ 付き・*）に etag が含まれるか"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class Cached:
+    """シリアライズ済みのレスポンス本体（圧縮版は最初に要求されたときに1度だけ作る）"""
+
+    def __init__(self, status, body, version, fast=False):
+        self.status = status
+        self.body = body
+        self.etag = make_etag(body)
+        self.version = version
+        self.fast = fast  # リクエストごとに作る本体は圧縮率より速さを優先
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        """(本体, ETag)。符号化ごとに別の ETag にする"""
+        if encoding is None or len(self.body) < compression.MIN_SIZE:
+            return self.body, self.etag
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compression.compress(self.body, encoding, fast=self.fast)
+        return self._encoded[encoding], f'{self.etag[:-1]}-{encoding}"'
+
+
+class FileCache:
+    """
+    ファイルから作るレスポンスを、そのファイル群の mtime が変わるまで使い回す。
+
+        cache = FileCache([DATA_FILE, ...], build)   # build() -> (status, payload)
+        entry = cache.get()                           # entry.body / entry.etag
+
+    更新確認（stat）は CHECK_INTERVAL ごとにしか行わず、
+    作り直しはロックで1回にまとめる。
+    """
+
+    def __init__(self, paths, build, check_interval=CHECK_INTERVAL):
+        self.paths = list(paths)
+        self.build = build
+        self.check_interval = check_interval
+        self.background = False  # True: 更新確認は HotReloader に任せ、get() はファイルを見ない
+        self._entry = None
+        self._previous = None  # rollback 用の1つ前の版
+        self._rejected = None  # 検証に落ちた・戻した版のキー（同じファイルでは作り直さない）
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self):
+        entry = self._entry
+        if self.background and entry is not None:
+            return entry
+        now = time.monotonic()
+        if entry is not None and now - self._checked < self.check_interval:
+            return entry
+        key = file_key(self.paths)
+        if entry is not None and entry.version == key:
+            self._checked = now
+            return entry
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry.version != key:
+                entry = self._make(key)
+                self._entry = entry
+                self.builds += 1
+            self._checked = time.monotonic()
+            return entry
+
+    def _make(self, key):
+        status, payload = self.build()
+        return Cached(status, serializer.dumps(payload), key)
+
+    def valid(self, entry):
+        """差し替えてよい版か（読み込みに失敗した版で正常な版を上書きしない）"""
+        return entry.status == 200
+
+    def refresh(self):
+        """
+        ファイルが変わっていれば作り直し、検証に通ったら差し替える（リクエストとは別のスレッドから呼ぶ）。
+        今の版は rollback 用に残す。差し替えたら True。
+        """
+        key = file_key(self.paths)
+        with self._lock:
+            entry = self._entry
+            if entry is not None and (entry.version == key or key == self._rejected):
+                return False
+            try:
+                new = self._make(key)
+            except Exception as e:
+                new, error = None, e
+            else:
+                error = None if entry is None or self.valid(new) else "検証に失敗"
+            if error is not None:
+                self._rejected = key
+                print(f"[WARN] {', '.join(self.paths)} の新しい版を使いません（{error}）。今の版を使い続けます")
+                return False
+            self._warm(new)
+            self._previous, self._entry = entry, new
+            self._checked = time.monotonic()
+            self.builds += 1
+            return True
+
+    def _warm(self, entry):
+        """差し替える前に圧縮版も作っておく（最初のリクエストで圧縮しないように）"""
+        for encoding in compression.ENCODINGS:
+            entry.encoded(encoding)
+
+    def rollback(self):
+        """1つ前の版に戻す。今の版のファイルのままなら再び読み込まない。戻したら True"""
+        with self._lock:
+            if self._previous is None:
+                return False
+            self._rejected = self._entry.version
+            self._entry, self._previous = self._previous, self._entry
+            return True
+
+    def info(self):
+        entry = self._entry
+        return {"paths": self.paths, "builds": self.builds,
+                "version": getattr(entry, "version", None),
+                "can_rollback": self._previous is not None}
+
+    def invalidate(self):
+        self._entry = None
+
+
+class FileValue(FileCache):
+    """
+    FileCache と同じ更新判定で、build() の戻り値（索引など）をそのまま保持する。
+    戻り値には version 属性を付ける。
+    """
+
+    def _make(self, key):
+        value = self.build()
+        value.version = key
+        return value
+
+    def valid(self, value):
+        return True  # 作れなかったときは build() が例外を出す
+
+    def _warm(self, value):
+        pass
+
+
+def respond(cache, request, media_type="application/json"):
+    """
+    cache の内容を返す。Accept-Encoding に応じて br / gzip 版を選び、
+    If-None-Match が一致すれば本体なしの 304 にする。
+    """
+    return _respond(cache.get(), request, media_type)
+
+
+def respond_entry(entry, request, media_type="application/json"):
+    """作成済みの Cached を respond と同じ規則で返す"""
+    return _respond(entry, request, media_type)
+
+
+def respond_json(request, payload, status=200):
+    """その場で作る payload を respond と同じ規則（圧縮・ETag・304）で返す"""
+    entry = Cached(status, serializer.dumps(payload), None, fast=True)
+    return _respond(entry, request, "application/json")
+
+
+def _respond(entry, request, media_type):
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    body, etag = entry.encoded(encoding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if body is not entry.body:
+        headers["Content-Encoding"] = encoding
+    if entry.status == 200 and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, status_code=entry.status, media_type=media_type, headers=headers)
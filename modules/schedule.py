@@ -0,0 +1,80 @@
+import threading
+
+from bs4 import BeautifulSoup
+
+from modules import http_client
+
+INDEX_URL = "https://www.boatrace.jp/owpc/pc/race/index"
+MAX_RACES = 12  # 開催場は12Rまで取りに行き、存在しないレース（404）で止める
+
+_lock = threading.Lock()
+_schedules = {}   # 日付 → {場コード: レース数}。取得失敗は None を入れて同じ日を取り直さない
+_fetching = {}    # 日付 → その日の一覧を取りに行っている間のロック
+
+
+def parse_index(html):
+    """
+    開催一覧ページから {場コード: レース数} を取り出す。
+    一覧の「9R」などは発売中・締切のレースで開催レース数ではないので、
+    レース数は MAX_RACES とし、実際の最終レースは取得側が 404 で判断する。
+    """
+    soup = BeautifulSoup(html, "lxml")
+    schedule = {}
+    if not soup.select(".table1"):
+        print("[WARN] 開催一覧ページに .table1 がありません（開催なし、またはページ構造の変更）")
+    for row in soup.select(".table1 tbody tr"):
+        for a in row.select("a"):
+            href = a.get("href", "")
+            if "jcd=" in href:
+                schedule[href.split("jcd=")[1][:2]] = MAX_RACES
+                break
+    return schedule
+
+
+def get_day_schedule(date_str):
+    """
+    指定日の開催場と各場のレース数 {場コード: レース数} を返す。
+    開催が無い日は {}、一覧ページを取得できなかった場合は None（呼び出し側は全場を対象にする）。
+    失敗も含めて結果はプロセス内で共有し、1日につき1回しか取りに行かない。
+    ページ自体はディスクキャッシュに載せる。
+    """
+    with _lock:
+        if date_str in _schedules:
+            return _schedules[date_str]
+        fetching = _fetching.setdefault(date_str, threading.Lock())
+    with fetching:
+        with _lock:
+            if date_str in _schedules:
+                return _schedules[date_str]
+        try:
+            res = http_client.get(f"{INDEX_URL}?hd={date_str}", cache=True)
+            res.raise_for_status()
+            schedule = parse_index(res.text)
+        except Exception as e:
+            print(f"[WARN] 開催場一覧の取得に失敗（{date_str} は全場を対象にします）: {e}")
+            schedule = None
+        with _lock:
+            _schedules[date_str] = schedule
+            _fetching.pop(date_str, None)
+    return schedule
+
+
+def open_venues(date_str):
+    """開催場コードの一覧（昇順）。不明な場合は None"""
+    schedule = get_day_schedule(date_str)
+    if schedule is None:
+        return None
+    return sorted(schedule)
+
+
+def is_open(date_str, jcd):
+    """開催一覧が取れなかった日は開催扱いにする"""
+    schedule = get_day_schedule(date_str)
+    return schedule is None or jcd in schedule
+
+
+def race_count(date_str, jcd):
+    schedule = get_day_schedule(date_str)
+    if schedule is None:
+        return MAX_RACES
+    return schedule.get(jcd, 0)
@@ -1,7 +1,6 @@
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
-import time
+from modules import http_client, schedule
 
 VENUES = [
     "桐生","戸田","江戸川","平和島","多摩川","浜名湖","蒲郡","常滑",
@@ -12,10 +11,14 @@ VENUES = [
 def get_race_data(date_str):
     """指定日の全24場データを取得"""
     results = {}
-    for venue in VENUES:
+    hd = date_str.replace('-', '')
+    for idx, venue in enumerate(VENUES, start=1):
+        if not schedule.is_open(hd, f"{idx:02d}"):
+            results[venue] = {"status": "ー", "hit_rate": 0, "races": {}}
+            continue
         try:
             url = f"https://www.boatrace.jp/owpc/pc/race/racelist?rno=1&jcd=01&hd={date_str.replace('-','')}"
-            res = requests.get(url, timeout=10)
+            res = http_client.get(url)
             if res.status_code != 200:
                 results[venue] = {"status": "ー", "hit_rate": 0, "races": {}}
                 continue
@@ -44,7 +47,6 @@ def get_race_data(date_str):
                     } for i in range(1, 7)
                 ]
             results[venue] = {"status": "開催中", "hit_rate": 0, "races": races}
-            time.sleep(0.5)
 
         except Exception:
             results[venue] = {"status": "ー", "hit_rate": 0, "races": {}}
@@ -0,0 +1,163 @@
+import gzip
+import json
+import os
+import tempfile
+
+# 形式: 名前 → (dumps(data, indent) -> bytes, loads(bytes) -> data)
+FORMATS = {}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# JSON の先頭になりうるバイト（それ以外は MessagePack とみなす）
+_JSON_START = frozenset(b'{["-0123456789tfn \t\r\n\xef')
+
+
+def register(name, dumps, loads):
+    """形式を追加する（同名は上書き）"""
+    FORMATS[name] = (dumps, loads)
+
+
+# ---- JSON（orjson があれば使う） ------------------------------------
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(data, indent=False):
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(raw):
+    if raw.startswith(b"\xef\xbb\xbf"):
+        raw = raw[3:]
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+register("json", _json_dumps, _json_loads)
+
+
+# ---- MessagePack（任意） --------------------------------------------
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if msgpack is not None:
+    register("msgpack",
+             lambda data, indent=False: msgpack.packb(data, use_bin_type=True),
+             lambda raw: msgpack.unpackb(raw, raw=False, strict_map_key=False))
+
+
+# ---- 圧縮 -----------------------------------------------------------
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(raw, method):
+    if method is None:
+        return raw
+    if method == "gzip":
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if method == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("zstd 圧縮には zstandard が必要です（pip install zstandard）")
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    raise ValueError(f"未対応の圧縮方式: {method}")
+
+
+def decompress(raw):
+    """先頭のマジックバイトで gzip / zstd を見分けて展開する"""
+    if raw.startswith(GZIP_MAGIC):
+        return gzip.decompress(raw)
+    if raw.startswith(ZSTD_MAGIC):
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("zstd 圧縮のファイルを読むには zstandard が必要です")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return raw
+
+
+# ---- 変換 -----------------------------------------------------------
+def detect(raw):
+    """展開済みのバイト列が "json" か "msgpack" かを返す"""
+    return "json" if not raw or raw[0] in _JSON_START else "msgpack"
+
+
+def dumps(data, fmt="json", compression=None, indent=False):
+    if fmt not in FORMATS:
+        raise ValueError(f"未対応の形式: {fmt}（登録済み: {', '.join(FORMATS)}）")
+    return compress(FORMATS[fmt][0](data, indent), compression)
+
+
+def loads(raw):
+    """圧縮・形式を自動判別して読み込む"""
+    raw = decompress(raw)
+    fmt = detect(raw)
+    if fmt not in FORMATS:
+        raise RuntimeError(f"{fmt} 形式のデータを読むには {fmt} パッケージが必要です")
+    return FORMATS[fmt][1](raw)
+
+
+def options_for(path):
+    """拡張子から (形式, 圧縮) を決める: .json / .msgpack に .gz / .zst を付けられる"""
+    base, ext = os.path.splitext(path)
+    compression = {".gz": "gzip", ".zst": "zstd"}.get(ext)
+    if compression:
+        ext = os.path.splitext(base)[1]
+    return ("msgpack" if ext in (".msgpack", ".mpk") else "json"), compression
+
+
+# ---- ファイル -------------------------------------------------------
+def atomic_write(path, content):
+    """同じディレクトリに一時ファイルを書いてから rename する（str / bytes）"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp は 0600 で作るので、配信・共有できる権限に戻す
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save(path, data, fmt=None, compression=None, indent=False):
+    """
+    data を path に保存し、書いたバイト数を返す。
+    fmt / compression を省略すると拡張子から決める（data.json → コンパクトJSON、
+    history.json.gz → gzip JSON、x.msgpack.zst → zstd MessagePack）。
+    """
+    ext_fmt, ext_compression = options_for(path)
+    raw = dumps(data, fmt or ext_fmt, compression or ext_compression, indent)
+    atomic_write(path, raw)
+    return len(raw)
+
+
+def load(path, default=None):
+    """save で書いたファイル（従来の整形JSONも含む）を形式を問わず読む"""
+    if not os.path.exists(path):
+        return default
+    with open(path, "rb") as f:
+        return loads(f.read())
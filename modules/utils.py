@@ -1,19 +1,17 @@
-import json, os
+import os
 from datetime import datetime, timedelta
 
+from modules import serializer
+
 DATA_DIR = "data"
 
 def load_json(filename):
-    path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """JSON / MessagePack、gzip / zstd 圧縮を自動判別して読む"""
+    return serializer.load(os.path.join(DATA_DIR, filename), default={})
 
-def save_json(filename, data):
-    path = os.path.join(DATA_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_json(filename, data, fmt=None, compression=None):
+    """既定はコンパクトJSON。拡張子（.msgpack / .gz / .zst）か引数で形式を変えられる"""
+    return serializer.save(os.path.join(DATA_DIR, filename), data, fmt, compression)
 
 def get_past_dates(days=60):
     today = datetime.today()
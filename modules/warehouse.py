@@ -0,0 +1,383 @@
+import os
+import sqlite3
+import sys
+
+from modules import serializer
+from modules.history_store import HistoryStore
+from modules.venues import VENUE_CODES
+
+DB_FILE = os.path.join("data", "warehouse.sqlite")
+# ingest でパスを省略したときに取り込む、各取得スクリプトの履歴ストア
+DEFAULT_SOURCES = ("history", "history_all", os.path.join("data", "history"),
+                   os.path.join("data", "history_entries"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS races (
+    race_id     INTEGER PRIMARY KEY,
+    race_date   TEXT    NOT NULL,   -- YYYYMMDD
+    stadium     TEXT    NOT NULL,   -- 場コード '01'〜'24'
+    race_number INTEGER NOT NULL,
+    kimarite    TEXT,
+    source      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_races_key ON races (race_date, stadium, race_number);
+
+CREATE TABLE IF NOT EXISTS boats (
+    race_id           INTEGER NOT NULL REFERENCES races (race_id) ON DELETE CASCADE,
+    boat_number       INTEGER NOT NULL,
+    racer_number      TEXT,
+    racer_name        TEXT,
+    racer_class       TEXT,
+    start_timing      REAL,   -- 平均ST
+    flying_count      TEXT,
+    national_win_rate REAL,
+    local_win_rate    REAL,
+    motor_win_rate    REAL,
+    course_win_rate   REAL,
+    PRIMARY KEY (race_id, boat_number)
+);
+CREATE INDEX IF NOT EXISTS idx_boats_racer ON boats (racer_number);
+
+CREATE TABLE IF NOT EXISTS results (
+    race_id     INTEGER NOT NULL REFERENCES races (race_id) ON DELETE CASCADE,
+    boat_number INTEGER NOT NULL,
+    place       INTEGER,
+    course      INTEGER,
+    st          REAL,     -- 本番ST
+    race_time   TEXT,
+    PRIMARY KEY (race_id, boat_number)
+);
+
+CREATE TABLE IF NOT EXISTS weather (
+    race_id           INTEGER PRIMARY KEY REFERENCES races (race_id) ON DELETE CASCADE,
+    weather           TEXT,
+    wind              REAL,
+    wind_direction    INTEGER,
+    wave              REAL,
+    temperature       REAL,
+    water_temperature REAL
+);
+"""
+
+BOAT_COLUMNS = ("racer_number", "racer_name", "racer_class", "start_timing", "flying_count",
+                "national_win_rate", "local_win_rate", "motor_win_rate", "course_win_rate")
+RESULT_COLUMNS = ("place", "course", "st", "race_time")
+WEATHER_COLUMNS = ("weather", "wind", "wind_direction", "wave", "temperature", "water_temperature")
+
+
+def connect(path=DB_FILE):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---- 値の正規化 ------------------------------------------------------
+_ZEN = str.maketrans("０１２３４５６７８９．", "0123456789.")
+
+
+def _num(value):
+    """'6.52' '.15' '3m' '17.0℃' などを数値に（変換できなければ None）"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    s = str(value).translate(_ZEN).strip()
+    digits = ""
+    for ch in s:
+        if ch.isdigit() or ch in ".-" or (ch == "F" and not digits):
+            digits += "-" if ch == "F" else ch
+        elif digits:
+            break
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _int(value):
+    n = _num(value)
+    return int(n) if n is not None else None
+
+
+def _date(value):
+    return str(value).replace("-", "")[:8]
+
+
+def _stadium(value):
+    if value in VENUE_CODES:
+        return VENUE_CODES[value]
+    return f"{int(value):02d}" if str(value).isdigit() else str(value)
+
+
+# ---- 一括投入 --------------------------------------------------------
+class Loader:
+    """1トランザクション内でレース・艇・結果・気象をまとめて upsert する"""
+
+    def __init__(self, conn, source):
+        self.conn = conn
+        self.source = source
+        self.boats = []
+        self.results = []
+        self.weather = []
+        self.races = 0
+
+    def race(self, race_date, stadium, race_number, kimarite=None):
+        row = self.conn.execute(
+            """INSERT INTO races (race_date, stadium, race_number, kimarite, source)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (race_date, stadium, race_number) DO UPDATE SET
+                   kimarite = COALESCE(excluded.kimarite, races.kimarite),
+                   source = excluded.source
+               RETURNING race_id""",
+            (_date(race_date), _stadium(stadium), int(race_number), kimarite or None, self.source),
+        ).fetchone()
+        self.races += 1
+        return row[0]
+
+    def boat(self, race_id, boat_number, **values):
+        if boat_number is not None:
+            self.boats.append((race_id, boat_number) + tuple(values.get(c) for c in BOAT_COLUMNS))
+
+    def result(self, race_id, boat_number, **values):
+        if boat_number is not None:
+            self.results.append((race_id, boat_number) + tuple(values.get(c) for c in RESULT_COLUMNS))
+
+    def race_weather(self, race_id, **values):
+        if any(values.get(c) is not None for c in WEATHER_COLUMNS):
+            self.weather.append((race_id,) + tuple(values.get(c) for c in WEATHER_COLUMNS))
+
+    @staticmethod
+    def _upsert(table, key, columns):
+        cols = key + columns
+        updates = ", ".join(f"{c} = COALESCE(excluded.{c}, {table}.{c})" for c in columns)
+        return (f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+
+    def flush(self):
+        self.conn.executemany(self._upsert("boats", ("race_id", "boat_number"), BOAT_COLUMNS), self.boats)
+        self.conn.executemany(self._upsert("results", ("race_id", "boat_number"), RESULT_COLUMNS), self.results)
+        self.conn.executemany(self._upsert("weather", ("race_id",), WEATHER_COLUMNS), self.weather)
+        counts = {"races": self.races, "boats": len(self.boats),
+                  "results": len(self.results), "weather": len(self.weather)}
+        self.boats, self.results, self.weather, self.races = [], [], [], 0
+        return counts
+
+
+def ingest_playwright(loader, data):
+    """
+    data/data.json（Playwright版）: [{"venue", "code", "date", "races": [{"racer", "mark"}...]}]
+    一覧ページの行でレース番号・艇番を含まないため、レースとしては取り込まない
+    （行の位置からレース番号を作ると、存在しないレースができてしまう）。
+    """
+    rows = sum(len(venue.get("races", [])) for venue in data)
+    print(f"[WARN] {loader.source}: Playwright版の一覧行（{len(data)}場 / {rows}行）は"
+          f"レース番号・艇番が無いため取り込みません")
+
+
+def ingest_race_tables(loader, data):
+    """fetch_data.py: {場名: {"date", "status", "races": {rno: [選手...]}}}"""
+    for venue, info in data.items():
+        for rno, racers in (info.get("races") or {}).items():
+            race_id = loader.race(info["date"], venue, rno)
+            for r in racers:
+                loader.boat(race_id, _int(r.get("艇番")), racer_name=r.get("選手名"),
+                            racer_class=r.get("級"), start_timing=_num(r.get("平均ST")),
+                            flying_count=r.get("F数"), national_win_rate=_num(r.get("全国勝率")),
+                            local_win_rate=_num(r.get("当地勝率")), motor_win_rate=_num(r.get("モーター勝率")),
+                            course_win_rate=_num(r.get("コース勝率")))
+
+
+def ingest_entries(loader, data):
+    """fetch_entry.py: {場名: {"date", "races": [{"race_no", "boats": [...]}]}}"""
+    for venue, info in data.items():
+        for race in info.get("races", []):
+            race_id = loader.race(info["date"], venue, race["race_no"])
+            for b in race.get("boats", []):
+                loader.boat(race_id, b.get("lane"), racer_name=b.get("racer_name"),
+                            racer_class=b.get("racer_class"), start_timing=_num(b.get("racer_start_timing")),
+                            flying_count=b.get("racer_flying_count"),
+                            national_win_rate=_num(b.get("racer_national_win_rate")),
+                            local_win_rate=_num(b.get("racer_local_win_rate")),
+                            motor_win_rate=_num(b.get("racer_motor_win_rate")),
+                            course_win_rate=_num(b.get("racer_course_win_rate")))
+
+
+def ingest_results(loader, date, venues):
+    """fetch_result.py の1日分: {場名: {"date", "results": [{"race_no", "1着".., "決まり手"}]}}"""
+    for venue, info in venues.items():
+        for r in info.get("results", []):
+            race_id = loader.race(info.get("date", date), venue, r["race_no"], r.get("決まり手"))
+            for place, key in enumerate(("1着", "2着", "3着"), 1):
+                loader.result(race_id, _int(r.get(key)), place=place)
+
+
+def ingest_history_record(loader, record):
+    """fetch_history.py の1日分: {"date", "data": [{"jcd", "races": [...]}]}"""
+    for venue in record.get("data", []):
+        for race in venue.get("races", []):
+            race_id = loader.race(venue["date"], venue["jcd"], race["race_no"], race.get("kimarite"))
+            w = race.get("weather") or {}
+            loader.race_weather(race_id, weather=w.get("weather") or None, wind=_num(w.get("wind")),
+                                wave=_num(w.get("wave")), temperature=_num(w.get("temperature")))
+            for b in race.get("boats", []):
+                loader.boat(race_id, b.get("boat"), racer_number=b.get("racer_number") or None,
+                            racer_name=b.get("racer_name"))
+                loader.result(race_id, b.get("boat"), place=b.get("place"), st=b.get("st"),
+                              race_time=b.get("race_time") or None)
+
+
+def ingest_flat_races(loader, races):
+    """merge_data.py / Open API 形式: [{"race_date", "race_stadium_number", "race_number", "boats": [...]}]"""
+    for race in races:
+        race_id = loader.race(race["race_date"], race["race_stadium_number"], race["race_number"],
+                              race.get("race_technique_number") and str(race["race_technique_number"]))
+        loader.race_weather(race_id, weather=race.get("race_weather_number") and str(race["race_weather_number"]),
+                            wind=_num(race.get("race_wind")), wind_direction=_int(race.get("race_wind_direction_number")),
+                            wave=_num(race.get("race_wave")), temperature=_num(race.get("race_temperature")),
+                            water_temperature=_num(race.get("race_water_temperature")))
+        for b in race.get("boats", []):
+            boat = _int(b.get("racer_boat_number"))
+            loader.boat(race_id, boat, racer_number=b.get("racer_number") and str(b["racer_number"]),
+                        racer_name=b.get("racer_name"), racer_class=b.get("racer_class_number") and str(b["racer_class_number"]),
+                        start_timing=_num(b.get("racer_average_start_timing")),
+                        flying_count=b.get("racer_flying_count") and str(b["racer_flying_count"]),
+                        national_win_rate=_num(b.get("racer_national_top_1_percent")),
+                        local_win_rate=_num(b.get("racer_local_top_1_percent")),
+                        motor_win_rate=_num(b.get("racer_assigned_motor_top_2_percent")))
+            loader.result(race_id, boat, place=_int(b.get("racer_place_number")),
+                          course=_int(b.get("racer_course_number")), st=_num(b.get("racer_start_timing")))
+
+
+def _ingest(loader, data):
+    """JSONの形を見分けて対応する取り込み関数に振り分ける"""
+    if isinstance(data, list):
+        if not data:
+            return
+        if "race_stadium_number" in data[0]:
+            ingest_flat_races(loader, data)
+        elif "venue" in data[0]:
+            ingest_playwright(loader, data)
+        else:
+            for record in data:
+                ingest_history_record(loader, record)
+        return
+    if not isinstance(data, dict) or not data:
+        return
+    if "date" in data and "data" in data:
+        # fetch_history の1日分
+        ingest_history_record(loader, data)
+        return
+    if isinstance(data.get("results"), list):
+        # fetch_results の1日分（Open API 形式）
+        ingest_flat_races(loader, data["results"])
+        return
+    first = next(iter(data.values()))
+    if not isinstance(first, dict):
+        return
+    if isinstance(first.get("races"), dict):
+        ingest_race_tables(loader, data)
+    elif isinstance(first.get("races"), list):
+        ingest_entries(loader, data)
+    elif isinstance(first.get("results"), list) and "date" in first:
+        # fetch_result の1日分 {場名: {"date", "results"}}
+        ingest_results(loader, None, data)
+    else:
+        # 日付をキーにした履歴ファイル全体
+        for day in data.values():
+            _ingest(loader, day)
+
+
+def ingest_data(conn, data, source):
+    """
+    読み込み済みのJSONを取り込む。
+    戻り値: {"races", "boats", "results", "weather"} の件数
+    """
+    loader = Loader(conn, source)
+    with conn:
+        _ingest(loader, data)
+        return loader.flush()
+
+
+def ingest_path(conn, path):
+    """JSONファイル、または HistoryStore のディレクトリを取り込む"""
+    if not os.path.isdir(path):
+        return ingest_data(conn, serializer.load(path), path)
+    # 日付ごとのストアは1日ずつ読んで取り込む
+    totals = {"races": 0, "boats": 0, "results": 0, "weather": 0}
+    for _, day in HistoryStore(path).read_range():
+        for k, n in ingest_data(conn, day, path).items():
+            totals[k] += n
+    return totals
+
+
+# ---- 参照用ヘルパ ----------------------------------------------------
+BOAT_ROW_SQL = """
+SELECT r.race_date, r.stadium AS race_stadium_number, r.race_number, r.kimarite,
+       w.weather, w.wind AS race_wind, w.wave AS race_wave, w.temperature AS race_temperature,
+       b.boat_number AS racer_boat_number, b.racer_number, b.racer_name, b.racer_class,
+       b.start_timing AS racer_average_start_timing, b.national_win_rate, b.local_win_rate,
+       b.motor_win_rate, b.course_win_rate,
+       res.course AS racer_course_number, res.st AS racer_start_timing, res.place AS racer_place_number
+FROM races r
+JOIN boats b ON b.race_id = r.race_id
+LEFT JOIN results res ON res.race_id = r.race_id AND res.boat_number = b.boat_number
+LEFT JOIN weather w ON w.race_id = r.race_id
+"""
+
+
+def boat_rows(conn, start=None, end=None, stadium=None):
+    """艇単位のフラットな行（features.csv と同じ列名）を返す"""
+    where, params = [], []
+    if start:
+        where.append("r.race_date >= ?")
+        params.append(_date(start))
+    if end:
+        where.append("r.race_date <= ?")
+        params.append(_date(end))
+    if stadium:
+        where.append("r.stadium = ?")
+        params.append(_stadium(stadium))
+    sql = BOAT_ROW_SQL + (" WHERE " + " AND ".join(where) if where else "")
+    sql += " ORDER BY r.race_date, r.stadium, r.race_number, b.boat_number"
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def boat_frame(conn, **filters):
+    """boat_rows を pandas.DataFrame で返す（学習・予測スクリプト向け）"""
+    import pandas as pd
+    return pd.DataFrame(boat_rows(conn, **filters))
+
+
+def race_card(conn, race_date, stadium, race_number):
+    sql = BOAT_ROW_SQL + " WHERE r.race_date = ? AND r.stadium = ? AND r.race_number = ? ORDER BY b.boat_number"
+    return [dict(row) for row in conn.execute(sql, (_date(race_date), _stadium(stadium), int(race_number)))]
+
+
+def racer_history(conn, racer_number, limit=50):
+    sql = BOAT_ROW_SQL + " WHERE b.racer_number = ? ORDER BY r.race_date DESC, r.race_number DESC LIMIT ?"
+    return [dict(row) for row in conn.execute(sql, (str(racer_number), limit))]
+
+
+def summary(conn):
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+            for t in ("races", "boats", "results", "weather")}
+
+
+if __name__ == "__main__":
+    # python -m modules.warehouse ingest data/data.json data/history history_all ...
+    # python -m modules.warehouse ingest                （DEFAULT_SOURCES を取り込む）
+    # python -m modules.warehouse summary
+    if len(sys.argv) < 2 or sys.argv[1] not in ("ingest", "summary"):
+        print("usage: python -m modules.warehouse ingest <JSONファイル|ストア> ... | summary")
+        sys.exit(1)
+    conn = connect()
+    if sys.argv[1] == "ingest":
+        for path in sys.argv[2:] or DEFAULT_SOURCES:
+            if not os.path.exists(path):
+                print(f"[WARN] {path} が見つかりません。スキップします。")
+                continue
+            print(f"[INFO] {path}: {ingest_path(conn, path)}")
+    print(f"[INFO] {DB_FILE}: {summary(conn)}")
@@ -1,11 +1,19 @@
-import pandas as pd
 import joblib
 
-df = pd.read_csv("features.csv")
+from modules.feature_store import FeatureStore
+
+FEATURES_DIR = "data/features"
+PREDICTIONS_DIR = "data/predictions"
+PREDICTIONS_CSV = "predictions.csv"
+
+# ストアが空なら従来の features.csv を読む
+df = FeatureStore(FEATURES_DIR, legacy_csv="features.csv").read()
 model = joblib.load("model.pkl")
 
-X = df[["racer_start_timing", "racer_boat_number"]].fillna(0)
+X = df[["racer_start_timing", "racer_boat_number"]].astype("float64").fillna(0)
 df["predicted_place"] = model.predict(X)
 
-df.to_csv("predictions.csv", index=False, encoding="utf-8-sig")
-print("[INFO] 予測結果を保存しました: predictions.csv")
\ No newline at end of file
+store = FeatureStore(PREDICTIONS_DIR)
+store.write(df, overwrite=True)
+store.export_csv(PREDICTIONS_CSV)
+print(f"[INFO] 予測結果を保存しました: {PREDICTIONS_DIR}/, {PREDICTIONS_CSV}")
@@ -2,10 +2,11 @@
 # predict_today.py — 本日分AI予想生成
 # =======================================
 import os
-import json
 import pickle
 import pandas as pd
 
+from modules import serializer
+
 DATA_DIR = "data"
 DATA_FILE = os.path.join(DATA_DIR, "data.json")
 MODEL_FILE = os.path.join(DATA_DIR, "model.pkl")
@@ -23,8 +24,7 @@ def predict_today():
     with open(MODEL_FILE, "rb") as f:
         model = pickle.load(f)
 
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = serializer.load(DATA_FILE)
 
     today = list(data.keys())[0]
     today_data = data[today]
@@ -54,8 +54,7 @@ def predict_today():
 
         predictions[venue] = {"races": venue_results}
 
-    with open(PREDICT_FILE, "w", encoding="utf-8") as f:
-        json.dump(predictions, f, ensure_ascii=False, indent=2)
+    serializer.save(PREDICT_FILE, predictions)
 
     print(f"✅ AI予想生成完了: {PREDICT_FILE}")
 
@@ -1,18 +1,57 @@
 # prepare_dataset.py
+import argparse
 import json
 import csv
+import os
 from pathlib import Path
 
-HISTORY_FILE = Path("history.json")
+from modules import warehouse
+from modules.history_store import HistoryStore
+from modules.venues import VENUE_CODES
+
+HISTORY_FILE = Path("history.json")  # 旧形式
+HISTORY_DIR = Path("history")        # fetch_results.py の日付別ストア
 OUTPUT_FILE = Path("dataset.csv")
+VENUE_NAMES = {code: name for name, code in VENUE_CODES.items()}
 
 def load_history():
+    store = HistoryStore(str(HISTORY_DIR))
+    if len(store):
+        return store.load_all()
     if not HISTORY_FILE.exists():
-        print("❌ history.json が存在しません。先に fetch_history.py を実行してください。")
+        print(f"❌ {HISTORY_DIR}/ が存在しません。先に fetch_results.py を実行してください。")
         return None
     with open(HISTORY_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def load_warehouse_rows(db_file=warehouse.DB_FILE):
+    """
+    レースDB（python -m modules.warehouse ingest で作る）から1艇1行で読む。
+    DB が無い・空なら None（history/ から作る）。
+    """
+    if not os.path.exists(db_file):
+        return None
+    conn = warehouse.connect(db_file)
+    try:
+        rows = warehouse.boat_rows(conn)
+    finally:
+        conn.close()
+    if not rows:
+        return None
+    return [{
+        "date": r["race_date"],
+        "race_id": f"{r['race_date']}-{r['race_stadium_number']}-{r['race_number']}",
+        "venue": VENUE_NAMES.get(r["race_stadium_number"], r["race_stadium_number"]),
+        "weather": r["weather"] or "",
+        "water_condition": f"波{r['race_wave']:g}cm" if r["race_wave"] is not None else "",
+        "player_id": r["racer_number"],
+        "player_name": r["racer_name"],
+        "course": r["racer_course_number"],
+        "st_time": r["racer_start_timing"],
+        "kimarite": r["kimarite"] or "",
+        "rank": r["racer_place_number"],
+    } for r in rows]
+
 def extract_features(history_data):
     dataset = []
     for date, races in history_data.items():
@@ -41,19 +80,30 @@ def extract_features(history_data):
                 continue
     return dataset
 
-def save_dataset(dataset):
+def save_dataset(dataset, out=OUTPUT_FILE):
     if not dataset:
         print("❌ 保存対象データがありません。")
         return
     fieldnames = list(dataset[0].keys())
-    with open(OUTPUT_FILE, "w", encoding="utf-8", newline="") as f:
+    with open(out, "w", encoding="utf-8", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(dataset)
-    print(f"✅ 学習用データを保存しました → {OUTPUT_FILE}")
+    print(f"✅ 学習用データを保存しました → {out}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="学習用データ（1艇1行）の作成")
+    ap.add_argument("--db", default=warehouse.DB_FILE, help="レースDB（無ければ history/ から作る）")
+    ap.add_argument("--out", default=str(OUTPUT_FILE), help="出力CSV")
+    args = ap.parse_args(argv)
+
+    dataset = load_warehouse_rows(args.db)
+    if dataset is not None:
+        print(f"[INFO] {args.db} から {len(dataset)}行を読み込みました")
+    else:
+        history = load_history()
+        dataset = extract_features(history) if history else []
+    save_dataset(dataset, args.out)
 
 if __name__ == "__main__":
-    history = load_history()
-    if history:
-        dataset = extract_features(history)
-        save_dataset(dataset)
\ No newline at end of file
+    main()
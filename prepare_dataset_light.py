@@ -1,23 +1,289 @@
-import ijson
+# =========================================
+# prepare_dataset_light.py
+# 履歴ファイルを少しずつ読みながら艇単位の dataset.csv を作る
+#
+#   python prepare_dataset_light.py                   # 既定の履歴を自動で選ぶ
+#   python prepare_dataset_light.py history_all.json  # ファイル / ストアのディレクトリ / .jsonl を指定
+#
+# 1日分（またはレコード1件分）ずつしかメモリに載せないので、
+# history_all.json がどれだけ大きくても使用メモリはほぼ一定。
+# =========================================
+import argparse
 import csv
+import json
+import os
+import re
+import resource
+import time
+
+import ijson
 
-INPUT_FILE = "history.json"
+from modules.history_store import HistoryStore
+from modules.venues import VENUE_CODES
+
+# 先に見つかったものを使う（同じレースが複数の履歴に入っているため1つだけ）
+DEFAULT_INPUTS = ["history_all", "history_all.json", "history", "history.json",
+                  "data/history", "data/history.json"]
 OUTPUT_FILE = "dataset.csv"
 
-# 出力する列（例: JSONにあるフィールドを選択）
-COLUMNS = ["race_date", "stadium", "race_number", "start_timing", "water_type"]
+COLUMNS = [
+    "race_date", "race_stadium_number", "race_number", "kimarite",
+    "weather", "race_wind", "race_wave", "race_temperature",
+    "racer_boat_number", "racer_course_number", "racer_number", "racer_name",
+    "racer_start_timing", "racer_place_number", "race_time",
+    "racer_class", "racer_average_start_timing", "racer_flying_count",
+    "national_win_rate", "local_win_rate", "motor_win_rate", "course_win_rate",
+]
+_DATE = re.compile(r"\d{8}|\d{4}-\d{2}-\d{2}")
+
+
+def _race_date(value):
+    s = str(value or "")
+    return f"{s[:4]}-{s[4:6]}-{s[6:8]}" if len(s) == 8 and s.isdigit() else s
+
+
+def _stadium(value):
+    """場名・"01"・1 → 1"""
+    code = VENUE_CODES.get(value, value)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return value
+
+
+# ---- 1日分 → 艇単位の行 ---------------------------------------------
+def history_record_rows(record):
+    """fetch_history.py: {"date", "data": [{"date", "jcd", "races": [...]}]}"""
+    for venue in record.get("data", []):
+        yield from venue_rows(venue)
+
+
+def venue_rows(venue):
+    """fetch_history.py の1場分（バックフィルの .jsonl も同じ形）"""
+    for race in venue.get("races", []):
+        w = race.get("weather") or {}
+        for b in race.get("boats", []):
+            yield {
+                "race_date": _race_date(venue.get("date")),
+                "race_stadium_number": _stadium(venue.get("jcd")),
+                "race_number": race.get("race_no"),
+                "kimarite": race.get("kimarite"),
+                "weather": w.get("weather"),
+                "race_wind": w.get("wind"),
+                "race_wave": w.get("wave"),
+                "race_temperature": w.get("temperature"),
+                "racer_boat_number": b.get("boat"),
+                "racer_number": b.get("racer_number"),
+                "racer_name": b.get("racer_name"),
+                "racer_start_timing": b.get("st"),
+                "racer_place_number": b.get("place"),
+                "race_time": b.get("race_time"),
+            }
+
+
+def flat_race_rows(race):
+    """merge_data.py / Open API 形式: {"race_date", "race_stadium_number", "race_number", "boats"}"""
+    for b in race.get("boats", []):
+        yield {
+            "race_date": _race_date(race.get("race_date")),
+            "race_stadium_number": race.get("race_stadium_number"),
+            "race_number": race.get("race_number"),
+            "kimarite": race.get("race_technique_number"),
+            "weather": race.get("race_weather_number"),
+            "race_wind": race.get("race_wind"),
+            "race_wave": race.get("race_wave"),
+            "race_temperature": race.get("race_temperature"),
+            "racer_boat_number": b.get("racer_boat_number"),
+            "racer_course_number": b.get("racer_course_number"),
+            "racer_number": b.get("racer_number"),
+            "racer_name": b.get("racer_name"),
+            "racer_start_timing": b.get("racer_start_timing"),
+            "racer_place_number": b.get("racer_place_number"),
+        }
+
+
+def result_rows(date, venues):
+    """fetch_result.py: {場名: {"date", "results": [{"race_no", "1着".., "決まり手"}]}}"""
+    for venue, info in venues.items():
+        for r in info.get("results", []):
+            for place, key in enumerate(("1着", "2着", "3着"), 1):
+                yield {
+                    "race_date": _race_date(info.get("date", date)),
+                    "race_stadium_number": _stadium(venue),
+                    "race_number": r.get("race_no"),
+                    "kimarite": r.get("決まり手"),
+                    "racer_boat_number": r.get(key),
+                    "racer_place_number": place,
+                }
+
+
+def entry_rows(date, races):
+    """prepare_dataset.py が想定する形: {race_id: {"place", "weather", "entries": [...]}}"""
+    for race_id, race in races.items():
+        for e in race.get("entries", []):
+            yield {
+                "race_date": _race_date(date),
+                "race_stadium_number": _stadium(race.get("place")),
+                "race_number": race_id,
+                "kimarite": e.get("kimarite"),
+                "weather": race.get("weather"),
+                "racer_course_number": e.get("course"),
+                "racer_number": e.get("id"),
+                "racer_name": e.get("name"),
+                "racer_start_timing": e.get("st"),
+                "racer_place_number": e.get("rank"),
+            }
+
+
+def race_card_rows(date, venues):
+    """fetch_data.py（data/history_entries）: {場名: {"date", "status", "races": {rno: [出走表]}}}"""
+    for venue, info in venues.items():
+        for rno, racers in (info.get("races") or {}).items():
+            for r in racers:
+                yield {
+                    "race_date": _race_date(info.get("date", date)),
+                    "race_stadium_number": _stadium(venue),
+                    "race_number": int(rno),
+                    "racer_boat_number": r.get("艇番"),
+                    "racer_name": r.get("選手名"),
+                    "racer_class": r.get("級"),
+                    "racer_average_start_timing": r.get("平均ST"),
+                    "racer_flying_count": r.get("F数"),
+                    "national_win_rate": r.get("全国勝率"),
+                    "local_win_rate": r.get("当地勝率"),
+                    "motor_win_rate": r.get("モーター勝率"),
+                    "course_win_rate": r.get("コース勝率"),
+                }
+
+
+def day_rows(date, day):
+    """1日分（または1レコード分）の形を見分けて行を返す"""
+    if isinstance(day, list):
+        for item in day:
+            yield from day_rows(date, item)
+        return
+    if not isinstance(day, dict) or not day:
+        return
+    if "data" in day and "date" in day:
+        yield from history_record_rows(day)
+    elif "races" in day and "jcd" in day:
+        yield from venue_rows(day)
+    elif "race_stadium_number" in day:
+        yield from flat_race_rows(day)
+    elif isinstance(day.get("results"), list):
+        for race in day["results"]:
+            yield from flat_race_rows(race)
+    else:
+        first = next(iter(day.values()))
+        if isinstance(first, dict) and isinstance(first.get("results"), list):
+            yield from result_rows(date, day)
+        elif isinstance(first, dict) and "entries" in first:
+            yield from entry_rows(date, day)
+        elif isinstance(first, dict) and isinstance(first.get("races"), dict):
+            yield from race_card_rows(date, day)
+        else:
+            print(f"[WARN] {date or day.get('date', '日付不明')} の履歴の形を判別できないためスキップします")
+
+
+# ---- 入力の種類ごとの読み出し ---------------------------------------
+def _first_byte(path):
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head[:1]
+
+
+def iter_json(path):
+    """
+    (日付, 1日分) を順に返す。
+      [...]        → 要素ごと（history_all.json のレコード、フラットなレース一覧）
+      {日付: ...}  → キーと値を1組ずつ
+      それ以外の {} → ファイル全体が1日分
+    """
+    first = _first_byte(path)
+    with open(path, "rb") as f:
+        if first == b"[":
+            for item in ijson.items(f, "item", use_float=True):
+                yield None, item
+            return
+        if first != b"{":
+            return
+        dated = False
+        for key, value in ijson.kvitems(f, "", use_float=True):
+            if _DATE.fullmatch(key):
+                dated = True
+                yield key, value
+            elif not dated:
+                break
+        else:
+            return
+    # 日付キーでなければ1日分のファイル（小さいので一括で読む）
+    with open(path, "r", encoding="utf-8-sig") as f:
+        yield None, json.load(f)
+
+
+def iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield None, json.loads(line)
+
+
+def iter_dir(path):
+    """HistoryStore のディレクトリ、またはバックフィルの results/*.jsonl"""
+    store = HistoryStore(path)
+    if len(store):
+        yield from store.read_range()
+        return
+    for root in (path, os.path.join(path, "results")):
+        if os.path.isdir(root):
+            for name in sorted(os.listdir(root)):
+                if name.endswith(".jsonl"):
+                    yield from iter_jsonl(os.path.join(root, name))
+
+
+def iter_days(path):
+    if os.path.isdir(path):
+        return iter_dir(path)
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    return iter_json(path)
+
+
+def convert(inputs, output=OUTPUT_FILE):
+    rows = days = 0
+    with open(output, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for path in inputs:
+            for date, day in iter_days(path):
+                days += 1
+                for row in day_rows(date, day):
+                    writer.writerow(row)
+                    rows += 1
+    return rows, days
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="履歴ファイルから艇単位の dataset.csv を作る")
+    ap.add_argument("inputs", nargs="*", help="履歴ファイル / ストアのディレクトリ / .jsonl（省略時は自動選択）")
+    ap.add_argument("-o", "--output", default=OUTPUT_FILE)
+    return ap.parse_args(argv)
+
 
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f, \
-         open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as out:
+def main(argv=None):
+    args = parse_args(argv)
+    inputs = args.inputs or [p for p in DEFAULT_INPUTS if os.path.exists(p)][:1]
+    if not inputs:
+        print(f"❌ 履歴が見つかりません（{', '.join(DEFAULT_INPUTS)}）")
+        return
 
-        writer = csv.writer(out)
-        writer.writerow(COLUMNS)  # ヘッダー行を書き込み
+    started = time.perf_counter()
+    rows, days = convert(inputs, args.output)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"✅ {', '.join(inputs)} → {args.output}: {rows}行 / {days}件 "
+          f"({elapsed:.1f}s, 最大メモリ {peak_mb:.0f}MB)")
 
-        # JSONのトップレベルが配列の場合: "item"
-        for record in ijson.items(f, "item"):
-            row = [record.get(col, "") for col in COLUMNS]
-            writer.writerow(row)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,145 @@
+# =========================================
+# publish.py
+# data.json / prediction.json を場・レースごとのファイルに分割し、
+# 内容ハッシュ付きのファイル名と manifest.json を data/shards/ に書き出す
+#
+#   python publish.py
+#
+# data/shards/
+#   manifest.json                     {"version", "generated", "venues", "venue": {場コード: {...}}}
+#   venues.<hash>.json                場一覧（一覧画面に必要な分だけ）
+#   venue/<場>.<hash>.json            1場分の出走表
+#   race/<場>-<R>.<hash>.json         1レース分
+#   prediction/<場>.<hash>.json       1場分の予想
+#
+# 内容が変わらなければファイル名も変わらないので、クライアントは
+# manifest だけ取り直して、名前が変わったファイルだけ取得すればよい。
+# =========================================
+import argparse
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from modules import serializer
+from modules.race_index import RaceIndex, VENUE_NAMES, load_prediction, venue_meta, venue_predictions
+
+DATA_FILE = "data/data.json"
+PREDICTION_FILE = "prediction.json"
+OUT_DIR = "data/shards"
+MANIFEST = "manifest.json"
+
+
+class ShardWriter:
+    """内容ハッシュをファイル名に入れて書く（同じ内容なら書き直さない）"""
+
+    def __init__(self, root):
+        self.root = root
+        self.written = set()
+        self.created = 0
+
+    def put(self, stem, payload):
+        raw = serializer.dumps(payload)
+        digest = hashlib.sha256(raw).hexdigest()[:12]
+        name = f"{stem}.{digest}.json"
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            serializer.atomic_write(path, raw)
+            self.created += 1
+        self.written.add(name)
+        return name
+
+
+def publish(data_file=DATA_FILE, prediction_file=PREDICTION_FILE, out_dir=OUT_DIR):
+    """分割して書き出し、manifest を返す"""
+    data = serializer.load(data_file, default=[])
+    index = RaceIndex.from_data(data)
+    meta = venue_meta(data)
+    prediction = load_prediction(prediction_file)
+    predictions = venue_predictions(prediction)
+
+    shards = ShardWriter(out_dir)
+    venues, summary = {}, []
+    for code in sorted(set(index.by_venue) | set(meta) | set(predictions), key=lambda c: c or ""):
+        races = [index.races[i] for i in index.by_venue.get(code, [])]
+        name = VENUE_NAMES.get(code, code)
+        info = {"venue_code": code, "venue": name, **meta.get(code, {})}
+        entry = {"races": {}}
+        for race in races:
+            entry["races"][str(race["race_no"])] = shards.put(f"race/{code}-{race['race_no']:02d}", race)
+        entry["file"] = shards.put(f"venue/{code}", {**info, "races": races})
+        if code in predictions:
+            entry["prediction"] = shards.put(f"prediction/{code}", predictions[code])
+        venues[code] = entry
+        summary.append({**info, "dates": sorted({r["date"] for r in races}), "race_count": len(races),
+                        "file": entry["file"]})
+
+    manifest = {
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sources": {"data": data_file, "prediction": prediction_file,
+                    "prediction_updated": prediction.get("updated") if isinstance(prediction, dict) else None},
+        "venues": shards.put("venues", summary),
+        "venue": venues,
+    }
+    manifest["version"] = hashlib.sha256(
+        serializer.dumps({k: manifest[k] for k in ("venues", "venue")})).hexdigest()[:12]
+
+    # 直前の manifest が参照するファイルは、読み込み途中のクライアントのために1世代残す
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous = serializer.load(manifest_path, default={}) or {}
+    keep = shards.written | set(_files(previous))
+    serializer.save(manifest_path, manifest)
+    removed = _prune(out_dir, keep)
+    print(f"[INFO] {out_dir}/ に {len(shards.written)}ファイル（新規 {shards.created}、削除 {removed}） "
+          f"version={manifest['version']}")
+    return manifest
+
+
+def delta(old, new):
+    """2つの manifest の差分（変わった場のエントリと、無くなった場）"""
+    old_venues, new_venues = old.get("venue", {}), new.get("venue", {})
+    return {
+        "venues": new.get("venues"),
+        "changed": {code: entry for code, entry in new_venues.items() if old_venues.get(code) != entry},
+        "removed": sorted(code for code in old_venues if code not in new_venues),
+    }
+
+
+def _files(manifest):
+    if not manifest:
+        return []
+    files = [manifest.get("venues")]
+    for entry in manifest.get("venue", {}).values():
+        files.append(entry.get("file"))
+        files.append(entry.get("prediction"))
+        files.extend(entry.get("races", {}).values())
+    return [f for f in files if f]
+
+
+def _prune(out_dir, keep):
+    removed = 0
+    for dirpath, _, names in os.walk(out_dir):
+        for name in names:
+            rel = os.path.relpath(os.path.join(dirpath, name), out_dir).replace(os.sep, "/")
+            base = rel[:-3] if rel.endswith((".gz", ".br")) else rel  # 事前圧縮版は元ファイルに合わせる
+            if base == MANIFEST or base in keep or not base.endswith(".json"):
+                continue
+            os.remove(os.path.join(dirpath, name))
+            removed += 1
+    return removed
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="data.json / prediction.json を分割して配信用に書き出す")
+    ap.add_argument("--data", default=DATA_FILE)
+    ap.add_argument("--prediction", default=PREDICTION_FILE)
+    ap.add_argument("--out", default=OUT_DIR)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    publish(args.data, args.prediction, args.out)
+
+
+if __name__ == "__main__":
+    main()
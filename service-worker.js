@@ -1,18 +1,86 @@
+const APP_CACHE = "app-v2";
+const SHARD_CACHE = "shards-v1";
+
+// 画面の表示に必要なファイル（service-worker.js からの相対パス）
+const APP_SHELL = [
+  "./", "index.html", "style.css", "app.js", "ai.js", "manifest.webmanifest"
+];
+
 self.addEventListener("install", e => {
   e.waitUntil(
-    caches.open("v1").then(cache => cache.addAll([
-      "/", "/index.html", "/style.css", "/app.js", "/ai.js", "/manifest.json"
-    ]))
+    caches.open(APP_CACHE).then(cache => cache.addAll(APP_SHELL)).then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", e => {
+  // 古いバージョンのキャッシュを消す
+  e.waitUntil(
+    caches.keys().then(keys => Promise.all(
+      keys.filter(k => k !== APP_CACHE && k !== SHARD_CACHE).map(k => caches.delete(k))
+    )).then(() => self.clients.claim())
   );
 });
 
+// manifest.json: 毎回ネットワークを優先し、参照されなくなった分割ファイルをキャッシュから消す
+async function manifestFirst(request) {
+  try {
+    const res = await fetch(request, { cache: "no-cache" });
+    if (res.ok) {
+      const cache = await caches.open(SHARD_CACHE);
+      await cache.put(request, res.clone());
+      pruneShards(cache, request.url, await res.clone().json());
+    }
+    return res;
+  } catch (err) {
+    return (await caches.match(request)) || Response.error();
+  }
+}
+
+async function pruneShards(cache, manifestUrl, manifest) {
+  const keep = new Set([manifestUrl]);
+  const add = file => file && keep.add(new URL(file, manifestUrl).href);
+  add(manifest.venues);
+  Object.values(manifest.venue || {}).forEach(v => {
+    add(v.file);
+    add(v.prediction);
+    Object.values(v.races || {}).forEach(add);
+  });
+  for (const req of await cache.keys()) {
+    if (!keep.has(req.url)) cache.delete(req);
+  }
+}
+
+// ハッシュ付きの分割ファイル: 中身が変わらないのでキャッシュがあればそれを使う
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const res = await fetch(request);
+  if (res.ok) (await caches.open(SHARD_CACHE)).put(request, res.clone());
+  return res;
+}
+
+// データ本体・アプリ本体: 最新を取りに行き、オフライン時だけキャッシュを使う
+async function networkFirst(request) {
+  try {
+    const res = await fetch(request);
+    if (res.ok && request.method === "GET") (await caches.open(APP_CACHE)).put(request, res.clone());
+    return res;
+  } catch (err) {
+    return (await caches.match(request, { ignoreSearch: true })) || Response.error();
+  }
+}
+
 self.addEventListener("fetch", e => {
-  if (e.request.url.includes("race_data.json")) {
-    // race_data.json は毎回最新を取得
-    e.respondWith(fetch(e.request));
+  const url = new URL(e.request.url);
+  if (e.request.method !== "GET" || url.origin !== self.location.origin) return;
+  // 更新通知のストリームはそのまま通す（キャッシュすると終わらない）
+  if (e.request.headers.get("accept") === "text/event-stream") return;
+
+  if (url.pathname.endsWith("/data/shards/manifest.json")) {
+    e.respondWith(manifestFirst(e.request));
+  } else if (url.pathname.includes("/data/shards/")) {
+    e.respondWith(cacheFirst(e.request));
   } else {
-    e.respondWith(
-      caches.match(e.request).then(res => res || fetch(e.request))
-    );
+    e.respondWith(networkFirst(e.request));
   }
-});
\ No newline at end of file
+});
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from modules import rate_limit  # noqa: E402
+
+
+class StandIn:
+    """
+    テスト用のローカル代替サーバー。
+    route(path, query, n) -> (status, headers, body) で応答を決める（n はそのパスへの何回目のリクエストか）。
+    同時に処理中のリクエスト数の最大値（max_inflight）と、受けたリクエストを記録する。
+    """
+
+    def __init__(self, route, delay=0.0):
+        self.route = route
+        self.delay = delay
+        self.requests = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlparse(self.path)
+                with standin._lock:
+                    standin.inflight += 1
+                    standin.max_inflight = max(standin.max_inflight, standin.inflight)
+                    n = standin._counts[parts.path] = standin._counts.get(parts.path, 0) + 1
+                    standin.requests.append((time.monotonic(), self.path))
+                try:
+                    if standin.delay:
+                        time.sleep(standin.delay)
+                    status, headers, body = standin.route(parts.path, parse_qs(parts.query), n)
+                finally:
+                    with standin._lock:
+                        standin.inflight -= 1
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.host = f"127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        return f"http://{self.host}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """standin(route, delay=0, rate=None) で代替サーバーを起動する（テスト終了時に停止）"""
+    servers = []
+
+    def start(route, delay=0.0, rate=None):
+        server = StandIn(route, delay)
+        servers.append(server)
+        # 既定のレート（4req/s）だとテストが遅いので、指定がなければ実質無制限にする
+        bucket = rate_limit.AdaptiveTokenBucket(rate=rate or 1000.0, burst=1000 if rate is None else 1,
+                                                max_rate=1000.0 if rate is None else rate_limit.MAX_RATE)
+        monkeypatch.setitem(rate_limit._buckets, server.host, bucket)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from modules.change_feed import ChangeFeed
+
+
+class SlowCache:
+    """get() に時間がかかる FileCache の代わり（同時に呼ばれた数を記録する）"""
+
+    def __init__(self, version="v1"):
+        self.version = version
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        return SimpleNamespace(etag=f'"{self.version}"', body=b"{}")
+
+
+def test_concurrent_checks_are_serialized_and_publish_once():
+    async def main():
+        cache = SlowCache()
+        feed = ChangeFeed(cache, interval=60)
+        queue = feed.subscribe()  # 監視タスクも check() を呼ぶ
+        events = await asyncio.gather(feed.check(), feed.check())
+        await asyncio.sleep(0.1)
+        feed.close()
+        return cache, queue, events
+
+    cache, queue, events = asyncio.run(main())
+    assert cache.max_running == 1
+    assert [e for e in events if e is not None] in ([], [{"version": "v1", "previous": None}])
+    assert queue.qsize() == 1
+
+
+def test_watcher_stops_when_last_subscriber_leaves():
+    async def main():
+        cache = SlowCache()
+        feed = ChangeFeed(cache, interval=0.01)
+        first, second = feed.subscribe(), feed.subscribe()
+        task = feed._task
+        await asyncio.sleep(0.1)
+        feed.unsubscribe(first)
+        assert not task.done()
+        feed.unsubscribe(second)
+        await asyncio.sleep(0)
+        calls = cache.calls
+        await asyncio.sleep(0.2)
+        assert task.cancelled() and feed._task is None
+        assert cache.calls == calls
+
+        # 次の購読者が来たらまた監視する
+        cache.version = "v2"
+        queue = feed.subscribe()
+        event = await asyncio.wait_for(queue.get(), 1)
+        feed.unsubscribe(queue)
+        return event
+
+    assert asyncio.run(main()) == {"version": "v2", "previous": "v1"}
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+from starlette.requests import Request
+
+from modules import compression, delta_log, race_api
+from modules.delta_log import DeltaLog
+
+
+class Source:
+    """FileValue の代わり。refresh() で次の版に差し替える"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.pending = None
+        self.background = True
+
+    def get(self):
+        return self.snapshot
+
+    def refresh(self):
+        if self.pending is None:
+            return False
+        self.snapshot, self.pending = self.pending, None
+        return True
+
+    def info(self):
+        return {}
+
+
+def snapshot(n):
+    return {"races": {f"20250101-01-{r}": {"race_no": r, "rev": n, "note": "x" * 200} for r in range(1, 13)}}
+
+
+def make_log(versions):
+    source = Source(snapshot(0))
+    log = DeltaLog(source)
+    log.prepare()
+    for n in range(1, versions):
+        source.pending = snapshot(n)
+        assert log.refresh()
+    return log
+
+
+def test_refresh_prepares_common_responses_with_compression():
+    log = make_log(3)
+    oldest, previous, latest = list(log.ring)
+    for since in (None, previous, latest):
+        entry = log.cached(since)
+        assert entry is not None and not entry.fast
+        if len(entry.body) >= compression.MIN_SIZE:
+            assert set(entry._encoded) == set(compression.ENCODINGS)
+    assert len(log.cached(None).body) >= compression.MIN_SIZE
+    assert log.cached("unknown") is log.cached(None)
+    assert log.cached(oldest) is None  # 古い版からの差分は要求されたときに作る
+
+    entry = log.delta(oldest, "gzip")
+    assert entry.fast and "gzip" in entry._encoded
+    assert log.cached(oldest) is entry
+    assert log.cached(latest).body.endswith(b'"ops":[]}')
+
+
+def test_delta_handler_builds_uncached_responses_off_the_loop(monkeypatch):
+    log = make_log(3)
+    oldest = next(iter(log.ring))
+    threads = []
+    real_diff = delta_log.diff
+    monkeypatch.setattr(delta_log, "diff", lambda a, b: threads.append(threading.get_ident()) or real_diff(a, b))
+    router = race_api.APIRouter()
+    monkeypatch.setattr(race_api, "DeltaLog", lambda source: log)
+    monkeypatch.setattr(race_api, "APIRouter", lambda: router)
+    race_api.delta_router("unused.json")
+    endpoint = next(r.endpoint for r in router.routes if r.path == "/data/delta")
+    request = Request({"type": "http", "method": "GET", "path": "/data/delta", "query_string": b"",
+                       "headers": [(b"accept-encoding", b"gzip")]})
+
+    async def main():
+        loop_thread = threading.get_ident()
+        response = await endpoint(request=request, since=oldest)
+        return loop_thread, response
+
+    loop_thread, response = asyncio.run(main())
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert threads and loop_thread not in threads
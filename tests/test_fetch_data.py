@@ -0,0 +1,67 @@
+import json
+
+import fetch_data
+
+DATE = "20250101"
+
+
+def race_card(path, query, n):
+    """racedata ページの代わり（window.__RACE_DATA__ に6艇分）"""
+    jcd, rno = query["jcd"][0], query["rno"][0]
+    data = {"racers": [{"teiban": lane, "name": f"{jcd}-{rno}-{lane}"} for lane in range(1, 7)]}
+    html = f"<html><script>window.__RACE_DATA__ = {json.dumps(data)};</script></html>"
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, html
+
+
+def test_fetch_all_tables_is_complete_and_respects_per_host_cap(standin):
+    server = standin(race_card, delay=0.05)
+    venues = {"桐生": "01", "戸田": "02", "江戸川": "03"}
+    race_counts = {"桐生": 12, "戸田": 12, "江戸川": 6}
+
+    tables, elapsed = fetch_data.fetch_all_tables(
+        venues, DATE, base_url=server.url("/racedata"),
+        max_workers=8, per_host=2, race_counts=race_counts)
+
+    for venue, code in venues.items():
+        races = tables[venue]
+        assert list(races) == [str(r) for r in range(1, race_counts[venue] + 1)]
+        for rno, boats in races.items():
+            assert [b["選手名"] for b in boats] == [f"{code}-{rno}-{lane}" for lane in range(1, 7)]
+        assert elapsed[venue] > 0
+    assert len(server.requests) == sum(race_counts.values())
+    # 並列に取得しつつ、1ホストあたりの同時接続は per_host を超えない
+    assert server.max_inflight == 2
+
+
+def test_crawl_stops_after_two_missing_races(standin, capsys):
+    # 開催一覧からはレース数が分からないので12Rまで取りに行き、2レース続けて 404 なら止める
+    def route(path, query, n):
+        if int(query["rno"][0]) > 8:
+            return 404, {}, "not found"
+        return race_card(path, query, n)
+
+    server = standin(route)
+    tables, _ = fetch_data.fetch_all_tables({"桐生": "01"}, DATE, base_url=server.url("/racedata"),
+                                            per_host=1, race_counts={"桐生": 12})
+    assert list(tables["桐生"]) == [str(r) for r in range(1, 9)]
+
+    server.requests.clear()
+    races = fetch_data.fetch_race_table("01", DATE, base_url=server.url("/racedata"), race_count=12)
+    assert list(races) == [str(r) for r in range(1, 9)]
+    assert len(server.requests) == 10
+    assert "[WARN] 場01 9R・10R が続けて 404 のため 9R 以降の取得を打ち切り" in capsys.readouterr().out
+
+
+def test_single_missing_race_is_skipped_with_warning(standin, capsys):
+    def route(path, query, n):
+        if query["rno"][0] == "3":
+            return 404, {}, "not found"
+        return race_card(path, query, n)
+
+    server = standin(route)
+    expected = [str(r) for r in range(1, 13) if r != 3]
+    tables, _ = fetch_data.fetch_all_tables({"桐生": "01"}, DATE, base_url=server.url("/racedata"),
+                                            per_host=2, race_counts={"桐生": 12})
+    assert list(tables["桐生"]) == expected
+    assert "[WARN] 桐生 3R が 404 のためスキップ" in capsys.readouterr().out
+    assert list(fetch_data.fetch_race_table("01", DATE, base_url=server.url("/racedata"))) == expected
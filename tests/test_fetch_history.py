@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import fetch_history
+
+
+class FakeResponse:
+    status_code = 200
+    text = "<html><body></body></html>"
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def serve(monkeypatch, venues, broken=()):
+    """開催場一覧と結果ページの取得を差し替える。broken の場は接続エラーにする"""
+    monkeypatch.setattr(fetch_history.schedule, "open_venues", lambda date: venues.get(date))
+
+    def get(url, cache=False):
+        jcd = url.split("jcd=")[1][:2]
+        if jcd in broken:
+            raise requests.ConnectionError("connection reset")
+        return FakeResponse()
+
+    monkeypatch.setattr(fetch_history.http_client, "get", get)
+
+
+def test_fetch_race_page_survives_connection_errors(monkeypatch):
+    serve(monkeypatch, {}, broken={"02"})
+    assert fetch_history.fetch_race_page("20250101", "02") is None
+    assert fetch_history.fetch_race_page("20250101", "01")["jcd"] == "01"
+
+
+def test_fetch_race_pages_reports_incomplete_days(monkeypatch):
+    serve(monkeypatch, {"20250101": ["01", "02"]}, broken={"02"})
+    pages, complete = fetch_history.fetch_race_pages("20250101")
+    assert [p["jcd"] for p in pages] == ["01"]
+    assert not complete
+    # 開催一覧が取れない日も未完了
+    assert fetch_history.fetch_race_pages("20250102") == ([], False)
+
+
+def test_backfill_records_failed_dates_and_retries_them(tmp_path, monkeypatch, pool):
+    # 0101 は 02 場が失敗、0102 は開催一覧が取れない
+    serve(monkeypatch, {"20250101": ["01", "02"]}, broken={"02"})
+    backfill = fetch_history.Backfill(str(tmp_path))
+    for date in ("20250101", "20250102"):
+        backfill.run_date(date, pool)
+    assert backfill.done == {("20250101", "01")}
+    assert (tmp_path / "failed.txt").read_text() == "20250101\n20250102\n"
+
+    # 次回は期間外でも前回の失敗日を取り直し、取れたら failed.txt から消す
+    serve(monkeypatch, {"20250101": ["01", "02"], "20250102": ["03"], "20250103": ["01"]})
+    backfill = fetch_history.Backfill(str(tmp_path))
+    monkeypatch.setattr(fetch_history, "ProcessPoolExecutor", ThreadPoolExecutor)
+    backfill.run("20250103", "20250103", workers=1, parse_workers=1)
+    assert backfill.done == {("20250101", "01"), ("20250101", "02"), ("20250102", "03"), ("20250103", "01")}
+    assert backfill.failed_dates == set()
+    assert (tmp_path / "failed.txt").read_text() == ""
+
+
+def test_parse_args_keeps_top_level_options_for_backfill():
+    args = fetch_history.parse_args(["--keep-raw", "--workers", "9", "backfill", "--start", "20250101",
+                                     "--end", "20250102", "--fetch-workers", "3"])
+    assert (args.keep_raw, args.workers, args.fetch_workers) == (True, 9, 3)
+    args = fetch_history.parse_args(["backfill", "--start", "20250101", "--end", "20250102"])
+    assert (args.keep_raw, args.workers, args.fetch_workers) == (False, fetch_history.PARSE_WORKERS,
+                                                                 fetch_history.FETCH_WORKERS)
+
+
+def test_day_without_races_is_complete(tmp_path, monkeypatch, pool):
+    # 開催一覧は取れたが場が1つも無い日（schedule は {} を返す）
+    index = SimpleNamespace(text="<html><body><p>本日の開催はありません</p></body></html>",
+                            raise_for_status=lambda: None)
+    monkeypatch.setattr(fetch_history.schedule, "_schedules", {})
+    monkeypatch.setattr(fetch_history.schedule.http_client, "get", lambda url, cache=False: index)
+
+    assert fetch_history.fetch_race_pages("20250101") == ([], True)
+    backfill = fetch_history.Backfill(str(tmp_path))
+    assert backfill.run_date("20250101", pool) == 0
+    assert backfill.failed_dates == set()
+    assert not (tmp_path / "failed.txt").exists()
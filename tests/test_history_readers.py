@@ -0,0 +1,22 @@
+import features
+import generate_prediction
+import prepare_dataset
+from modules.history_store import HistoryStore
+
+
+def test_features_reads_what_fetch_result_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(features, "HISTORY_DIR", str(tmp_path / "history"))
+    monkeypatch.setattr(features, "HISTORY_PATH", str(tmp_path / "history.json"))
+    race = {"race_no": 1, "1着": "1", "2着": "3", "3着": "2", "決まり手": "逃げ"}
+    HistoryStore(features.HISTORY_DIR).write("20250101", {"桐生": {"date": "20250101", "results": [race]}})
+
+    assert features.load_history() == [{"date": "20250101", "venue": "桐生", **race}]
+
+
+def test_prediction_and_dataset_read_what_fetch_results_writes(tmp_path, monkeypatch):
+    day = {"results": [{"race_stadium_number": 1, "boats": []}]}
+    HistoryStore(str(tmp_path / "history")).write("20250101", day)
+    for module in (generate_prediction, prepare_dataset):
+        monkeypatch.setattr(module, "HISTORY_DIR", tmp_path / "history")
+        monkeypatch.setattr(module, "HISTORY_FILE", tmp_path / "history.json")
+        assert module.load_history() == {"20250101": day}
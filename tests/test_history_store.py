@@ -0,0 +1,22 @@
+from modules import serializer
+from modules.history_store import MANIFEST, HistoryStore
+
+
+def test_manifest_is_read_with_the_serializer(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.write("20250101", {"results": []})
+    # 圧縮・MessagePack で書かれたマニフェストも読める
+    manifest = serializer.load(str(tmp_path / MANIFEST))
+    (tmp_path / MANIFEST).write_bytes(serializer.dumps(manifest, fmt="msgpack", compression="gzip"))
+
+    reopened = HistoryStore(str(tmp_path))
+    assert reopened.dates() == ["20250101"]
+    assert reopened.read("20250101") == {"results": []}
+
+
+def test_migrate_from_compressed_legacy_file(tmp_path):
+    legacy = tmp_path / "history.json.gz"
+    serializer.save(str(legacy), {"20250101": {"results": [1]}, "20250102": {"results": [2]}})
+    store = HistoryStore(str(tmp_path / "history"))
+    assert store.migrate_from(str(legacy)) == 2
+    assert store.load_all() == {"20250101": {"results": [1]}, "20250102": {"results": [2]}}
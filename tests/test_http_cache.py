@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from modules import http_cache, http_client
+
+URL = "http://example.invalid/race/racelist?rno=1&jcd=01&hd=20250101"
+DAY_END = datetime(2025, 1, 2, tzinfo=http_cache.JST).timestamp()
+
+
+@pytest.fixture(autouse=True)
+def clock(tmp_path, monkeypatch):
+    """空のキャッシュディレクトリと、進め方を決められる時計"""
+    monkeypatch.setattr(http_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(http_cache, "_index", None)
+    monkeypatch.setattr(http_cache, "_objects", {})
+    monkeypatch.setattr(http_cache, "_total", 0)
+    monkeypatch.setattr(http_cache, "_counters", dict.fromkeys(http_cache._counters, 0))
+    clock = SimpleNamespace(now=DAY_END - 3600)
+    monkeypatch.setattr(http_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def response(body, headers=None):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body
+    resp.headers.update(headers or {})
+    return resp
+
+
+def test_page_fetched_during_the_day_is_revalidated(clock):
+    http_cache.store(URL, response(b"before results"))
+    clock.now = DAY_END + 86400
+    cached, fresh = http_cache.lookup(URL)
+    assert cached.content == b"before results"
+    assert not fresh
+
+
+def test_page_fetched_after_the_day_is_immutable(clock):
+    clock.now = DAY_END + 1
+    http_cache.store(URL, response(b"final"))
+    assert http_cache.lookup(URL)[1]
+    assert not http_cache.is_immutable("http://example.invalid/index", DAY_END + 1)
+    assert not http_cache.is_immutable(URL.replace("20250101", "20251399"), DAY_END + 1)
+
+
+def test_not_modified_after_the_day_makes_entry_immutable(standin, clock):
+    calls = []
+
+    def route(path, query, n):
+        calls.append(n)
+        return 304, {"ETag": '"v1"'}, b""
+
+    server = standin(route)
+    yesterday = datetime.now(http_cache.JST) - timedelta(days=1)
+    url = server.url("/race?hd=" + yesterday.strftime("%Y%m%d"))
+    # 前日のうちに取得した内容
+    clock.now = yesterday.replace(hour=12).timestamp()
+    http_cache.store(url, response(b"cached", {"ETag": '"v1"'}))
+    clock.now = datetime.now(http_cache.JST).timestamp()
+
+    assert http_client.get(url, cache=True).content == b"cached"  # 条件付きGET → 304
+    assert http_client.get(url, cache=True).content == b"cached"  # 以後はネットワークに出ない
+    assert calls == [1]
+    assert http_cache.stats()["revalidated"] == 1
+    assert http_cache.stats()["hit"] == 1
+
+
+def test_eviction_runs_in_batches_down_to_low_water(clock, monkeypatch):
+    def store(i, fill):
+        clock.now += 1
+        http_cache.store(f"{URL}&x={i}", response(fill * 10))
+
+    store(0, b"0")
+    size = http_cache._total
+    monkeypatch.setattr(http_cache, "MAX_BYTES", size * 10)
+    for i in range(1, 10):
+        store(i, str(i).encode())
+    assert http_cache.stats()["evicted"] == 0
+
+    evictions = []
+    evict = http_cache._evict
+    monkeypatch.setattr(http_cache, "_evict", lambda index: evictions.append(1) or evict(index))
+    # 上限超えで1回だけ並べ替え、LOW_WATER（8個分）まで古い順にまとめて消す
+    store(10, b"a")
+    assert evictions == [1]
+    assert http_cache.stats()["evicted"] == 3
+    assert http_cache._total <= size * 10 * http_cache.LOW_WATER
+    assert set(http_cache._index) == {f"{URL}&x={i}" for i in range(3, 11)}
+    assert not any(http_cache.os.path.exists(http_cache._object_path(d)) for d in
+                   {http_cache.hashlib.sha256(str(i).encode() * 10).hexdigest() for i in range(3)})
+
+    # 低水位まで下げたので、次の保存では削除処理に入らない
+    store(11, b"b")
+    assert evictions == [1]
+    assert http_cache.stats()["evicted"] == 3
+
+
+def test_shared_objects_are_counted_once(clock):
+    http_cache.store(URL + "&x=1", response(b"same"))
+    size = http_cache._total
+    http_cache.store(URL + "&x=2", response(b"same"))
+    assert http_cache._total == size
+    http_cache.store(URL + "&x=1", response(b"changed"))
+    http_cache.store(URL + "&x=2", response(b"changed"))
+    assert list(http_cache._objects) == [http_cache._index[URL + "&x=1"]["body"]]
+    assert http_cache._total == http_cache._index[URL + "&x=1"]["size"]
@@ -0,0 +1,18 @@
+import merge_data
+
+
+def race(date, stadium, number):
+    return {"race_date": date, "race_stadium_number": stadium, "race_number": number, "boats": []}
+
+
+def test_merge_skips_races_without_numbers(tmp_path, capsys):
+    merger = merge_data.IncrementalMerger(str(tmp_path / "hist"), str(tmp_path / "index"))
+    broken = {"race_date": "2025-01-01", "race_stadium_number": 2}
+
+    added = merger.merge([race("2025-01-01", 2, 3), race("2025-01-01", None, 1), broken,
+                          race(None, 1, 1), race("2025-01-01", "01", "12")])
+
+    assert added == 2
+    assert [(r["race_stadium_number"], r["race_number"]) for r in merger.store.read("20250101")] == [
+        ("01", "12"), (2, 3)]
+    assert "[WARN] 日付・場・レース番号の無いレース 3件 を除外しました" in capsys.readouterr().out
@@ -0,0 +1,24 @@
+import csv
+
+import prepare_dataset_light
+from modules.history_store import HistoryStore
+
+
+def test_race_cards_from_fetch_data_become_rows(tmp_path):
+    racer = {"艇番": 1, "選手名": "山田", "級": "A1", "平均ST": 0.15, "F数": 0,
+             "全国勝率": 6.5, "当地勝率": 6.1, "モーター勝率": 35.2, "コース勝率": 55.0}
+    day = {"戸田": {"date": "20250101", "status": "開催中", "races": {"3": [racer]}},
+           "桐生": {"date": "20250101", "status": "ー", "races": {}}}
+    HistoryStore(str(tmp_path / "history_entries")).write("20250101", day)
+    out = tmp_path / "dataset.csv"
+
+    assert prepare_dataset_light.convert([str(tmp_path / "history_entries")], str(out)) == (1, 1)
+    with open(out, encoding="utf-8") as f:
+        row = next(csv.DictReader(f))
+    assert (row["race_date"], row["race_stadium_number"], row["race_number"]) == ("2025-01-01", "2", "3")
+    assert (row["racer_name"], row["racer_class"], row["course_win_rate"]) == ("山田", "A1", "55.0")
+
+
+def test_unknown_day_shape_is_reported(capsys):
+    assert list(prepare_dataset_light.day_rows("20250101", {"戸田": {"foo": 1}})) == []
+    assert "[WARN] 20250101 の履歴の形を判別できない" in capsys.readouterr().out
@@ -0,0 +1,23 @@
+from modules.race_index import RaceIndex, normalize
+
+
+def test_races_without_a_race_number_are_skipped():
+    data = [
+        {"race_date": "2025-01-01", "race_stadium_number": 1, "race_number": None, "boats": []},
+        {"race_date": "2025-01-01", "race_stadium_number": 1, "race_number": 3, "boats": []},
+        {"race_date": "2025-01-01", "race_stadium_number": 2, "boats": []},
+    ]
+    index = RaceIndex.from_data(data)
+    assert [(r["venue_code"], r["race_no"]) for r in index.races] == [("01", 3)]
+    assert index.venues() == [{"venue_code": "01", "venue": "桐生", "dates": ["20250101"], "races": 1}]
+
+
+def test_playwright_rows_do_not_get_race_numbers_from_their_position():
+    data = [{"venue": "戸田", "code": "02", "date": "20260114", "hit_rate": 73,
+             "races": [{"racer": "-", "mark": ""}, {"racer": "-", "mark": ""}]}]
+    assert normalize(data) == []
+
+
+def test_entry_race_numbers_are_read_not_defaulted():
+    data = {"桐生": {"date": "20250101", "races": [{"race_no": "2R", "boats": []}, {"boats": []}]}}
+    assert [(r["race_no"], r["boats"]) for r in normalize(data)] == [(2, [])]
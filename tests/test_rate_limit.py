@@ -0,0 +1,43 @@
+from modules import http_client, rate_limit
+
+
+def test_throttled_responses_slow_the_bucket_then_it_recovers(standin, monkeypatch):
+    monkeypatch.setattr(rate_limit, "INCREASE_STEP", 1.0)  # 回復を早めてテストを短くする
+    monkeypatch.setattr(rate_limit, "LATENCY_RATIO", 1000.0)  # ローカルの応答時間の揺れでは減速させない
+
+    def route(path, query, n):
+        if path == "/race" and n == 1:
+            return 429, {"Retry-After": "1"}, "too many requests"
+        if path == "/race" and n == 2:
+            return 503, {}, "unavailable"
+        return 200, {"Content-Type": "text/plain"}, "ok"
+
+    server = standin(route, rate=8.0)
+    bucket = rate_limit.bucket_for(server.url("/"))
+
+    resp = http_client.get(server.url("/race"))
+    assert resp.status_code == 200
+    # 429 → 503 → 200 の3回とも（urllib3 内部ではなく）バケットを通って1回ずつ数えられる
+    assert len(server.requests) == 3
+    assert bucket.throttled == 2
+    assert bucket.rate == 8.0 * 0.5 * 0.5 + 1.0
+    # Retry-After: 1 の間は次のリクエストを送らない
+    assert server.requests[1][0] - server.requests[0][0] >= 0.9
+
+    for _ in range(5):
+        assert http_client.get(server.url("/ok")).status_code == 200
+    assert bucket.rate == 8.0
+    assert bucket.throttled == 2
+
+
+def test_retry_after_blocks_other_requests_to_the_host(standin, monkeypatch):
+    def route(path, query, n):
+        if path == "/busy":
+            return 503, {"Retry-After": "1"}, "busy"
+        return 200, {}, "ok"
+
+    server = standin(route, rate=8.0)
+    monkeypatch.setattr(http_client, "RETRIES", 0)
+    assert http_client.get(server.url("/busy")).status_code == 503
+    assert http_client.get(server.url("/ok")).status_code == 200
+    assert server.requests[1][0] - server.requests[0][0] >= 0.9
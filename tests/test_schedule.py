@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace
+
+from modules import schedule
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_index_lists_open_venues_with_max_races():
+    # 「9R」「1R」は発売中・締切予定のレースで、開催レース数ではない
+    assert schedule.parse_index(read_fixture("race_index.html")) == {
+        "01": schedule.MAX_RACES,
+        "02": schedule.MAX_RACES,
+        "24": schedule.MAX_RACES,
+    }
+
+
+def test_parse_index_without_table_is_empty():
+    assert schedule.parse_index("<html><body><p>メンテナンス中</p></body></html>") == {}
+
+
+def test_day_schedule_is_fetched_once_per_date_even_when_it_fails(monkeypatch):
+    calls = []
+
+    def get(url, cache=False):
+        calls.append(url)
+        if "hd=20250101" in url:
+            raise ConnectionError("index down")
+        return SimpleNamespace(text="<html><body><p>本日の開催はありません</p></body></html>",
+                               raise_for_status=lambda: None)
+
+    monkeypatch.setattr(schedule, "_schedules", {})
+    monkeypatch.setattr(schedule.http_client, "get", get)
+
+    # 取得失敗は None（全場対象）。24場分問い合わせても取りに行くのは1回
+    assert all(schedule.is_open("20250101", f"{i:02d}") for i in range(1, 25))
+    assert schedule.race_count("20250101", "01") == schedule.MAX_RACES
+    assert schedule.open_venues("20250101") is None
+    # 開催の無い日は {}（失敗ではない）
+    assert not any(schedule.is_open("20250102", f"{i:02d}") for i in range(1, 25))
+    assert schedule.open_venues("20250102") == []
+    assert len(calls) == 2
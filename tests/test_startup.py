@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import IMPORT_BUDGET, READY_BUDGET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 新しいインタプリタで import app → lifespan（事前読み込み）まで行い、所要時間を出力する。
+# 分割データはリポジトリではなく一時ディレクトリに書き出す。モデルは読み込まない。
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+app.SHARD_DIR = sys.argv[1]
+application = app.create_app(preload_model=False)
+
+async def main():
+    started = time.perf_counter()
+    async with application.router.lifespan_context(application):
+        return time.perf_counter() - started, dict(application.state.startup)
+
+startup, state = asyncio.run(main())
+print(json.dumps({"import": imported, "startup": startup, "state": state}))
+"""
+
+
+def test_import_and_startup_stay_within_budget(tmp_path):
+    out = subprocess.run([sys.executable, "-c", PROBE, str(tmp_path / "shards")], cwd=ROOT,
+                         capture_output=True, text=True, check=True, timeout=60)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["state"]["heavy_modules_at_import"] == []
+    assert result["import"] < IMPORT_BUDGET
+    assert result["state"]["startup_seconds"] < READY_BUDGET
+    assert result["startup"] < READY_BUDGET
@@ -0,0 +1,47 @@
+from modules import warehouse
+
+
+def test_playwright_rows_are_not_turned_into_races(capsys):
+    conn = warehouse.connect(":memory:")
+    data = [{"venue": "戸田", "code": "02", "date": "20260114", "hit_rate": 73,
+             "races": [{"racer": "-", "mark": ""}] * 15}]
+
+    counts = warehouse.ingest_data(conn, data, "data/data.json")
+
+    assert counts == {"races": 0, "boats": 0, "results": 0, "weather": 0}
+    assert conn.execute("SELECT COUNT(*) FROM races").fetchone()[0] == 0
+    assert "[WARN] data/data.json" in capsys.readouterr().out
+
+
+def test_race_tables_keep_their_race_numbers():
+    conn = warehouse.connect(":memory:")
+    data = {"戸田": {"date": "20260114", "status": "開催中",
+                   "races": {"3": [{"艇番": 1, "選手名": "山田"}], "11": [{"艇番": 2, "選手名": "佐藤"}]}}}
+
+    warehouse.ingest_data(conn, data, "data/data.json")
+
+    rows = conn.execute("SELECT stadium, race_number, boat_number, racer_name FROM races "
+                        "JOIN boats USING (race_id) ORDER BY race_number").fetchall()
+    assert [tuple(r) for r in rows] == [("02", 3, 1, "山田"), ("02", 11, 2, "佐藤")]
+
+
+def test_ingest_path_reads_serializer_files_and_feeds_prepare_dataset(tmp_path, capsys):
+    import prepare_dataset
+    from modules import serializer
+
+    day = {"results": [{"race_date": "2025-01-01", "race_stadium_number": 2, "race_number": 1,
+                        "race_wave": 3, "race_weather_number": 1, "race_technique_number": 1,
+                        "boats": [{"racer_boat_number": 1, "racer_number": 4444, "racer_name": "山田",
+                                   "racer_course_number": 1, "racer_start_timing": 0.12,
+                                   "racer_place_number": 1}]}]}
+    src = tmp_path / "day.json.gz"
+    serializer.save(str(src), day, compression="gzip")
+    db = str(tmp_path / "warehouse.sqlite")
+    conn = warehouse.connect(db)
+    assert warehouse.ingest_path(conn, str(src))["boats"] == 1
+    conn.close()
+
+    out = tmp_path / "dataset.csv"
+    prepare_dataset.main(["--db", db, "--out", str(out)])
+    assert "20250101,20250101-02-1,戸田,1,波3cm,4444,山田,1,0.12,1,1" in out.read_text(encoding="utf-8")
+    assert "から 1行を読み込みました" in capsys.readouterr().out
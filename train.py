@@ -1,15 +1,20 @@
-import pandas as pd
-import json
 import os
 
+from modules import serializer
+from modules.feature_store import FeatureStore
+
 FEATURES_FILE = "features.csv"
+FEATURES_DIR = "data/features"
+COLUMNS = ["racer_number", "racer_start_timing", "racer_place_number"]
 MODEL_OUTPUT = "data.json"
 
 def main():
-    if not os.path.exists(FEATURES_FILE):
-        raise FileNotFoundError(f"{FEATURES_FILE} が見つかりません")
+    store = FeatureStore(FEATURES_DIR, legacy_csv=FEATURES_FILE)
+    if not len(store) and not os.path.exists(FEATURES_FILE):
+        raise FileNotFoundError(f"{FEATURES_DIR}/ も {FEATURES_FILE} も見つかりません")
 
-    df = pd.read_csv(FEATURES_FILE, encoding="utf-8-sig")
+    # 集計に使う列だけ読む
+    df = store.read(COLUMNS)
 
     # デバッグ用: カラム一覧を出力
     print("[DEBUG] CSV カラム:", df.columns.tolist())
@@ -41,8 +46,7 @@ def main():
         "racer_stats": grouped.to_dict(orient="records")
     }
 
-    with open(MODEL_OUTPUT, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    serializer.save(MODEL_OUTPUT, output)
 
     print(f"[INFO] 出力完了 -> {MODEL_OUTPUT}")
 
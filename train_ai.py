@@ -1,17 +1,22 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 import joblib
 
+from modules.feature_store import FeatureStore
+
 FEATURES_FILE = "features.csv"
+FEATURES_DIR = "data/features"
 MODEL_FILE = "model.pkl"
+FEATURES = ["racer_course_number", "racer_start_timing", "race_wind", "race_wave", "race_weather_number"]
+TARGET = "racer_place_number"
 
 def train():
-    df = pd.read_csv(FEATURES_FILE)
+    # 学習に使う列だけ読む（ストアが空なら features.csv）
+    df = FeatureStore(FEATURES_DIR, legacy_csv=FEATURES_FILE).read(FEATURES + [TARGET])
 
     # 特徴量とターゲット
-    X = df[["racer_course_number", "racer_start_timing", "race_wind", "race_wave", "race_weather_number"]].fillna(0)
-    y = df["racer_place_number"].fillna(0)
+    X = df[FEATURES].astype("float64").fillna(0)
+    y = df[TARGET].astype("float64").fillna(0)
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -3,28 +3,33 @@
 # 競艇AI予測モデル 自動再学習スクリプト
 # =========================================
 import os
-import json
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
+from modules import serializer
+from modules.history_store import HistoryStore
+
 DATA_DIR = "data"
-HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+HISTORY_FILE = os.path.join(DATA_DIR, "history.json")  # 旧形式
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
 MODEL_FILE = os.path.join(DATA_DIR, "model.json")
 
 # ---------------------------------------------------------
 # データ読み込み
 # ---------------------------------------------------------
 def load_history():
+    store = HistoryStore(HISTORY_DIR)
+    if len(store):
+        return store.load_all()
+
     if not os.path.exists(HISTORY_FILE):
         print("⚠️ history.json が存在しません。")
         return None
 
-    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-        history = json.load(f)
-    return history
+    return serializer.load(HISTORY_FILE)
 
 
 # ---------------------------------------------------------
@@ -87,8 +92,7 @@ def save_model(model, label_encoder, acc):
         "classes": label_encoder.classes_.tolist(),
         "trees": [tree.get_params() for tree in model.estimators_[:3]]  # 簡易保存
     }
-    with open(MODEL_FILE, "w", encoding="utf-8") as f:
-        json.dump(model_data, f, ensure_ascii=False, indent=2)
+    serializer.save(MODEL_FILE, model_data)
     print(f"💾 モデルを保存しました: {MODEL_FILE}")
 
 